@@ -2,6 +2,8 @@
 ASGI config for DeshGhuri project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with ``uvicorn DeshGhuri.asgi:application`` to get live notification
+streams; under WSGI (runserver, wsgi.py) pages poll on a timer instead.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +15,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DeshGhuri.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.urls import reverse  # noqa: E402
+from main.streams import notification_stream_app  # noqa: E402
+
+# Long-lived event streams skip Django's handler so they do not each hold a thread
+NOTIFICATION_STREAM_PATH = reverse('notification_stream')
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == NOTIFICATION_STREAM_PATH:
+        return await notification_stream_app(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -69,10 +69,23 @@ TEMPLATES = [
 WSGI_APPLICATION = 'DeshGhuri.wsgi.application'
 
 # Database
+# WAL lets readers proceed while a booking is being written, but switching a
+# database to it rewrites the file (and adds -wal/-shm files beside it), so it
+# is opt-in: set DESHGHURI_SQLITE_WAL=1 where the database isn't the committed one.
+SQLITE_WAL = os.environ.get('DESHGHURI_SQLITE_WAL') == '1'
+SQLITE_WAL_PRAGMAS = 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Wait for the write lock instead of failing fast, and take it at BEGIN so
+            # booking transactions queue up rather than deadlock.
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            **({'init_command': SQLITE_WAL_PRAGMAS} if SQLITE_WAL else {}),
+        },
     }
 }
 
@@ -101,5 +114,9 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'webmaster@localhost'
 
+# Seconds between in-process lifecycle sweeps (tour and booking statuses by date). Off by default:
+# run `manage.py sweep_lifecycle` from cron, or `sweep_lifecycle --every 300` as its own process.
+LIFECYCLE_SWEEP_SECONDS = 0
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -35,6 +35,8 @@ urlpatterns = [
     path('accounts/', include('accounts.urls')),  # accounts app routes
     #main
     path('',main_views.home,name='home'),
+    path('api/suggest/', main_views.suggest, name='suggest'),
+    path('api/notifications/outbox/', main_views.notification_outbox, name='notification_outbox'),
 
     #apps urls
 
@@ -1,3 +1,7 @@
+from functools import partial
+
+from main.notifications import latest_notifications
+from main.streams import SHORT_POLL_SECONDS, streaming
 from .models import User
 
 def user_role(request):
@@ -8,15 +12,22 @@ def user_role(request):
     user = None
     role = None
     unread_notifications_count = 0
+    recent = list
 
     if request.user.is_authenticated:
         user = request.user
         role = user.role  # from your custom User model field
         # Add notification count
-        unread_notifications_count = user.notifications.filter(is_read=False).count()
+        unread_notifications_count = user.unread_notifications
+        # Called by the template only when a navbar shows the dropdown
+        recent = partial(latest_notifications, user)
 
     return {
         'logged_user': user,
         'logged_role': role,
         'unread_notifications_count': unread_notifications_count,
+        'latest_notifications': recent,
+        # Live notifications over server-sent events or long-polls under ASGI, a timed poll under WSGI
+        'notification_streaming': streaming(request),
+        'notification_poll_seconds': SHORT_POLL_SECONDS,
     }
\ No newline at end of file
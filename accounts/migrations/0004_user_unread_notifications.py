@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:20
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_unread_notifications(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    unread = User.objects.annotate(
+        unread=Count('notifications', filter=Q(notifications__is_read=False))
+    ).filter(unread__gt=0).values_list('pk', 'unread')
+    for pk, count in unread:
+        User.objects.filter(pk=pk).update(unread_notifications=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_agree_terms'),
+        ('hotels', '0002_hotel_area_hotel_average_rating_hotel_city_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_notifications',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_unread_notifications, migrations.RunPython.noop),
+    ]
@@ -17,6 +17,18 @@ class User(AbstractUser):
 
     agree_terms = models.BooleanField(default=False)
 
+    # Maintained by the notification code with relative UPDATEs; see main.notifications
+    unread_notifications = models.PositiveIntegerField(default=0, editable=False)
+
+    def save(self, *args, **kwargs):
+        # A full save of an existing user must not write back a stale unread count
+        if self._state.adding is False and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'unread_notifications'
+            ]
+        super().save(*args, **kwargs)
+
     def is_tourist(self):
         return self.role == 'tourist'
 
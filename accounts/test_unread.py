@@ -0,0 +1,43 @@
+import pytest
+
+from accounts.models import User
+from hotels.models import Notification
+from main.notifications import NotificationOutbox, mark_all_read, notify, reconcile_unread_counts
+
+
+def unread(user):
+    # The stored counter, checked against a recount from the notifications table
+    assert reconcile_unread_counts() == 0
+    return User.objects.values_list('unread_notifications', flat=True).get(pk=user.pk)
+
+
+@pytest.mark.django_db
+def test_unread_counter_follows_notifications(django_capture_on_commit_callbacks):
+    user = User.objects.create_user(username='tourist', password='x', role='tourist')
+    stale = User.objects.get(pk=user.pk)
+    assert unread(user) == 0
+
+    first = Notification.objects.create(user=user, message='Booking received')
+    second = Notification.objects.create(user=user, message='Booking confirmed')
+    with django_capture_on_commit_callbacks():
+        notify(user, 'Festival this weekend')
+    NotificationOutbox().drain()
+    assert unread(user) == 3
+
+    first.is_read = True
+    first.save()
+    first.save()
+    assert unread(user) == 2
+
+    # Saving a user loaded before the notifications arrived keeps the stored count
+    stale.first_name = 'Rahim'
+    stale.save()
+    assert unread(user) == 2
+
+    first.delete()
+    second.delete()
+    assert unread(user) == 1
+
+    Notification.objects.create(user=user, message='Tour accepted')
+    assert mark_all_read(user) == 2
+    assert unread(user) == 0
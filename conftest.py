@@ -0,0 +1,17 @@
+import pytest
+from django.conf import settings
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(tmp_path_factory):
+    # A file, as in production, so concurrent tests wait on SQLite's write lock
+    # instead of failing with shared-cache "table is locked" errors
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = str(tmp_path_factory.mktemp('db') / 'test.sqlite3')
+
+
+@pytest.fixture(autouse=True)
+def drain_outbox():
+    """Write queued notifications while the test database is still the one connected"""
+    yield
+    from main.notifications import outbox
+    outbox.flush()
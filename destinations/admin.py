@@ -3,4 +3,4 @@ from .models import Destination
 
 @admin.register(Destination)
 class DestinationAdmin(admin.ModelAdmin):
-    list_display = ('name', 'division', 'type', 'best_time')
+    list_display = ('name', 'division', 'type', 'best_time', 'latitude', 'longitude')
@@ -1,4 +1,6 @@
 from django.db import models
+from django.core.validators import MinValueValidator, MaxValueValidator
+from main.geo import cell_for
 
 class Destination(models.Model):
     name = models.CharField(max_length=200, blank=True, null=True)
@@ -13,7 +15,20 @@ class Destination(models.Model):
     extra_image4 = models.ImageField(upload_to='destinations/', blank=True, null=True)
     extra_image5 = models.ImageField(upload_to='destinations/', blank=True, null=True)
     extra_image6 = models.ImageField(upload_to='destinations/', blank=True, null=True)
+    latitude = models.FloatField(null=True, blank=True,
+                                 validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True,
+                                  validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    # Grid cell of (latitude, longitude) for proximity search, kept in sync by save()
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.geo_cell = cell_for(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & {'latitude', 'longitude'}:
+            kwargs['update_fields'] = {*update_fields, 'geo_cell'}
+        super().save(*args, **kwargs)
+
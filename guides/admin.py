@@ -1,26 +1,40 @@
+from django import forms
 from django.contrib import admin
-from .models import GuideProfile, TourRequest, Tour, Earning, Review
+
+from .availability import busy_days
+from .models import (
+    GuideDay, GuideProfile, Language, TourRequest, Tour, Earning, EarningDaily, EarningMonthly, Review,
+)
 
 
 @admin.register(GuideProfile)
 class GuideProfileAdmin(admin.ModelAdmin):
     list_display = (
         'user', 'phone', 'experience_years', 'is_verified',
-        'average_rating', 'is_completed'
+        'average_rating', 'review_count', 'is_completed'
     )
     list_filter = ('is_verified', 'is_completed')
     search_fields = ('user__username', 'user__first_name', 'user__last_name', 'phone', 'languages')
-    readonly_fields = ('average_rating',)
+    readonly_fields = ('average_rating', 'review_count', 'rating_sum', 'spoken_languages')
     fieldsets = (
         ("User Information", {
-            "fields": ('user', 'phone', 'avatar', 'bio', 'languages', 'address')
+            "fields": ('user', 'phone', 'avatar', 'bio', 'languages', 'spoken_languages', 'address')
         }),
         ("Experience", {
-            "fields": ('experience_years', 'is_verified', 'average_rating', 'is_completed')
+            "fields": ('experience_years', 'is_verified', 'is_completed')
+        }),
+        ("Ratings", {
+            "fields": ('average_rating', 'review_count', 'rating_sum')
         }),
     )
 
 
+@admin.register(Language)
+class LanguageAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
 @admin.register(TourRequest)
 class TourRequestAdmin(admin.ModelAdmin):
     list_display = (
@@ -33,7 +47,7 @@ class TourRequestAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at',)
     fieldsets = (
         ("Basic Info", {
-            "fields": ('tourist', 'guide', 'destination', 'date', 'places_to_explore')
+            "fields": ('tourist', 'guide', 'destination', 'date', 'language', 'places_to_explore')
         }),
         ("Details", {
             "fields": ('number_of_travelers', 'duration_hours', 'price', 'notes')
@@ -44,8 +58,26 @@ class TourRequestAdmin(admin.ModelAdmin):
     )
 
 
+class TourAdminForm(forms.ModelForm):
+    class Meta:
+        model = Tour
+        fields = '__all__'
+
+    def clean(self):
+        # Saving a tour holds its guide's days (guides.signals); catch a clash here rather than as a 500
+        cleaned_data = super().clean()
+        guide, start_date, end_date = (cleaned_data.get(name) for name in ('guide', 'start_date', 'end_date'))
+        if guide and start_date and end_date:
+            taken = busy_days(guide.pk, start_date, end_date, ignore_tour=self.instance.pk)
+            if taken:
+                raise forms.ValidationError(
+                    f"{guide} already has a tour or a blackout on {', '.join(str(day) for day in taken)}.")
+        return cleaned_data
+
+
 @admin.register(Tour)
 class TourAdmin(admin.ModelAdmin):
+    form = TourAdminForm
     list_display = (
         'guide', 'destination', 'start_date', 'end_date', 'price', 'status'
     )
@@ -62,6 +94,14 @@ class TourAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(GuideDay)
+class GuideDayAdmin(admin.ModelAdmin):
+    list_display = ('guide', 'date', 'reason', 'tour')
+    list_filter = ('reason', 'date')
+    search_fields = ('guide__username',)
+    ordering = ('guide', 'date')
+
+
 @admin.register(Earning)
 class EarningAdmin(admin.ModelAdmin):
     list_display = ('guide', 'amount', 'description', 'date')
@@ -71,6 +111,22 @@ class EarningAdmin(admin.ModelAdmin):
     readonly_fields = ('date',)
 
 
+@admin.register(EarningDaily)
+class EarningDailyAdmin(admin.ModelAdmin):
+    list_display = ('guide', 'date', 'amount', 'count')
+    list_filter = ('date',)
+    search_fields = ('guide__username',)
+    ordering = ('guide', '-date')
+
+
+@admin.register(EarningMonthly)
+class EarningMonthlyAdmin(admin.ModelAdmin):
+    list_display = ('guide', 'month', 'amount', 'count')
+    list_filter = ('month',)
+    search_fields = ('guide__username',)
+    ordering = ('guide', '-month')
+
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('tourist', 'guide', 'rating', 'created_at')
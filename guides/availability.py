@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+
+from .models import GuideDay, Tour
+
+
+class GuideUnavailable(Exception):
+    """Raised when a guide is already booked or blacked out on a day a tour needs"""
+
+
+def tour_days(start_date, end_date):
+    """Every date in [start_date, end_date]"""
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def busy_days(guide_id, start_date, end_date=None, ignore_tour=None):
+    """The dates in the range on which the guide is booked or blacked out, apart from tour `ignore_tour`'s days"""
+    days = GuideDay.objects.filter(guide_id=guide_id, date__gte=start_date, date__lte=end_date or start_date)
+    if ignore_tour is not None:
+        days = days.exclude(tour_id=ignore_tour)
+    return list(days.order_by('date').values_list('date', flat=True))
+
+
+def is_available(guide_id, start_date, end_date=None):
+    return not GuideDay.objects.filter(
+        guide_id=guide_id, date__gte=start_date, date__lte=end_date or start_date
+    ).exists()
+
+
+def hold_days(tour_id, guide_id, start_date, end_date):
+    """
+    Book the guide for every day of a tour, or raise GuideUnavailable.
+
+    The unique (guide, date) constraint does the checking, so two concurrent
+    acceptances for the same day cannot both succeed.
+    """
+    days = tour_days(start_date, end_date)
+    try:
+        with transaction.atomic():
+            GuideDay.objects.bulk_create([
+                GuideDay(guide_id=guide_id, date=day, reason=GuideDay.TOUR, tour_id=tour_id) for day in days
+            ])
+    except IntegrityError:
+        taken = busy_days(guide_id, start_date, end_date)
+        raise GuideUnavailable(f"Guide is not available on {', '.join(str(day) for day in taken) or 'those dates'}.")
+
+
+def hold_tours(tours):
+    """hold_days for a batch of saved tours with one INSERT; raises GuideUnavailable if any day is taken"""
+    try:
+        with transaction.atomic():
+            GuideDay.objects.bulk_create([
+                GuideDay(guide_id=tour.guide_id, date=day, reason=GuideDay.TOUR, tour_id=tour.pk)
+                for tour in tours for day in tour_days(tour.start_date, tour.end_date)
+            ])
+    except IntegrityError:
+        raise GuideUnavailable("Guide is already booked on one of those dates.")
+
+
+def release_days(tour_id):
+    GuideDay.objects.filter(tour_id=tour_id).delete()
+
+
+def block_date(guide, date):
+    """Black out a day; returns False if the guide already has a tour or blackout then"""
+    _, created = GuideDay.objects.get_or_create(guide=guide, date=date, defaults={'reason': GuideDay.BLACKOUT})
+    return created
+
+
+def unblock_date(guide, date):
+    return GuideDay.objects.filter(guide=guide, date=date, reason=GuideDay.BLACKOUT).delete()[0] > 0
+
+
+def available_guides(guides, date):
+    """Narrow a GuideProfile queryset to guides free on `date`"""
+    return guides.exclude(Exists(GuideDay.objects.filter(guide=OuterRef('user_id'), date=date)))
+
+
+def rebuild_guide_days(batch_size=2000):
+    """Recreate every tour-booked GuideDay from the Tour rows, keeping blackouts; returns conflicting days"""
+    conflicts = []
+    with transaction.atomic():
+        GuideDay.objects.filter(reason=GuideDay.TOUR).delete()
+        taken = set(GuideDay.objects.values_list('guide_id', 'date'))
+        rows = []
+        tours = Tour.objects.values_list('pk', 'guide_id', 'start_date', 'end_date').order_by('start_date', 'pk')
+        for tour_id, guide_id, start_date, end_date in tours.iterator(chunk_size=batch_size):
+            for day in tour_days(start_date, end_date):
+                if (guide_id, day) in taken:
+                    conflicts.append((guide_id, day, tour_id))
+                    continue
+                taken.add((guide_id, day))
+                rows.append(GuideDay(guide_id=guide_id, date=day, reason=GuideDay.TOUR, tour_id=tour_id))
+        GuideDay.objects.bulk_create(rows, batch_size=batch_size)
+    return conflicts
@@ -1,5 +1,7 @@
 from django import forms
-from .models import GuideProfile, TourRequest, Review
+from django.utils import timezone
+from .availability import is_available
+from .models import GuideProfile, Language, TourRequest, Review
 
 
 class GuideProfileForm(forms.ModelForm):
@@ -16,6 +18,31 @@ class GuideProfileForm(forms.ModelForm):
         }
 
 
+class GuideSearchForm(forms.Form):
+    q = forms.CharField(required=False, widget=forms.TextInput(attrs={'placeholder': 'Name, location...'}))
+    language = forms.ModelChoiceField(
+        required=False,
+        queryset=Language.objects.filter(guides__is_completed=True).distinct(),
+        empty_label='All Languages',
+    )
+    EXPERIENCE_CHOICES = [
+        ('', 'Any Experience'),
+        ('1', '1+ Years'),
+        ('3', '3+ Years'),
+        ('5', '5+ Years'),
+    ]
+    min_experience = forms.TypedChoiceField(required=False, choices=EXPERIENCE_CHOICES, coerce=int, empty_value=None)
+    RATING_CHOICES = [
+        ('', 'Any Rating'),
+        ('3', '3+ Stars'),
+        ('4', '4+ Stars'),
+        ('4.5', '4.5+ Stars'),
+    ]
+    min_rating = forms.TypedChoiceField(required=False, choices=RATING_CHOICES, coerce=float, empty_value=None)
+    verified = forms.BooleanField(required=False, label='Verified only')
+    date = forms.DateField(required=False, label='Available on', widget=forms.DateInput(attrs={'type': 'date'}))
+
+
 class TourRequestForm(forms.ModelForm):
     class Meta:
         model = TourRequest
@@ -63,6 +90,8 @@ class TourRequestForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         self.guide_destination = kwargs.pop('guide_destination', None)
+        # The guide user being requested, to check the date against their calendar
+        self.guide = kwargs.pop('guide', None)
         super().__init__(*args, **kwargs)
 
         if self.guide_destination:
@@ -83,6 +112,41 @@ class TourRequestForm(forms.ModelForm):
             raise forms.ValidationError("Price cannot be negative.")
         return price
 
+    def clean_date(self):
+        date = self.cleaned_data.get('date')
+        if date and self.guide is not None and not is_available(self.guide.pk, date):
+            raise forms.ValidationError("This guide is not available on that date. Please pick another day.")
+        return date
+
+
+class OpenTourRequestForm(TourRequestForm):
+    """A request posted to the open board for any guide to claim"""
+    language = forms.ModelChoiceField(
+        required=False,
+        queryset=Language.objects.filter(guides__is_completed=True).distinct(),
+        empty_label='Any language',
+        label='Preferred Language',
+        widget=forms.Select(attrs={
+            'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+        }),
+    )
+
+    class Meta(TourRequestForm.Meta):
+        fields = TourRequestForm.Meta.fields + ['language']
+
+    def clean_date(self):
+        date = super().clean_date()
+        if date and date < timezone.localdate():
+            raise forms.ValidationError("Please choose a date from today on.")
+        return date
+
+
+class OpenRequestFilterForm(forms.Form):
+    language = forms.ModelChoiceField(required=False, queryset=Language.objects.all(),
+                                      empty_label='My languages')
+    destination = forms.CharField(required=False, widget=forms.TextInput(attrs={'placeholder': 'Destination'}))
+    date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
 
 # ENHANCED ReviewForm with proper rating widget
 class ReviewForm(forms.ModelForm):
@@ -0,0 +1,80 @@
+"""
+Group tour proposals: pending requests a guide could serve as one Tour.
+
+Requests are compatible when they are for the same guide, destination
+(ignoring case and spacing), date and duration. Each compatible set is
+packed into groups whose travelers fit GROUP_CAPACITY, largest parties
+first, and every group of two or more requests becomes a proposal. The
+whole pass is two queries, however many requests are pending: one for the
+requests and one for the guides' busy days.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from .models import GuideDay, TourRequest
+
+# Most travelers one guide takes on a merged tour
+GROUP_CAPACITY = 15
+
+
+def destination_key(destination):
+    return ' '.join(destination.split()).casefold()
+
+
+def pack(requests, capacity):
+    """First-fit decreasing: lists of requests whose travelers add up to at most `capacity`"""
+    groups = []
+    for request in sorted(requests, key=lambda r: (-r['number_of_travelers'], r['pk'])):
+        for group in groups:
+            if group['travelers'] + request['number_of_travelers'] <= capacity:
+                group['requests'].append(request)
+                group['travelers'] += request['number_of_travelers']
+                break
+        else:
+            groups.append({'requests': [request], 'travelers': request['number_of_travelers']})
+    return groups
+
+
+def propose_groups(guide=None, capacity=GROUP_CAPACITY):
+    """
+    Merge proposals over every pending request (or one guide's), biggest
+    groups first. Each is a dict with the guide, destination, date,
+    duration, travelers, summed price and request ids, plus `available`:
+    False when the guide is already booked that day.
+    """
+    pending = TourRequest.objects.filter(status="pending", guide__isnull=False)
+    if guide is not None:
+        pending = pending.filter(guide=guide)
+    compatible = defaultdict(list)
+    for row in pending.values('pk', 'guide_id', 'destination', 'date', 'duration_hours',
+                              'number_of_travelers', 'price'):
+        key = (row['guide_id'], destination_key(row['destination']), row['date'], row['duration_hours'])
+        compatible[key].append(row)
+
+    proposals = []
+    for (guide_id, _, day, duration), requests in compatible.items():
+        if len(requests) < 2:
+            continue
+        for group in pack(requests, capacity):
+            if len(group['requests']) < 2:
+                continue
+            members = sorted(group['requests'], key=lambda r: r['pk'])
+            proposals.append({
+                'guide_id': guide_id,
+                'destination': ' '.join(members[0]['destination'].split()),
+                'date': day,
+                'duration_hours': duration,
+                'travelers': group['travelers'],
+                'price': sum((r['price'] or Decimal(0) for r in members), Decimal(0)),
+                'request_ids': [r['pk'] for r in members],
+            })
+
+    busy = set()
+    if proposals:
+        busy = set(GuideDay.objects.filter(
+            guide_id__in={p['guide_id'] for p in proposals}, date__in={p['date'] for p in proposals},
+        ).values_list('guide_id', 'date'))
+    for proposal in proposals:
+        proposal['available'] = (proposal['guide_id'], proposal['date']) not in busy
+    proposals.sort(key=lambda p: (-len(p['request_ids']), p['date'], p['guide_id']))
+    return proposals
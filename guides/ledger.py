@@ -0,0 +1,135 @@
+"""
+A guide's earnings: the Earning ledger plus daily and monthly rollups.
+
+Every Earning insert, edit or delete adds its delta to one EarningDaily and
+one EarningMonthly row (guides.signals), so the earnings page and the chart
+API read a handful of rollup rows however long the guide's history is.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+from django.utils.formats import date_format
+
+from main.keyset import paginate
+
+from .models import Earning, EarningDaily, EarningMonthly
+
+LEDGER_ORDERING = ['-date', '-id']
+LEDGER_PAGE_SIZE = 20
+# Chart ranges in days; YEAR is this calendar year, month by month
+CHART_DAYS = (7, 30, 90)
+YEAR = 365
+
+
+def apply_earning_delta(guide_id, when, amount, count):
+    """Add `amount` and `count` to the guide's rollups for the day and month of `when`"""
+    day = timezone.localdate(when)
+    month = day.replace(day=1)
+    amount = Decimal(amount)
+    with transaction.atomic():
+        for model, field, value in ((EarningDaily, 'date', day), (EarningMonthly, 'month', month)):
+            if count > 0:
+                model.objects.bulk_create([model(guide_id=guide_id, **{field: value})], ignore_conflicts=True)
+            model.objects.filter(guide_id=guide_id, **{field: value}).update(
+                amount=F('amount') + amount, count=F('count') + count,
+            )
+
+
+def add_earnings(earnings):
+    """
+    Insert unsaved Earning objects with one INSERT and roll them up, one
+    delta per guide and day, since bulk_create skips the save signals.
+    """
+    earnings = Earning.objects.bulk_create(earnings)
+    totals = defaultdict(lambda: [Decimal(0), 0, None])
+    for earning in earnings:
+        total = totals[earning.guide_id, timezone.localdate(earning.date)]
+        total[0] += Decimal(earning.amount)
+        total[1] += 1
+        total[2] = earning.date
+    for (guide_id, _), (amount, count, when) in totals.items():
+        apply_earning_delta(guide_id, when, amount, count)
+    return earnings
+
+
+def earnings_summary(guide):
+    """All-time total and count, and this month's total, from the monthly rollup in one query"""
+    this_month = timezone.localdate().replace(day=1)
+    summary = EarningMonthly.objects.filter(guide=guide).aggregate(
+        total=Sum('amount'),
+        count=Sum('count'),
+        monthly_earnings=Sum('amount', filter=Q(month=this_month)),
+    )
+    return {key: value or 0 for key, value in summary.items()}
+
+
+def monthly_earnings(guide):
+    """This month's total for one guide: one unique-index probe"""
+    this_month = timezone.localdate().replace(day=1)
+    amount = EarningMonthly.objects.filter(guide=guide, month=this_month).values_list('amount', flat=True).first()
+    return amount or 0
+
+
+def chart_series(guide, days=30):
+    """
+    Chart points for the last `days` days, one per day, or with days=YEAR
+    one per month of this year. Missing days and months are zero.
+    """
+    today = timezone.localdate()
+    if days == YEAR:
+        rows = {month: (amount, count) for month, amount, count in EarningMonthly.objects.filter(
+            guide=guide, month__year=today.year,
+        ).values_list('month', 'amount', 'count')}
+        slots = [today.replace(month=month, day=1) for month in range(1, today.month + 1)]
+        fmt = 'M Y'
+    else:
+        start = today - timedelta(days=days - 1)
+        rows = {day: (amount, count) for day, amount, count in EarningDaily.objects.filter(
+            guide=guide, date__gte=start, date__lte=today,
+        ).values_list('date', 'amount', 'count')}
+        slots = [start + timedelta(days=i) for i in range(days)]
+        fmt = 'M d'
+
+    points = []
+    for slot in slots:
+        amount, count = rows.get(slot, (0, 0))
+        points.append({'date': slot.isoformat(), 'label': date_format(slot, fmt), 'amount': float(amount),
+                       'count': count})
+    return {
+        'period': 'month' if days == YEAR else 'day',
+        'points': points,
+        'total': round(sum(point['amount'] for point in points), 2),
+        'count': sum(point['count'] for point in points),
+    }
+
+
+def ledger_page(guide, cursor=None, per_page=LEDGER_PAGE_SIZE):
+    """One keyset page of the guide's earnings, newest first; raises main.keyset.InvalidCursor"""
+    return paginate(Earning.objects.filter(guide=guide), LEDGER_ORDERING, cursor, per_page)
+
+
+def recent_earnings(guide, count=5):
+    return Earning.objects.filter(guide=guide).order_by(*LEDGER_ORDERING)[:count]
+
+
+def rebuild_earning_rollups(batch_size=2000):
+    """Recompute every EarningDaily and EarningMonthly row from Earning; returns (days, months)"""
+    built = []
+    with transaction.atomic():
+        for model, field, trunc in ((EarningDaily, 'date', TruncDate), (EarningMonthly, 'month', TruncMonth)):
+            rows = list(Earning.objects.annotate(slot=trunc('date', output_field=DateField())).values(
+                'guide_id', 'slot',
+            ).annotate(total=Sum('amount'), rows=Count('pk')).order_by())
+            model.objects.all().delete()
+            model.objects.bulk_create(
+                (model(guide_id=row['guide_id'], amount=row['total'], count=row['rows'], **{field: row['slot']})
+                 for row in rows),
+                batch_size=batch_size,
+            )
+            built.append(len(rows))
+    return tuple(built)
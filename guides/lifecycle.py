@@ -0,0 +1,61 @@
+"""
+Tour status by date: pending tours become ongoing on their start date and
+completed once their end date has passed, telling the guide and tourists.
+"""
+from collections import defaultdict
+
+from django.utils import timezone
+
+from main.lifecycle import CHUNK_SIZE, advance_in_chunks
+from main.notifications import notify_each
+
+from .models import Tour
+
+
+def tourists_by_tour(tour_ids):
+    tourists = defaultdict(list)
+    for tour_id, user_id in Tour.tourists.through.objects.filter(tour_id__in=tour_ids).values_list(
+            'tour_id', 'user_id'):
+        tourists[tour_id].append(user_id)
+    return tourists
+
+
+def set_status(tours, status, guide_message, tourist_message):
+    ids = [tour.pk for tour in tours]
+    Tour.objects.filter(pk__in=ids).update(status=status)
+    tourists = tourists_by_tour(ids)
+    notifications = []
+    for tour in tours:
+        notifications.append((tour.guide_id, guide_message.format(tour=tour)))
+        notifications.extend((user_id, tourist_message.format(tour=tour)) for user_id in tourists[tour.pk])
+    notify_each(notifications)
+
+
+def due_to_start(today=None):
+    today = today or timezone.localdate()
+    return Tour.objects.filter(status="pending", start_date__lte=today, end_date__gte=today)
+
+
+def due_to_complete(status, today=None):
+    return Tour.objects.filter(status=status, end_date__lt=today or timezone.localdate())
+
+
+def start_tours(today=None, chunk_size=CHUNK_SIZE, pause=0):
+    """Mark pending tours under way from their start date; returns how many started"""
+    return advance_in_chunks(
+        due_to_start(today).only('pk', 'guide_id', 'destination'), ['start_date', 'id'],
+        lambda tours: set_status(tours, "ongoing", "Your tour to {tour.destination} starts today.",
+                                 "Your tour to {tour.destination} starts today. Have a great trip!"),
+        chunk_size, pause,
+    )
+
+
+def complete_tours(today=None, chunk_size=CHUNK_SIZE, pause=0):
+    """Mark tours completed once their last day has passed; returns how many completed"""
+    # One status at a time, so each pass is a range scan of the (status, end_date) index in order
+    return sum(advance_in_chunks(
+        due_to_complete(status, today).only('pk', 'guide_id', 'destination'), ['end_date', 'id'],
+        lambda tours: set_status(tours, "completed", "Your tour to {tour.destination} is complete.",
+                                 "Your tour to {tour.destination} is complete. You can now review your guide."),
+        chunk_size, pause,
+    ) for status in ["pending", "ongoing"])
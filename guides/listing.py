@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+
+from main.cache import bump_version, versioned_key
+from main.keyset import paginate
+
+from .models import GuideProfile, Language
+
+# Sort key -> (label, keyset ordering); each ordering has a matching index on GuideProfile
+SORTS = {
+    'rating': ("Top rated", ['-average_rating', '-review_count', '-id']),
+    'experience': ("Most experienced", ['-experience_years', '-id']),
+    'reviews': ("Most reviewed", ['-review_count', '-id']),
+}
+STATS_KEY = 'guides:list-stats'
+STATS_SECONDS = 10 * 60
+
+
+def sort_choices():
+    return [(key, label) for key, (label, _) in SORTS.items()]
+
+
+def listed_guides():
+    return GuideProfile.objects.filter(is_completed=True)
+
+
+def filter_guides(guides, query=None, language=None, verified=False, min_rating=None, min_experience=None):
+    """Narrow a GuideProfile queryset by the guide search filters"""
+    if query:
+        guides = guides.filter(
+            Q(user__first_name__icontains=query) | Q(user__last_name__icontains=query)
+            | Q(user__username__icontains=query) | Q(address__icontains=query) | Q(bio__icontains=query)
+        )
+    if language:
+        guides = guides.filter(spoken_languages=language)
+    if verified:
+        guides = guides.filter(is_verified=True)
+    if min_rating:
+        guides = guides.filter(average_rating__gte=min_rating)
+    if min_experience:
+        guides = guides.filter(experience_years__gte=min_experience)
+    return guides
+
+
+def guide_page(guides, sort=None, cursor=None, per_page=12):
+    """
+    One keyset page of a filtered GuideProfile queryset, with the user and
+    languages each card shows loaded up front. Raises
+    main.keyset.InvalidCursor for a bad cursor. Returns (sort key used, page).
+    """
+    if sort not in SORTS:
+        sort = 'rating'
+    guides = guides.select_related('user').prefetch_related('spoken_languages')
+    return sort, paginate(guides, SORTS[sort][1], cursor, per_page)
+
+
+def listing_stats():
+    """Totals over every listed guide for the guide list header, cached until a profile changes"""
+    key = versioned_key(STATS_KEY)
+    stats = cache.get(key)
+    if stats is None:
+        stats = listed_guides().aggregate(
+            total=Count('id'),
+            verified=Count('id', filter=Q(is_verified=True)),
+            avg_experience=Avg('experience_years'),
+        )
+        stats['avg_experience'] = round(stats['avg_experience'] or 0)
+        stats['languages'] = Language.objects.filter(guides__is_completed=True).distinct().count()
+        cache.set(key, stats, STATS_SECONDS)
+    return stats
+
+
+def invalidate_listing_stats():
+    """Retire the cached totals in every process once the current transaction commits (see main.cache)"""
+    bump_version(STATS_KEY)
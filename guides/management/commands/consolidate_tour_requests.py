@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from guides.availability import GuideUnavailable
+from guides.grouping import GROUP_CAPACITY, propose_groups
+from guides.triage import accept_group
+
+
+class Command(BaseCommand):
+    help = "Find pending tour requests that could run as one group tour, and optionally merge them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--capacity', type=int, default=GROUP_CAPACITY,
+                            help=f"Most travelers on one group tour (default {GROUP_CAPACITY})")
+        parser.add_argument('--guide', help="Only this guide's requests (username)")
+        parser.add_argument('--apply', action='store_true', help="Accept each available group as one tour")
+
+    def handle(self, *args, **options):
+        guide = None
+        if options['guide']:
+            guide = get_user_model().objects.get(username=options['guide'])
+        proposals = propose_groups(guide, capacity=options['capacity'])
+        guides = get_user_model().objects.in_bulk({p['guide_id'] for p in proposals})
+
+        merged = 0
+        for proposal in proposals:
+            summary = (f"Guide {proposal['guide_id']}: {len(proposal['request_ids'])} requests for "
+                       f"{proposal['destination']} on {proposal['date']} ({proposal['travelers']} travelers)")
+            if not proposal['available']:
+                self.stdout.write(self.style.WARNING(f"{summary} - guide is busy that day"))
+                continue
+            if not options['apply']:
+                self.stdout.write(summary)
+                continue
+            try:
+                tour, _ = accept_group(guides[proposal['guide_id']], proposal['request_ids'], options['capacity'])
+            except GuideUnavailable:
+                tour = None
+            if tour is None:
+                self.stdout.write(self.style.WARNING(f"{summary} - skipped, the requests changed"))
+            else:
+                merged += 1
+                self.stdout.write(f"{summary} - merged into tour {tour.pk}")
+
+        if options['apply']:
+            self.stdout.write(self.style.SUCCESS(f"Merged {merged} of {len(proposals)} groups."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Found {len(proposals)} groups; run with --apply to merge them."))
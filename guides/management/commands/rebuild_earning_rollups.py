@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from guides.ledger import rebuild_earning_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily and monthly earnings rollups from the earnings ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        days, months = rebuild_earning_rollups(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {days} guide-days and {months} guide-months."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from guides.availability import rebuild_guide_days
+
+
+class Command(BaseCommand):
+    help = "Rebuild guides' tour-booked days from their tours, keeping blackout dates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        conflicts = rebuild_guide_days(batch_size=options['batch_size'])
+        for guide_id, day, tour_id in conflicts:
+            self.stdout.write(self.style.WARNING(f"Guide {guide_id} is double-booked on {day} (tour {tour_id})."))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt guide days with {len(conflicts)} conflicts."))
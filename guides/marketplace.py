@@ -0,0 +1,81 @@
+"""
+The open-request board: tour requests posted without a guide.
+
+Unclaimed pending requests are covered by partial indexes on TourRequest,
+so the board reads only open rows. A guide claims a request with a
+compare-and-set UPDATE on `guide IS NULL`, so under concurrent claims
+exactly one guide wins. The claim and the acceptance share a transaction,
+so if the guide turns out to be busy the request goes back on the board.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from main.keyset import paginate
+from main.notifications import notify
+
+from .availability import available_guides
+from .models import GuideDay, GuideProfile, TourRequest
+from .triage import accept_tour_request
+
+BOARD_ORDERING = ['date', 'id']
+BOARD_PAGE_SIZE = 20
+# Most guides told about one new open request, best rated first
+FANOUT_LIMIT = 200
+
+
+def open_requests():
+    return TourRequest.objects.filter(guide__isnull=True, status="pending")
+
+
+def matching_requests(guide, language=None, destination=None, date=None):
+    """
+    Open requests from today on that `guide` could take: in `language`, or
+    else in any language the guide speaks or none given, on a day the guide
+    is free.
+    """
+    requests = open_requests().filter(date__gte=timezone.localdate())
+    if date:
+        requests = requests.filter(date=date)
+    if language:
+        requests = requests.filter(language=language)
+    else:
+        spoken = GuideProfile.spoken_languages.through.objects.filter(
+            guideprofile__user=guide).values('language_id')
+        requests = requests.filter(Q(language__isnull=True) | Q(language__in=spoken))
+    if destination:
+        requests = requests.filter(destination__icontains=destination)
+    return requests.exclude(Exists(GuideDay.objects.filter(guide=guide, date=OuterRef('date'))))
+
+
+def board_page(requests, cursor=None, per_page=BOARD_PAGE_SIZE):
+    """One keyset page of open requests, soonest first; raises main.keyset.InvalidCursor"""
+    requests = requests.select_related('tourist', 'language')
+    return paginate(requests, BOARD_ORDERING, cursor, per_page)
+
+
+def claim_request(guide, request_id):
+    """
+    Take an open request and accept it. Returns the new Tour, or None if
+    another guide got there first; raises GuideUnavailable (leaving the
+    request open) if the guide is busy that day.
+    """
+    with transaction.atomic():
+        if not open_requests().filter(pk=request_id).update(guide=guide):
+            return None
+        return accept_tour_request(guide, request_id)
+
+
+def relevant_guides(tour_request, limit=FANOUT_LIMIT):
+    """User ids of listed guides who speak the request's language and are free that day, in one query"""
+    guides = GuideProfile.objects.filter(is_completed=True)
+    if tour_request.language_id:
+        guides = guides.filter(spoken_languages=tour_request.language_id)
+    guides = available_guides(guides, tour_request.date).exclude(user_id=tour_request.tourist_id)
+    return list(guides.order_by('-average_rating', '-review_count', '-id').values_list('user_id', flat=True)[:limit])
+
+
+def announce_open_request(tour_request):
+    """Tell the relevant guides about a new open request with one batched notification"""
+    notify(relevant_guides(tour_request),
+           f"New open tour request for {tour_request.destination} on {tour_request.date}")
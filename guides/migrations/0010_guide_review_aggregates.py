@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:45
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_review_aggregates(apps, schema_editor):
+    GuideProfile = apps.get_model('guides', 'GuideProfile')
+    totals = GuideProfile.objects.annotate(
+        count=Count('user__reviews_received'), total=Sum('user__reviews_received__rating')
+    )
+    for guide in totals:
+        guide.review_count = guide.count
+        guide.rating_sum = guide.total or 0
+        # Also repairs averages left behind when a guide's last review was deleted
+        guide.average_rating = round(guide.total / guide.count, 2) if guide.count else 0
+        guide.save(update_fields=['review_count', 'rating_sum', 'average_rating'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guides', '0009_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guideprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='guideprofile',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_review_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_spoken_languages(apps, schema_editor):
+    GuideProfile = apps.get_model('guides', 'GuideProfile')
+    Language = apps.get_model('guides', 'Language')
+    languages = {}
+    for guide in GuideProfile.objects.exclude(languages=''):
+        names = {' '.join(part.split()).title()[:50] for part in guide.languages.split(',')} - {''}
+        for name in names:
+            if name not in languages:
+                languages[name], _ = Language.objects.get_or_create(name=name)
+        guide.spoken_languages.set([languages[name] for name in names])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guides', '0010_guide_review_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Language',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='guideprofile',
+            name='spoken_languages',
+            field=models.ManyToManyField(blank=True, related_name='guides', to='guides.language'),
+        ),
+        migrations.AddIndex(
+            model_name='guideprofile',
+            index=models.Index(fields=['-average_rating', '-review_count', '-id'], name='guide_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guideprofile',
+            index=models.Index(fields=['-experience_years', '-id'], name='guide_experience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guideprofile',
+            index=models.Index(fields=['-review_count', '-id'], name='guide_reviews_idx'),
+        ),
+        migrations.RunPython(backfill_spoken_languages, migrations.RunPython.noop),
+    ]
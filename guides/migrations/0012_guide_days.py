@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:48
+
+import django.db.models.deletion
+from django.conf import settings
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_guide_days(apps, schema_editor):
+    Tour = apps.get_model('guides', 'Tour')
+    GuideDay = apps.get_model('guides', 'GuideDay')
+    taken = set()
+    rows = []
+    # Existing tours may already overlap; the earliest tour keeps a contested day
+    for tour_id, guide_id, start_date, end_date in Tour.objects.values_list(
+        'pk', 'guide_id', 'start_date', 'end_date'
+    ).order_by('start_date', 'pk'):
+        for i in range((end_date - start_date).days + 1):
+            day = start_date + timedelta(days=i)
+            if (guide_id, day) not in taken:
+                taken.add((guide_id, day))
+                rows.append(GuideDay(guide_id=guide_id, date=day, reason='tour', tour_id=tour_id))
+    GuideDay.objects.bulk_create(rows, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guides', '0011_guide_languages'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GuideDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('reason', models.CharField(choices=[('tour', 'Tour'), ('blackout', 'Blackout')], default='tour', max_length=10)),
+                ('guide', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='busy_days', to=settings.AUTH_USER_MODEL)),
+                ('tour', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='days', to='guides.tour')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'guide'], name='guide_day_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('guide', 'date'), name='unique_guide_day')],
+            },
+        ),
+        migrations.RunPython(backfill_guide_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:52
+
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_earning_rollups(apps, schema_editor):
+    Earning = apps.get_model('guides', 'Earning')
+    EarningDaily = apps.get_model('guides', 'EarningDaily')
+    EarningMonthly = apps.get_model('guides', 'EarningMonthly')
+    days = defaultdict(lambda: [Decimal(0), 0])
+    months = defaultdict(lambda: [Decimal(0), 0])
+    for guide_id, when, amount in Earning.objects.values_list('guide_id', 'date', 'amount'):
+        day = timezone.localdate(when)
+        for totals in (days[guide_id, day], months[guide_id, day.replace(day=1)]):
+            totals[0] += amount
+            totals[1] += 1
+    EarningDaily.objects.bulk_create(
+        [EarningDaily(guide_id=guide_id, date=day, amount=amount, count=count)
+         for (guide_id, day), (amount, count) in days.items()],
+        batch_size=2000,
+    )
+    EarningMonthly.objects.bulk_create(
+        [EarningMonthly(guide_id=guide_id, month=month, amount=amount, count=count)
+         for (guide_id, month), (amount, count) in months.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guides', '0012_guide_days'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EarningDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EarningMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='earning',
+            index=models.Index(fields=['guide', '-date', '-id'], name='earning_ledger_idx'),
+        ),
+        migrations.AddField(
+            model_name='earningdaily',
+            name='guide',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='earning_days', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='earningmonthly',
+            name='guide',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='earning_months', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='earningdaily',
+            constraint=models.UniqueConstraint(fields=('guide', 'date'), name='unique_guide_earning_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='earningmonthly',
+            constraint=models.UniqueConstraint(fields=('guide', 'month'), name='unique_guide_earning_month'),
+        ),
+        migrations.RunPython(backfill_earning_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guides', '0013_earning_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tourrequest',
+            name='language',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tour_requests', to='guides.language'),
+        ),
+        migrations.AddIndex(
+            model_name='tourrequest',
+            index=models.Index(condition=models.Q(('guide__isnull', True), ('status', 'pending')), fields=['date', 'id'], name='open_request_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tourrequest',
+            index=models.Index(condition=models.Q(('guide__isnull', True), ('status', 'pending')), fields=['language', 'date', 'id'], name='open_request_language_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guides', '0014_open_tour_requests'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['guide', '-start_date', '-id'], name='tour_guide_start_idx'),
+        ),
+    ]
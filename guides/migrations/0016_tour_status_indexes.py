@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guides', '0015_tour_guide_start_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['status', 'start_date', 'id'], name='tour_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['status', 'end_date', 'id'], name='tour_status_end_idx'),
+        ),
+    ]
@@ -1,5 +1,27 @@
 from django.db import models
 from django.conf import settings
+
+
+def parse_languages(text):
+    """Normalized language names from a comma-separated list, duplicates dropped"""
+    names = {}
+    for part in (text or '').split(','):
+        name = ' '.join(part.split())
+        if name:
+            names.setdefault(name.casefold(), name.title()[:50])
+    return list(names.values())
+
+
+class Language(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
 class GuideProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     phone = models.CharField(max_length=30, blank=True)
@@ -8,22 +30,30 @@ class GuideProfile(models.Model):
     avatar = models.ImageField(upload_to='guides/avatars/', blank=True)
     is_verified = models.BooleanField(default=False)
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.0)
+    # Maintained from Review by guides.signals
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
 
     # Future-proof fields
     languages = models.CharField(max_length=200, blank=True)
+    # Normalized from `languages` by guides.signals, for filtering
+    spoken_languages = models.ManyToManyField(Language, blank=True, related_name='guides')
     address = models.TextField(blank=True)
 
     # Optional profile completion flag
     is_completed = models.BooleanField(default=False)
 
+    class Meta:
+        # One index per listing sort in guides.listing.SORTS, ending in id for keyset paging
+        indexes = [
+            models.Index(fields=['-average_rating', '-review_count', '-id'], name='guide_rating_idx'),
+            models.Index(fields=['-experience_years', '-id'], name='guide_experience_idx'),
+            models.Index(fields=['-review_count', '-id'], name='guide_reviews_idx'),
+        ]
+
     def __str__(self):
         return f"Guide: {self.user.get_full_name() or self.user.username}"
 
-    @property
-    def review_count(self):
-        """Return the number of reviews for this guide"""
-        return self.user.reviews_received.count()
-
 
 
 class TourRequest(models.Model):
@@ -66,6 +96,9 @@ class TourRequest(models.Model):
         verbose_name="Proposed Price"
     )
     notes = models.TextField(blank=True)
+    # Preferred language for open requests (no guide yet), used to match guides
+    language = models.ForeignKey(Language, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='tour_requests')
 
     # Status and timestamps
     status = models.CharField(
@@ -86,6 +119,13 @@ class TourRequest(models.Model):
     class Meta:
         verbose_name = "Tour Request"
         verbose_name_plural = "Tour Requests"
+        indexes = [
+            # The open-request board: unclaimed pending requests by date, optionally by language
+            models.Index(fields=['date', 'id'], name='open_request_date_idx',
+                         condition=models.Q(guide__isnull=True, status='pending')),
+            models.Index(fields=['language', 'date', 'id'], name='open_request_language_idx',
+                         condition=models.Q(guide__isnull=True, status='pending')),
+        ]
 
 
 class Tour(models.Model):
@@ -102,6 +142,15 @@ class Tour(models.Model):
     )
     notes = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # The guide's my-tours pages, latest first
+            models.Index(fields=['guide', '-start_date', '-id'], name='tour_guide_start_idx'),
+            # Tours due to start or finish, for guides.lifecycle
+            models.Index(fields=['status', 'start_date', 'id'], name='tour_status_start_idx'),
+            models.Index(fields=['status', 'end_date', 'id'], name='tour_status_end_idx'),
+        ]
+
     def __str__(self):
         return f"Tour at {self.destination} ({self.status})"
 
@@ -113,16 +162,84 @@ class Tour(models.Model):
         return 0
 
 
+class GuideDay(models.Model):
+    """
+    One day a guide cannot take a tour: booked by a Tour or blacked out.
+
+    The unique (guide, date) index is the availability ledger: a conflict
+    check is one index probe per day, and two tours for the same guide and
+    day cannot both be written.
+    """
+    TOUR = 'tour'
+    BLACKOUT = 'blackout'
+    REASON_CHOICES = [(TOUR, 'Tour'), (BLACKOUT, 'Blackout')]
+
+    guide = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='busy_days')
+    date = models.DateField()
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES, default=TOUR)
+    tour = models.ForeignKey(Tour, on_delete=models.CASCADE, null=True, blank=True, related_name='days')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['guide', 'date'], name='unique_guide_day'),
+        ]
+        indexes = [
+            # "Who is busy on this date" for the available-guides search
+            models.Index(fields=['date', 'guide'], name='guide_day_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.guide} busy on {self.date} ({self.reason})"
+
+
 class Earning(models.Model):
     guide = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="earnings")
     amount = models.DecimalField(max_digits=8, decimal_places=2)
     description = models.CharField(max_length=255, blank=True)
     date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # The guide's ledger, newest first, for keyset pages
+            models.Index(fields=['guide', '-date', '-id'], name='earning_ledger_idx'),
+        ]
+
     def __str__(self):
         return f"{self.guide} earned {self.amount}"
 
 
+class EarningDaily(models.Model):
+    """A guide's earnings on one (local) day, derived from Earning rows"""
+    guide = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='earning_days')
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['guide', 'date'], name='unique_guide_earning_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.guide} earned {self.amount} on {self.date}"
+
+
+class EarningMonthly(models.Model):
+    """A guide's earnings in one month (stored as its first day), derived from Earning rows"""
+    guide = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='earning_months')
+    month = models.DateField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['guide', 'month'], name='unique_guide_earning_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.guide} earned {self.amount} in {self.month:%B %Y}"
+
+
 # CORRECTED: Review model should be at the same level, not nested inside Earning
 class Review(models.Model):
     guide = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="reviews_received")
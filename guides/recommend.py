@@ -0,0 +1,188 @@
+"""
+Guide recommendations for a tour request.
+
+Every listed guide has a precomputed feature row: smoothed rating, review
+volume, experience, verification, spoken language ids and the places the
+guide covers (each comma-separated part of the address, and past tour
+destinations), normalized like grouping.destination_key so a request
+matches whole place names only. Rows are kept in
+columns, and a request is scored over the whole batch in one pass: the
+per-request parts (language, destination, party size) are added to a
+precomputed base score, and guides busy on the requested date are
+dropped using a single GuideDay lookup.
+
+The index lives in each process. Signals mark changed guides dirty and the
+next request reloads just those rows; a full rebuild every REFRESH_SECONDS
+picks up changes made by other processes.
+"""
+import heapq
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.db import transaction
+
+from .grouping import destination_key
+from .models import GuideDay, GuideProfile, Language, Tour
+
+WEIGHTS = {
+    'rating': 0.35,
+    'volume': 0.10,
+    'experience': 0.15,
+    'verified': 0.10,
+    'language': 0.20,
+    'destination': 0.10,
+}
+# Bayesian prior: a guide's rating counts as PRIOR_REVIEWS reviews of PRIOR_RATING stars plus their own
+PRIOR_REVIEWS = 5
+PRIOR_RATING = 3.5
+EXPERIENCE_CAP = 20
+# Groups of this size or more lean fully on experience
+LARGE_PARTY = 10
+REFRESH_SECONDS = 10 * 60
+
+
+class GuideIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._features = {}
+        self._dirty = set()
+        self._built_at = None
+        self._columns = None
+        self._language_names = {}
+
+    def mark_dirty(self, guide_id):
+        """Reload this guide (a user id) before the next recommendation"""
+        with self._lock:
+            self._dirty.add(guide_id)
+
+    def _load(self, guide_ids=None):
+        profiles = GuideProfile.objects.filter(is_completed=True)
+        tours = Tour.objects.all()
+        if guide_ids is not None:
+            profiles = profiles.filter(user_id__in=guide_ids)
+            tours = tours.filter(guide_id__in=guide_ids)
+
+        languages = defaultdict(set)
+        for user_id, language_id in profiles.values_list('user_id', 'spoken_languages'):
+            if language_id is not None:
+                languages[user_id].add(language_id)
+        places = defaultdict(set)
+        for guide_id, destination in tours.values_list('guide_id', 'destination').distinct():
+            places[guide_id].add(destination_key(destination))
+
+        features = {}
+        for row in profiles.values(
+            'pk', 'user_id', 'user__first_name', 'user__last_name', 'user__username', 'average_rating',
+            'review_count', 'rating_sum', 'experience_years', 'is_verified', 'address',
+        ):
+            user_id = row['user_id']
+            name = f"{row['user__first_name']} {row['user__last_name']}".strip() or row['user__username']
+            address = {destination_key(part) for part in (row['address'] or '').split(',')}
+            features[user_id] = {
+                'profile_id': row['pk'],
+                'guide_id': user_id,
+                'name': name,
+                'average_rating': float(row['average_rating']),
+                'review_count': row['review_count'],
+                'smoothed_rating': (PRIOR_REVIEWS * PRIOR_RATING + row['rating_sum'])
+                / (PRIOR_REVIEWS + row['review_count']) / 5,
+                'experience_years': row['experience_years'],
+                'experience': min(row['experience_years'], EXPERIENCE_CAP) / EXPERIENCE_CAP,
+                'is_verified': row['is_verified'],
+                'languages': frozenset(languages[user_id]),
+                'places': frozenset((address | places[user_id]) - {''}),
+            }
+        return features
+
+    def _build_columns(self):
+        rows = list(self._features.values())
+        most_reviews = max((row['review_count'] for row in rows), default=0)
+        volume_scale = math.log1p(most_reviews) or 1
+        base = [
+            WEIGHTS['rating'] * row['smoothed_rating']
+            + WEIGHTS['volume'] * math.log1p(row['review_count']) / volume_scale
+            + WEIGHTS['verified'] * row['is_verified']
+            for row in rows
+        ]
+        return {
+            'rows': rows,
+            'guide_id': [row['guide_id'] for row in rows],
+            'base': base,
+            'experience': [row['experience'] for row in rows],
+            'languages': [row['languages'] for row in rows],
+            'places': [row['places'] for row in rows],
+        }
+
+    def _refresh(self):
+        with self._lock:
+            stale = self._built_at is None or time.monotonic() - self._built_at > REFRESH_SECONDS
+            dirty, self._dirty = self._dirty, set()
+            if not stale and not dirty and self._columns is not None:
+                return self._columns
+            if stale:
+                self._features = self._load()
+                self._built_at = time.monotonic()
+            else:
+                fresh = self._load(dirty)
+                for guide_id in dirty:
+                    self._features.pop(guide_id, None)
+                self._features.update(fresh)
+            self._language_names = dict(Language.objects.values_list('pk', 'name'))
+            self._columns = self._build_columns()
+            return self._columns
+
+    def recommend(self, destination='', date=None, party_size=1, language=None, limit=10):
+        """
+        The `limit` best guides for a request, best first, as dicts with a
+        `score`. `language` is a Language id; guides busy on `date` are left
+        out.
+        """
+        columns = self._refresh()
+        destination = destination_key(destination or '')
+        party_weight = min(max(party_size, 1), LARGE_PARTY) / LARGE_PARTY
+        experience_weight = WEIGHTS['experience'] * (0.5 + 0.5 * party_weight)
+        busy = set(GuideDay.objects.filter(date=date).values_list('guide_id', flat=True)) if date else set()
+
+        scores = []
+        for base, guide_id, experience, languages, places in zip(
+            columns['base'], columns['guide_id'], columns['experience'], columns['languages'], columns['places']
+        ):
+            if guide_id in busy:
+                scores.append(-1.0)
+                continue
+            scores.append(
+                base + experience_weight * experience
+                + (WEIGHTS['language'] if language in languages else 0.0)
+                + (WEIGHTS['destination'] if destination and destination in places else 0.0)
+            )
+
+        best = heapq.nlargest(limit, (i for i, score in enumerate(scores) if score >= 0), key=scores.__getitem__)
+        results = []
+        for i in best:
+            row = columns['rows'][i]
+            results.append({
+                'id': row['profile_id'],
+                'name': row['name'],
+                'score': round(scores[i], 4),
+                'average_rating': row['average_rating'],
+                'review_count': row['review_count'],
+                'experience_years': row['experience_years'],
+                'is_verified': row['is_verified'],
+                'languages': sorted(self._language_names.get(pk, '') for pk in row['languages']),
+                'language_match': language in row['languages'],
+                'destination_match': bool(destination) and destination in row['places'],
+            })
+        return results
+
+
+index = GuideIndex()
+
+
+def mark_guide_changed(guide_id):
+    transaction.on_commit(lambda: index.mark_dirty(guide_id))
+
+
+def recommend_guides(destination='', date=None, party_size=1, language=None, limit=10):
+    return index.recommend(destination, date, party_size, language, limit)
@@ -0,0 +1,107 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from main.ratings import track_review_ratings
+
+from .availability import hold_days, release_days
+from .ledger import apply_earning_delta
+from .listing import invalidate_listing_stats
+from .models import Earning, GuideProfile, Language, Review, Tour, parse_languages
+from .recommend import mark_guide_changed
+
+
+def sync_languages(profile):
+    """Point a profile's spoken_languages at the names in its languages text"""
+    names = parse_languages(profile.languages)
+    Language.objects.bulk_create([Language(name=name) for name in names], ignore_conflicts=True)
+    profile.spoken_languages.set(Language.objects.filter(name__in=names))
+
+
+@receiver(post_save, sender=GuideProfile)
+def normalize_guide_languages(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is None or 'languages' in update_fields:
+        sync_languages(instance)
+    invalidate_listing_stats()
+
+
+@receiver(post_delete, sender=GuideProfile)
+def drop_guide_listing_stats(sender, instance, **kwargs):
+    invalidate_listing_stats()
+
+
+# Review.guide is the guide's user, so aggregates go to the profile with that user_id
+track_review_ratings(Review, GuideProfile, 'guide_id', target_field='user_id')
+
+
+def held_days(tour):
+    return tour.guide_id, tour.start_date, tour.end_date
+
+
+@receiver(pre_save, sender=Tour)
+def remember_tour_days(sender, instance, raw=False, **kwargs):
+    instance._previous_days = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_days = Tour.objects.filter(pk=instance.pk).values_list(
+        'guide_id', 'start_date', 'end_date'
+    ).first()
+
+
+@receiver(post_save, sender=Tour)
+def sync_guide_days(sender, instance, created, raw=False, **kwargs):
+    """Keep the guide's availability ledger in step with the tour's dates; may raise GuideUnavailable"""
+    if raw:
+        return
+    current = held_days(instance)
+    previous = getattr(instance, '_previous_days', None)
+    if not created and previous == current:
+        return
+    if previous:
+        release_days(instance.pk)
+    hold_days(instance.pk, *current)
+
+
+@receiver(pre_save, sender=Earning)
+def remember_earning(sender, instance, raw=False, **kwargs):
+    instance._previous_earning = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_earning = Earning.objects.filter(pk=instance.pk).values_list(
+        'guide_id', 'date', 'amount'
+    ).first()
+
+
+@receiver(post_save, sender=Earning)
+def add_earning_to_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.guide_id, instance.date, instance.amount)
+    previous = getattr(instance, '_previous_earning', None)
+    if not created and previous == current:
+        return
+    if previous:
+        apply_earning_delta(previous[0], previous[1], -previous[2], -1)
+    apply_earning_delta(*current, 1)
+
+
+@receiver(post_delete, sender=Earning)
+def remove_earning_from_rollups(sender, instance, **kwargs):
+    apply_earning_delta(instance.guide_id, instance.date, -instance.amount, -1)
+
+
+@receiver(post_save, sender=GuideProfile)
+@receiver(post_delete, sender=GuideProfile)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Tour)
+@receiver(post_delete, sender=Tour)
+def refresh_guide_recommendations(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    guide_id = instance.user_id if sender is GuideProfile else instance.guide_id
+    mark_guide_changed(guide_id)
+    previous = getattr(instance, '_previous_rating', None) or getattr(instance, '_previous_days', None)
+    if previous and previous[0] != guide_id:
+        mark_guide_changed(previous[0])
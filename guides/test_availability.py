@@ -0,0 +1,76 @@
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import User
+from guides.models import GuideDay, GuideProfile, Tour
+
+# Early on 11 May in Dhaka, still 10 May in UTC
+DHAKA_MORNING = datetime(2030, 5, 11, 1, tzinfo=ZoneInfo('Asia/Dhaka'))
+
+
+@pytest.fixture
+def guide_client(db):
+    guide = User.objects.create_user(username='guide', password='x', role='guide')
+    GuideProfile.objects.create(user=guide, is_completed=True)
+    client = Client()
+    client.force_login(guide)
+    return guide, client
+
+
+def post_day(client, day, action='block'):
+    response = client.post(reverse('guide_availability'), {'date': day.isoformat(), 'action': action}, follow=True)
+    return [str(message) for message in response.context['messages']]
+
+
+def test_today_is_the_local_date(guide_client):
+    guide, client = guide_client
+    with patch('django.utils.timezone.now', return_value=DHAKA_MORNING):
+        # Logged in at the patched time, so the session hasn't expired by then
+        client.force_login(guide)
+        assert post_day(client, date(2030, 5, 10)) == ["Please choose a date from today on."]
+        assert post_day(client, date(2030, 5, 11)) == ["2030-05-11 is blocked off."]
+
+
+def test_unblocking_a_tour_day_says_why_nothing_changed(guide_client):
+    guide, client = guide_client
+    day = date(2030, 5, 20)
+    Tour.objects.create(guide=guide, destination='Sajek', start_date=day, end_date=day, price=100)
+
+    assert post_day(client, day, 'unblock') == [
+        "2030-05-20 isn't blocked off; a day with a tour opens when the tour is cancelled."]
+    assert GuideDay.objects.filter(guide=guide, date=day, reason=GuideDay.TOUR).exists()
+    assert post_day(client, day + timedelta(days=1)) == ["2030-05-21 is blocked off."]
+    assert post_day(client, day + timedelta(days=1), 'unblock') == ["2030-05-21 is open for tours again."]
+
+
+def test_admin_rejects_moving_a_tour_onto_a_busy_day(guide_client):
+    guide, _ = guide_client
+    tourist = User.objects.create_user(username='tourist', password='x', role='tourist')
+    admin = User.objects.create_superuser(username='admin', password='x', email='admin@example.com')
+    client = Client()
+    client.force_login(admin)
+    first, blocked = date(2030, 5, 20), date(2030, 5, 25)
+    tour = Tour.objects.create(guide=guide, destination='Sajek', start_date=first, end_date=first, price=100)
+    GuideDay.objects.create(guide=guide, date=blocked, reason=GuideDay.BLACKOUT)
+
+    def move(start_date, end_date):
+        return client.post(reverse('admin:guides_tour_change', args=[tour.pk]), {
+            'guide': guide.pk, 'tourists': [tourist.pk], 'destination': 'Sajek', 'start_date': start_date,
+            'end_date': end_date, 'price': '100', 'status': 'pending', 'notes': '',
+        })
+
+    response = move(first, blocked)
+    assert response.status_code == 200
+    assert response.context['adminform'].form.non_field_errors() == [
+        "guide already has a tour or a blackout on 2030-05-25."]
+    assert list(GuideDay.objects.filter(tour=tour).values_list('date', flat=True)) == [first]
+
+    # Keeping some of its own days is no clash
+    assert move(first, first + timedelta(days=1)).status_code == 302
+    assert list(GuideDay.objects.filter(tour=tour).order_by('date').values_list('date', flat=True)) == [
+        first, first + timedelta(days=1)]
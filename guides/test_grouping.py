@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import User
+from guides.grouping import propose_groups
+from guides.models import GuideDay, TourRequest
+
+DAY = date(2030, 5, 10)
+
+
+@pytest.fixture
+def guides(db):
+    return [User.objects.create_user(username=f'guide{i}', password='x', role='guide') for i in range(2)]
+
+
+def request_for(guide, destination, travelers=1, day=DAY, duration=4, price=100):
+    tourist = User.objects.create_user(username=f'tourist{TourRequest.objects.count()}', password='x', role='tourist')
+    return TourRequest.objects.create(tourist=tourist, guide=guide, destination=destination, date=day,
+                                      number_of_travelers=travelers, duration_hours=duration, price=price)
+
+
+def summary(proposals):
+    return [(p['destination'], p['date'], p['travelers'], p['price'], p['request_ids'], p['available'])
+            for p in proposals]
+
+
+def test_requests_group_by_day_and_normalized_destination(guides):
+    guide, other = guides
+    nine, eight, six, two = (request_for(guide, name, travelers) for name, travelers in
+                             [('Sylhet', 9), (' sylhet ', 8), ('SYLHET', 6), ('Sylhet  ', 2)])
+    coxs = [request_for(guide, name) for name in ["Cox's Bazar", "cox's   bazar", "Cox's Bazar "]]
+    later = [request_for(guide, 'Rangamati', day=DAY + timedelta(days=2)) for _ in range(2)]
+    GuideDay.objects.create(guide=guide, date=DAY + timedelta(days=2), reason=GuideDay.BLACKOUT)
+    # Nothing to merge with: another day, another duration, another guide, not pending
+    request_for(guide, 'Sylhet', day=DAY + timedelta(days=1))
+    request_for(guide, 'Sylhet', duration=8)
+    request_for(other, 'Sylhet')
+    TourRequest.objects.filter(pk=request_for(guide, "Cox's Bazar").pk).update(status='rejected')
+
+    # Biggest groups first, then by date; each Sylhet group packs the largest parties that still fit
+    assert summary(propose_groups(guide)) == [
+        ("Cox's Bazar", DAY, 3, Decimal(300), [r.pk for r in coxs], True),
+        ('Sylhet', DAY, 15, Decimal(200), [nine.pk, six.pk], True),
+        ('sylhet', DAY, 10, Decimal(200), [eight.pk, two.pk], True),
+        ('Rangamati', DAY + timedelta(days=2), 2, Decimal(200), [r.pk for r in later], False),
+    ]
+    assert propose_groups(other) == []
+
+
+def test_groups_api_lists_only_the_guides_own_requests(guides):
+    guide, other = guides
+    mine = [request_for(guide, 'Sylhet', price=50) for _ in range(2)]
+    request_for(other, 'Sylhet')
+    request_for(other, 'Sylhet')
+    client = Client()
+    client.force_login(guide)
+
+    data = client.get(reverse('tour_request_groups_api')).json()
+
+    assert data['groups'] == [{
+        'guide_id': guide.pk, 'destination': 'Sylhet', 'date': DAY.isoformat(), 'duration_hours': 4,
+        'travelers': 2, 'price': '100.00', 'request_ids': [r.pk for r in mine], 'available': True,
+    }]
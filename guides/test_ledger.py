@@ -0,0 +1,73 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from accounts.models import User
+from guides.ledger import add_earnings, rebuild_earning_rollups
+from guides.models import Earning, EarningDaily, EarningMonthly
+
+
+def local(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+# Late on 31 January and just after midnight on 1 February, local time; both still 31 January in UTC
+LAST_OF_JANUARY = local(2030, 1, 31, 23, 30)
+FIRST_OF_FEBRUARY = local(2030, 2, 1, 0, 30)
+
+
+@pytest.fixture
+def guides(db):
+    return [User.objects.create_user(username=f'guide{i}', password='x', role='guide') for i in range(2)]
+
+
+def earn(guide, amount, when):
+    earning = Earning.objects.create(guide=guide, amount=amount)
+    earning.date = when
+    earning.save()
+    return earning
+
+
+def rollups():
+    # Rows whose earnings were all deleted stay behind at zero; a rebuild doesn't make them
+    days = EarningDaily.objects.filter(count__gt=0).order_by('guide', 'date').values_list(
+        'guide', 'date', 'amount', 'count')
+    months = EarningMonthly.objects.filter(count__gt=0).order_by('guide', 'month').values_list(
+        'guide', 'month', 'amount', 'count')
+    return list(days), list(months)
+
+
+def test_rollups_match_a_rebuild_from_earnings(guides):
+    first, second = guides
+    late = earn(first, 100, LAST_OF_JANUARY)
+    early = earn(first, 40, FIRST_OF_FEBRUARY)
+    earn(second, 25, FIRST_OF_FEBRUARY)
+    earn(first, 10, LAST_OF_JANUARY)
+    # Batched earnings are stamped with the time they are added
+    add_earnings([Earning(guide=first, amount=5), Earning(guide=second, amount=15)])
+
+    # Moving an earning across the month boundary, changing one and deleting another
+    late.date = FIRST_OF_FEBRUARY
+    late.save()
+    early.amount = 60
+    early.save()
+    earn(second, 70, LAST_OF_JANUARY).delete()
+
+    today = timezone.localdate()
+    incremental = rollups()
+    rebuild_earning_rollups()
+    assert rollups() == incremental
+    assert incremental == (
+        [(first.pk, today, Decimal('5.00'), 1),
+         (first.pk, date(2030, 1, 31), Decimal('10.00'), 1),
+         (first.pk, date(2030, 2, 1), Decimal('160.00'), 2),
+         (second.pk, today, Decimal('15.00'), 1),
+         (second.pk, date(2030, 2, 1), Decimal('25.00'), 1)],
+        [(first.pk, today.replace(day=1), Decimal('5.00'), 1),
+         (first.pk, date(2030, 1, 1), Decimal('10.00'), 1),
+         (first.pk, date(2030, 2, 1), Decimal('160.00'), 2),
+         (second.pk, today.replace(day=1), Decimal('15.00'), 1),
+         (second.pk, date(2030, 2, 1), Decimal('25.00'), 1)],
+    )
@@ -0,0 +1,70 @@
+from functools import partial
+from urllib.parse import parse_qsl
+
+import pytest
+from django.urls import reverse
+
+from accounts.models import User
+from guides.listing import guide_page
+from guides.models import GuideProfile, Language
+
+# (username, languages as typed, experience, rating, reviews, verified)
+GUIDES = [
+    ('rahim', 'bangla, English', 5, 4.5, 10, True),
+    ('karim', ' english ,Hindi', 2, 4.5, 10, False),
+    ('salma', 'Bangla', 8, 4.9, 3, True),
+    ('nadia', 'BANGLA,  bangla , english', 1, 3.0, 0, False),
+]
+
+
+@pytest.fixture
+def guides(db, monkeypatch):
+    # Two to a page, so four guides take a few pages
+    monkeypatch.setattr('guides.views.guide_page', partial(guide_page, per_page=2))
+    for username, languages, experience, rating, reviews, verified in GUIDES:
+        user = User.objects.create_user(username=username, password='x', role='guide')
+        GuideProfile.objects.create(user=user, languages=languages, experience_years=experience,
+                                    average_rating=rating, review_count=reviews, is_verified=verified,
+                                    is_completed=True)
+    GuideProfile.objects.create(user=User.objects.create_user(username='draft', password='x', role='guide'),
+                                languages='Bangla')
+
+
+def listing(client, **params):
+    context = client.get(reverse('guide_list'), params).context
+    return [guide.user.username for guide in context['guides']], context
+
+
+def walk(client, **params):
+    """Every listed username, following the next page links"""
+    names, context = listing(client, **params)
+    while context['next_page_query']:
+        page, context = listing(client, **dict(parse_qsl(context['next_page_query'])))
+        names += page
+    return names
+
+
+def test_typed_languages_become_one_row_each(guides):
+    assert list(Language.objects.values_list('name', flat=True)) == ['Bangla', 'English', 'Hindi']
+    nadia = GuideProfile.objects.get(user__username='nadia')
+    assert sorted(nadia.spoken_languages.values_list('name', flat=True)) == ['Bangla', 'English']
+
+
+def test_filters_and_sorts_page_through_every_match(client, guides):
+    english = Language.objects.get(name='English')
+
+    # Ties on rating and reviews fall back to the newest profile first
+    assert walk(client) == ['salma', 'karim', 'rahim', 'nadia']
+    assert walk(client, sort='experience') == ['salma', 'rahim', 'karim', 'nadia']
+    assert walk(client, language=english.pk, sort='reviews') == ['karim', 'rahim', 'nadia']
+    assert walk(client, language=english.pk, verified='on') == ['rahim']
+    assert walk(client, min_experience='3', min_rating='4.5') == ['salma', 'rahim']
+
+
+def test_a_tampered_cursor_restarts_the_list_with_its_filters(client, guides):
+    # Valid base64, but not a cursor
+    names, context = listing(client, sort='experience', cursor='bm90LWEtY3Vyc29y')
+    assert names == ['salma', 'rahim']
+    assert context['is_first_page']
+    assert context['first_page_query'] == 'sort=experience'
+    assert context['next_page_query'].startswith('sort=experience&cursor=')
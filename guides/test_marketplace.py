@@ -0,0 +1,104 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from guides.availability import GuideUnavailable
+from guides.marketplace import BOARD_PAGE_SIZE, claim_request
+from guides.models import GuideDay, GuideProfile, Tour, TourRequest
+
+
+def open_request():
+    tourist = User.objects.create_user(username='tourist', password='x', role='tourist')
+    return TourRequest.objects.create(tourist=tourist, destination='Bandarban', price=150,
+                                      date=timezone.localdate() + timedelta(days=7))
+
+
+def guides(count):
+    return [User.objects.create_user(username=f'guide{i}', password='x', role='guide') for i in range(count)]
+
+
+@pytest.mark.django_db
+def test_second_claim_gets_nothing():
+    tour_request = open_request()
+    first, second = guides(2)
+
+    assert claim_request(first, tour_request.pk) is not None
+    assert claim_request(second, tour_request.pk) is None
+
+    tour_request.refresh_from_db()
+    assert (tour_request.guide_id, tour_request.status) == (first.pk, 'accepted')
+    assert list(Tour.objects.values_list('guide_id', flat=True)) == [first.pk]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_claims_have_exactly_one_winner():
+    tour_request = open_request()
+    claimants = guides(6)
+    start = threading.Barrier(len(claimants))
+    tours = []
+
+    def claim(guide):
+        start.wait()
+        try:
+            tours.append(claim_request(guide, tour_request.pk))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=claim, args=[guide]) for guide in claimants]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    winners = [tour for tour in tours if tour is not None]
+    assert len(tours) == len(claimants)
+    assert len(winners) == 1
+    tour_request.refresh_from_db()
+    assert tour_request.guide_id == winners[0].guide_id
+    assert Tour.objects.count() == 1
+    assert GuideDay.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_busy_guide_claim_leaves_request_open():
+    tour_request = open_request()
+    busy, free = guides(2)
+    GuideDay.objects.create(guide=busy, date=tour_request.date, reason=GuideDay.BLACKOUT)
+
+    with pytest.raises(GuideUnavailable):
+        claim_request(busy, tour_request.pk)
+
+    tour_request.refresh_from_db()
+    assert (tour_request.guide_id, tour_request.status) == (None, 'pending')
+    assert claim_request(free, tour_request.pk) is not None
+
+
+@pytest.mark.django_db
+def test_board_pages_keep_filters_and_survive_a_bad_cursor():
+    tourist = User.objects.create_user(username='tourist', password='x', role='tourist')
+    start = timezone.localdate() + timedelta(days=1)
+    for i in range(BOARD_PAGE_SIZE + 3):
+        TourRequest.objects.create(tourist=tourist, destination='Bandarban', price=150, date=start + timedelta(days=i))
+    TourRequest.objects.create(tourist=tourist, destination='Sylhet', price=150, date=start)
+    guide, = guides(1)
+    GuideProfile.objects.create(user=guide, is_completed=True)
+    client = Client()
+    client.force_login(guide)
+    url = reverse('open_requests')
+
+    first = client.get(url, {'destination': 'bandarban'}).context
+    assert len(first['requests']) == BOARD_PAGE_SIZE and first['is_first_page']
+    assert first['first_page_query'] == 'destination=bandarban'
+    rest = client.get(f"{url}?{first['next_page_query']}").context
+    assert [r.date for r in rest['requests']] == [start + timedelta(days=BOARD_PAGE_SIZE + i) for i in range(3)]
+    assert rest['next_page_query'] is None and not rest['is_first_page']
+
+    tampered = client.get(url, {'destination': 'bandarban', 'cursor': 'not-a-cursor'}).context
+    assert [r.pk for r in tampered['requests']] == [r.pk for r in first['requests']]
+    assert tampered['is_first_page']
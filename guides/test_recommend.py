@@ -0,0 +1,40 @@
+from datetime import date
+
+import pytest
+
+from accounts.models import User
+from guides.models import GuideProfile, Language, Tour
+from guides.recommend import GuideIndex
+
+DAY = date(2030, 5, 10)
+
+
+def guide(username, address=''):
+    user = User.objects.create_user(username=username, password='x', role='guide')
+    GuideProfile.objects.create(user=user, address=address, is_completed=True)
+    return user
+
+
+def scores(**request):
+    return {row['name']: (row['score'], row['destination_match'], row['language_match'])
+            for row in GuideIndex().recommend(**request)}
+
+
+@pytest.mark.django_db
+def test_destination_matches_whole_place_names():
+    local = guide('local', 'Zindabazar,  SYLHET ')
+    guide('roadside', 'Sylhet Road, Dhaka')
+    coastal = guide('coastal')
+    Tour.objects.create(guide=coastal, destination="  Cox's   Bazar", start_date=DAY, end_date=DAY, price=100)
+    bangla = Language.objects.create(name='Bangla')
+    local.guideprofile.spoken_languages.add(bangla)
+
+    # No reviews or experience: every guide starts from the prior rating, 0.35 * 3.5 / 5
+    assert scores(destination='sylhet') == {
+        'local': (0.345, True, False), 'roadside': (0.245, False, False), 'coastal': (0.245, False, False),
+    }
+    assert scores(destination="cox's bazar", language=bangla.pk) == {
+        'local': (0.445, False, True), 'roadside': (0.245, False, False), 'coastal': (0.345, True, False),
+    }
+    # The coastal guide's tour takes the day
+    assert set(scores(destination="Cox's Bazar", date=DAY)) == {'local', 'roadside'}
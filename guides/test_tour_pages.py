@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import User
+from guides.models import GuideProfile, Tour
+from main.testing import assert_constant_queries
+from tourists.models import Tourist
+
+# Session, user and context processor lookups plus the page's own queries
+MY_TOURS_QUERIES = 5
+TOUR_DETAIL_QUERIES = 5
+
+
+@pytest.fixture
+def guide_client(db):
+    guide = User.objects.create_user(username='guide', password='Guide123', role='guide')
+    GuideProfile.objects.create(user=guide, is_completed=True)
+    client = Client()
+    client.force_login(guide)
+    return guide, client
+
+
+def add_tourists(tour, count, start=0):
+    for i in range(start, start + count):
+        tourist = User.objects.create_user(username=f'tourist{tour.pk}-{i}', password='x', role='tourist')
+        Tourist.objects.create(user=tourist, phone_number=f'017000000{i:02d}')
+        tour.tourists.add(tourist)
+
+
+def add_tours(guide, count, start=0):
+    for i in range(start, start + count):
+        day = date(2030, 1, 1) + timedelta(days=i)
+        tour = Tour.objects.create(guide=guide, destination=f'Place {i}', start_date=day, end_date=day, price=100)
+        add_tourists(tour, 3)
+
+
+def test_my_tours_query_count_is_constant(guide_client):
+    guide, client = guide_client
+    add_tours(guide, 2)
+    response = assert_constant_queries(
+        lambda: client.get(reverse('my_tours')),
+        grow=lambda: add_tours(guide, 11, start=2),
+        expected=MY_TOURS_QUERIES,
+    )
+    assert response.status_code == 200
+    assert response.context['next_cursor']
+
+
+def test_tour_detail_query_count_is_constant(guide_client):
+    guide, client = guide_client
+    tour = Tour.objects.create(guide=guide, destination='Sundarbans', start_date=date(2030, 1, 1),
+                               end_date=date(2030, 1, 1), price=100)
+    add_tourists(tour, 2)
+    response = assert_constant_queries(
+        lambda: client.get(reverse('tour_detail', args=[tour.pk])),
+        grow=lambda: add_tourists(tour, 20, start=2),
+        expected=TOUR_DETAIL_QUERIES,
+    )
+    assert response.status_code == 200
+    assert response.context['participant_count'] == 22
+    assert len(response.context['tourist_profiles']) == 22
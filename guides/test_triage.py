@@ -0,0 +1,101 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from accounts.models import User
+from guides.availability import GuideUnavailable
+from guides.models import Earning, GuideDay, Tour, TourRequest
+from guides.triage import accept_group, accept_tour_request, accept_tour_requests, reject_tour_request
+
+DAY = date(2030, 5, 10)
+
+
+@pytest.fixture
+def guide(db):
+    return User.objects.create_user(username='guide', password='x', role='guide')
+
+
+@pytest.fixture
+def tourists(db):
+    return [User.objects.create_user(username=f'tourist{i}', password='x', role='tourist') for i in range(3)]
+
+
+def request_for(guide, tourist, day=DAY, price=100, destination='Sylhet'):
+    return TourRequest.objects.create(tourist=tourist, guide=guide, destination=destination, date=day, price=price)
+
+
+def statuses(requests):
+    return [TourRequest.objects.get(pk=r.pk).status for r in requests]
+
+
+def test_bulk_accept_leaves_out_only_the_request_already_taken(guide, tourists):
+    requests = [request_for(guide, tourist, day=DAY.replace(day=DAY.day + i)) for i, tourist in enumerate(tourists)]
+    accept_tour_request(guide, requests[1].pk)
+
+    accepted, skipped = accept_tour_requests(guide, [r.pk for r in requests])
+
+    assert [r.pk for r in accepted] == [requests[0].pk, requests[2].pk]
+    assert skipped == []
+    assert statuses(requests) == ['accepted'] * 3
+    assert Tour.objects.filter(guide=guide).count() == 3
+    assert GuideDay.objects.filter(guide=guide).count() == 3
+    assert Earning.objects.filter(guide=guide).count() == 3
+
+
+def test_bulk_accept_skips_days_the_guide_is_busy(guide, tourists):
+    GuideDay.objects.create(guide=guide, date=DAY, reason=GuideDay.BLACKOUT)
+    busy, free, same_day = (request_for(guide, tourists[0]), request_for(guide, tourists[1], day=DAY.replace(day=11)),
+                            request_for(guide, tourists[2], day=DAY.replace(day=11)))
+
+    accepted, skipped = accept_tour_requests(guide, [busy.pk, free.pk, same_day.pk])
+
+    assert [r.pk for r in accepted] == [free.pk]
+    assert {r.pk for r in skipped} == {busy.pk, same_day.pk}
+    assert statuses([busy, free, same_day]) == ['pending', 'accepted', 'pending']
+
+
+def test_accept_on_a_busy_day_changes_nothing(guide, tourists):
+    GuideDay.objects.create(guide=guide, date=DAY, reason=GuideDay.BLACKOUT)
+    tour_request = request_for(guide, tourists[0])
+
+    with pytest.raises(GuideUnavailable):
+        accept_tour_request(guide, tour_request.pk)
+
+    assert statuses([tour_request]) == ['pending']
+    assert not Tour.objects.exists()
+    assert not Earning.objects.exists()
+    assert list(GuideDay.objects.values_list('reason', flat=True)) == [GuideDay.BLACKOUT]
+
+
+def test_second_accept_is_a_no_op(guide, tourists):
+    tour_request = request_for(guide, tourists[0])
+    assert accept_tour_request(guide, tour_request.pk) is not None
+    assert accept_tour_request(guide, tour_request.pk) is None
+    assert Tour.objects.count() == 1
+    assert Earning.objects.count() == 1
+
+
+def test_group_accept_takes_only_requests_still_pending(guide, tourists):
+    requests = [request_for(guide, tourist, destination=' sylhet ' if i else 'Sylhet')
+                for i, tourist in enumerate(tourists)]
+    reject_tour_request(guide, requests[0].pk)
+
+    tour, merged = accept_group(guide, [r.pk for r in requests])
+
+    assert {r.pk for r in merged} == {requests[1].pk, requests[2].pk}
+    assert set(tour.tourists.values_list('pk', flat=True)) == {tourists[1].pk, tourists[2].pk}
+    assert tour.price == Decimal(200)
+    assert statuses(requests) == ['rejected', 'accepted', 'accepted']
+    assert list(Earning.objects.values_list('amount', flat=True)) == [Decimal(200)]
+
+
+def test_group_accept_on_a_busy_day_changes_nothing(guide, tourists):
+    GuideDay.objects.create(guide=guide, date=DAY, reason=GuideDay.BLACKOUT)
+    requests = [request_for(guide, tourist) for tourist in tourists]
+
+    with pytest.raises(GuideUnavailable):
+        accept_group(guide, [r.pk for r in requests])
+
+    assert statuses(requests) == ['pending'] * 3
+    assert not Tour.objects.exists()
@@ -153,7 +153,7 @@ class TestGuideDashboardFlow:
         time.sleep(1)
 
         accept_url = reverse('accept_request', args=[tour_request.id])
-        self.driver.get(f"{live_server.url}{accept_url}")
+        self.driver.find_element(By.CSS_SELECTOR, f'form[action="{accept_url}"] button[type="submit"]').click()
         time.sleep(1)
 
         tour_request.refresh_from_db()
@@ -0,0 +1,50 @@
+"""
+A guide's tours and their participants, a keyset page at a time.
+
+Each page is a fixed number of queries however many tours the guide has or
+tourists a group tour holds: tours come with their tourist count and first
+few tourists prefetched, and participants with their tourist profiles
+joined in.
+"""
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Count, Prefetch
+
+from main.keyset import paginate
+
+from .models import Tour
+
+TOUR_ORDERING = ['-start_date', '-id']
+TOURS_PAGE_SIZE = 12
+# Tourists named on each my-tours card; the rest are counted
+PREVIEW_TOURISTS = 5
+PARTICIPANT_ORDERING = ['id']
+PARTICIPANTS_PAGE_SIZE = 50
+
+
+def guide_tours(guide):
+    return Tour.objects.filter(guide=guide).annotate(tourist_count=Count('tourists'))
+
+
+def tour_page(guide, cursor=None, per_page=TOURS_PAGE_SIZE):
+    """One page of the guide's tours, latest first, each with `preview_tourists`; raises InvalidCursor"""
+    tours = guide_tours(guide).prefetch_related(Prefetch(
+        'tourists',
+        queryset=get_user_model().objects.order_by('id')[:PREVIEW_TOURISTS],
+        to_attr='preview_tourists',
+    ))
+    return paginate(tours, TOUR_ORDERING, cursor, per_page)
+
+
+def participant_page(tour, cursor=None, per_page=PARTICIPANTS_PAGE_SIZE):
+    """One page of a tour's tourists with their tourist profiles; raises InvalidCursor"""
+    tourists = tour.tourists.select_related('tourist_profile')
+    return paginate(tourists, PARTICIPANT_ORDERING, cursor, per_page)
+
+
+def loaded_profile(obj, name):
+    """A reverse one-to-one loaded with select_related (no extra query), or None if there isn't one"""
+    try:
+        return getattr(obj, name)
+    except ObjectDoesNotExist:
+        return None
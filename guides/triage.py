@@ -0,0 +1,159 @@
+"""
+Accepting and rejecting tour requests.
+
+A request leaves "pending" through a conditional UPDATE (or a locked batch
+read), so when a guide double-clicks or two tabs accept at once only the
+first transition wins and the tour, its days and the earning are created
+exactly once, in the same transaction.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+
+from main.notifications import notify, notify_each
+
+from .availability import busy_days, hold_tours
+from .grouping import GROUP_CAPACITY, destination_key
+from .ledger import add_earnings
+from .models import Earning, Tour, TourRequest
+from .recommend import mark_guide_changed
+
+# Most requests a guide can accept or reject in one go
+MAX_TRIAGE = 100
+
+
+def accepted_message(tour_request, guide):
+    return f"Your tour request for {tour_request.destination} has been accepted by {guide.get_full_name()}"
+
+
+def rejected_message(tour_request, guide):
+    return f"Your tour request for {tour_request.destination} has been declined by {guide.get_full_name()}"
+
+
+def new_tour(tour_request):
+    return Tour(
+        guide_id=tour_request.guide_id,
+        destination=tour_request.destination,
+        start_date=tour_request.date,
+        end_date=tour_request.date,
+        price=tour_request.price or 0,
+    )
+
+
+def accept_tour_request(guide, request_id):
+    """
+    Accept one pending request: the tour, its tourist, its days and the
+    earning in one transaction. Returns the Tour, or None if the request was
+    no longer pending. Raises GuideUnavailable (rolling everything back) if
+    the guide is busy that day.
+    """
+    with transaction.atomic():
+        if not TourRequest.objects.filter(pk=request_id, guide=guide, status="pending").update(status="accepted"):
+            return None
+        tour_request = TourRequest.objects.get(pk=request_id)
+        tour = new_tour(tour_request)
+        tour.save()
+        tour.tourists.add(tour_request.tourist_id)
+        if tour_request.price:
+            Earning.objects.create(guide=guide, amount=tour_request.price,
+                                   description=f"Tour to {tour_request.destination}")
+        notify(tour_request.tourist_id, accepted_message(tour_request, guide))
+    return tour
+
+
+def reject_tour_request(guide, request_id):
+    """Reject one pending request; returns False if it was no longer pending"""
+    with transaction.atomic():
+        if not TourRequest.objects.filter(pk=request_id, guide=guide, status="pending").update(status="rejected"):
+            return False
+        tour_request = TourRequest.objects.get(pk=request_id)
+        notify(tour_request.tourist_id, rejected_message(tour_request, guide))
+    return True
+
+
+def _lock_pending(guide, request_ids):
+    return list(TourRequest.objects.select_for_update().filter(
+        guide=guide, status="pending", pk__in=list(request_ids)[:MAX_TRIAGE],
+    ).order_by('date', 'created_at', 'pk'))
+
+
+def accept_tour_requests(guide, request_ids):
+    """
+    Accept a batch of pending requests with one INSERT per table and a single
+    notification fan-out. Requests on a day the guide is already busy (or
+    that an earlier request in the batch takes) stay pending.
+
+    Returns (accepted, skipped) lists of TourRequests; raises GuideUnavailable
+    if a day was taken concurrently, in which case nothing is accepted.
+    """
+    with transaction.atomic():
+        pending = _lock_pending(guide, request_ids)
+        if not pending:
+            return [], []
+        taken = set(busy_days(guide.pk, pending[0].date, pending[-1].date))
+        accepted, skipped = [], []
+        for tour_request in pending:
+            if tour_request.date in taken:
+                skipped.append(tour_request)
+            else:
+                taken.add(tour_request.date)
+                accepted.append(tour_request)
+        if not accepted:
+            return [], skipped
+
+        TourRequest.objects.filter(pk__in=[r.pk for r in accepted]).update(status="accepted")
+        # bulk_create skips the Tour and Earning signals; their bookkeeping is done here instead
+        tours = Tour.objects.bulk_create([new_tour(r) for r in accepted])
+        Tour.tourists.through.objects.bulk_create([
+            Tour.tourists.through(tour_id=tour.pk, user_id=r.tourist_id) for tour, r in zip(tours, accepted)
+        ])
+        hold_tours(tours)
+        add_earnings([
+            Earning(guide=guide, amount=r.price, description=f"Tour to {r.destination}") for r in accepted if r.price
+        ])
+        mark_guide_changed(guide.pk)
+        notify_each([(r.tourist_id, accepted_message(r, guide)) for r in accepted])
+    return accepted, skipped
+
+
+def accept_group(guide, request_ids, capacity=GROUP_CAPACITY):
+    """
+    Accept pending requests together as one group Tour with every tourist on
+    it and a single earning for the summed price. The requests must share a
+    destination, date and duration and fit `capacity`; returns (tour,
+    requests), or (None, []) if they don't or fewer than two are still
+    pending. Raises GuideUnavailable if the guide is busy that day.
+    """
+    with transaction.atomic():
+        pending = _lock_pending(guide, request_ids)
+        keys = {(destination_key(r.destination), r.date, r.duration_hours) for r in pending}
+        if len(pending) < 2 or len(keys) != 1 or sum(r.number_of_travelers for r in pending) > capacity:
+            return None, []
+
+        TourRequest.objects.filter(pk__in=[r.pk for r in pending]).update(status="accepted")
+        first = pending[0]
+        destination = ' '.join(first.destination.split())
+        price = sum((r.price or 0 for r in pending), Decimal(0))
+        tour = Tour.objects.create(
+            guide=guide,
+            destination=destination,
+            start_date=first.date,
+            end_date=first.date,
+            price=price,
+            notes=f"Group tour for {len(pending)} requests",
+        )
+        tour.tourists.add(*{r.tourist_id for r in pending})
+        if price:
+            Earning.objects.create(guide=guide, amount=price,
+                                   description=f"Tour to {destination} (group of {len(pending)})")
+        notify_each([(r.tourist_id, accepted_message(r, guide)) for r in pending])
+    return tour, pending
+
+
+def reject_tour_requests(guide, request_ids):
+    """Reject a batch of pending requests with one UPDATE; returns the rejected TourRequests"""
+    with transaction.atomic():
+        pending = _lock_pending(guide, request_ids)
+        TourRequest.objects.filter(pk__in=[r.pk for r in pending]).update(status="rejected")
+        notify_each([(r.tourist_id, rejected_message(r, guide)) for r in pending])
+    return pending
@@ -8,11 +8,19 @@ urlpatterns = [
     path("tour_requests/", g_views.tour_requests, name="tour_requests"),
     path("guides/", g_views.guide_list, name="guide_list"),
     path("guides/<int:guide_id>/", g_views.guide_detail, name="guide_detail"),
+    path("api/recommend/", g_views.guide_recommend_api, name="guide_recommend_api"),
     path('tour-requests/accept/<int:request_id>/', g_views.accept_request, name='accept_request'),
     path('tour-requests/reject/<int:request_id>/', g_views.reject_request, name='reject_request'),
+    path('tour-requests/triage/', g_views.triage_requests, name='triage_requests'),
+    path('tour-requests/merge/', g_views.merge_requests, name='merge_requests'),
+    path('open-requests/', g_views.open_requests, name='open_requests'),
+    path('open-requests/<int:request_id>/claim/', g_views.claim_open_request, name='claim_open_request'),
+    path('api/tour-request-groups/', g_views.tour_request_groups_api, name='tour_request_groups_api'),
     path("my_tours/", g_views.my_tours, name="my_tours"),
     path('tour-detail/<int:tour_id>/', g_views.tour_detail, name='tour_detail'),
     path("earnings/", g_views.earnings, name="earnings"),
+    path("earnings/api/chart/", g_views.earnings_chart_api, name="earnings_chart_api"),
+    path("availability/", g_views.guide_availability, name="guide_availability"),
     path("messages/", g_views.guide_messages, name="guide_messages"),
 
     # NEW REVIEW URLS
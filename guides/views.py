@@ -1,19 +1,33 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponseForbidden
-from .models import GuideProfile, TourRequest, Tour, Earning, Review
-from tourists.models import Tourist
-from .forms import GuideProfileForm, TourRequestForm, ReviewForm
+from django.http import HttpResponseForbidden, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from .models import GuideDay, GuideProfile, Language, TourRequest, Tour, Review
+from .forms import GuideProfileForm, GuideSearchForm, OpenRequestFilterForm, TourRequestForm, ReviewForm
+from .availability import GuideUnavailable, available_guides, block_date, unblock_date
+from .ledger import (
+    CHART_DAYS, YEAR, chart_series, earnings_summary, ledger_page, monthly_earnings,
+    recent_earnings,
+)
+from .grouping import GROUP_CAPACITY, propose_groups
+from .listing import filter_guides, guide_page, listed_guides, listing_stats, sort_choices
+from .marketplace import board_page, claim_request, matching_requests
+from .recommend import recommend_guides
+from .tours import guide_tours, loaded_profile, participant_page, tour_page
+from .triage import (
+    MAX_TRIAGE, accept_group, accept_tour_request, accept_tour_requests, reject_tour_request, reject_tour_requests,
+)
 from accounts.utils import role_required
 from django.contrib.auth import get_user_model
 from django.template.defaulttags import register
 from django.utils import timezone
-from django.db.models import Sum
+from django.utils.dateparse import parse_date
 from datetime import date
 
-# Import Notification model from hotels app
-from hotels.models import Notification
+from main.keyset import InvalidCursor, request_page
+from main.notifications import mark_all_read, notify
 
 User = get_user_model()
 
@@ -31,45 +45,38 @@ def strip(value):
     return value.strip() if value else ''
 
 
-# --------------------------
-# HELPER FUNCTIONS
-# --------------------------
-def update_guide_rating(guide_user):
-    """Update guide's average rating based on all reviews"""
-    reviews = Review.objects.filter(guide=guide_user)
-    if reviews.count() > 0:
-        avg_rating = sum(review.rating for review in reviews) / reviews.count()
-        guide_profile = GuideProfile.objects.get(user=guide_user)
-        guide_profile.average_rating = round(avg_rating, 2)
-        guide_profile.save()
-
-
 # --------------------------
 # PUBLIC GUIDE LIST (Tourist view)
 # --------------------------
 def guide_list(request):
-    guides = GuideProfile.objects.select_related("user").filter(is_completed=True)
-
-    # Calculate stats for the template
-    verified_guides_count = guides.filter(is_verified=True).count()
-
-    # Calculate average experience
-    total_experience = sum(guide.experience_years for guide in guides)
-    avg_experience = round(total_experience / len(guides)) if guides else 0
+    form = GuideSearchForm(request.GET or None)
+    guides = listed_guides()
+    if form.is_valid():
+        guides = filter_guides(
+            guides,
+            query=form.cleaned_data.get('q'),
+            language=form.cleaned_data.get('language'),
+            verified=form.cleaned_data.get('verified'),
+            min_rating=form.cleaned_data.get('min_rating'),
+            min_experience=form.cleaned_data.get('min_experience'),
+        )
+        if form.cleaned_data.get('date'):
+            guides = available_guides(guides, form.cleaned_data['date'])
 
-    # Count unique languages
-    all_languages = set()
-    for guide in guides:
-        if guide.languages:
-            languages = [lang.strip() for lang in guide.languages.split(',')]
-            all_languages.update(languages)
-    total_languages = len(all_languages)
+    # Keyset pagination; a stale or tampered cursor falls back to the first page
+    (sort, page), links = request_page(request, lambda cursor: guide_page(guides, request.GET.get('sort'), cursor))
 
+    stats = listing_stats()
     context = {
-        'guides': guides,
-        'verified_guides_count': verified_guides_count,
-        'avg_experience': avg_experience,
-        'total_languages': total_languages,
+        'guides': page,
+        'form': form,
+        'sort': sort,
+        'sort_choices': sort_choices(),
+        **links,
+        'total_guides': stats['total'],
+        'verified_guides_count': stats['verified'],
+        'avg_experience': stats['avg_experience'],
+        'total_languages': stats['languages'],
     }
 
     return render(request, "guides/guide_list.html", context)
@@ -95,14 +102,8 @@ def guide_dashboard(request):
         status="pending"
     ).count()
 
-    # Monthly earnings (current month)
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-    monthly_earnings = Earning.objects.filter(
-        guide=request.user,
-        date__month=current_month,
-        date__year=current_year
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
+    # Monthly earnings (current month), from the rollup
+    this_month_earnings = monthly_earnings(request.user)
 
     # Recent requests (last 5)
     recent_requests = TourRequest.objects.filter(
@@ -116,19 +117,16 @@ def guide_dashboard(request):
     ).select_related('tourist').order_by('-created_at')[:3]
 
     # Review count
-    review_count = Review.objects.filter(guide=request.user).count()
+    review_count = profile.review_count
 
     # UNREAD NOTIFICATIONS COUNT - ADDED FOR NOTIFICATION SYSTEM
-    unread_notifications_count = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).count()
+    unread_notifications_count = request.user.unread_notifications
 
     context = {
         'profile': profile,
         'today_tours_count': today_tours_count,
         'pending_requests_count': pending_requests_count,
-        'monthly_earnings': monthly_earnings,
+        'monthly_earnings': this_month_earnings,
         'recent_requests': recent_requests,
         'recent_reviews': recent_reviews,
         'review_count': review_count,
@@ -146,7 +144,7 @@ def guide_dashboard(request):
 def mark_guide_notifications_read(request):
     """Mark all notifications as read for guide"""
     if request.method == "POST":
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        mark_all_read(request.user)
         messages.success(request, "All notifications marked as read!")
     return redirect('guide_dashboard')
 
@@ -195,105 +193,184 @@ def guide_profile(request):
 @login_required
 @role_required(['guide'])
 def tour_requests(request):
-    requests = TourRequest.objects.filter(guide=request.user, status="pending")
-    return render(request, "guides/tour_requests.html", {"requests": requests})
+    requests = TourRequest.objects.filter(guide=request.user, status="pending").select_related('tourist')
+    return render(request, "guides/tour_requests.html", {
+        "requests": requests,
+        "max_triage": MAX_TRIAGE,
+        "group_proposals": propose_groups(request.user),
+    })
 
 
 @login_required
 @role_required(['guide'])
+@require_POST
 def accept_request(request, request_id):
     tr = get_object_or_404(TourRequest, id=request_id, guide=request.user)
-    tr.status = "accepted"
-    tr.save()
+    try:
+        tour = accept_tour_request(request.user, tr.id)
+    except GuideUnavailable:
+        messages.error(request, f"You already have a tour or a blackout on {tr.date}.")
+        return redirect('tour_requests')
 
-    # Tour creation
-    tour = Tour.objects.create(
-        guide=request.user,
-        destination=tr.destination,
-        start_date=tr.date,
-        end_date=tr.date,
-        price=tr.price if tr.price else 0.00
-    )
-    tour.tourists.add(tr.tourist)
-    tour.save()
-
-    # Add earning
-    if tr.price:
-        Earning.objects.create(
-            guide=request.user,
-            amount=tr.price,
-            description=f"Tour to {tr.destination}"
-        )
+    if tour is None:
+        messages.info(request, "That request has already been answered.")
+    else:
+        messages.success(request, "Tour request accepted successfully!")
+    return redirect('tour_requests')
 
-    # CREATE NOTIFICATION FOR TOURIST - ADDED FOR NOTIFICATION SYSTEM
-    Notification.objects.create(
-        user=tr.tourist,
-        message=f"Your tour request for {tr.destination} has been accepted by {request.user.get_full_name()}",
-    )
 
-    messages.success(request, "Tour request accepted successfully!")
+@login_required
+@role_required(['guide'])
+@require_POST
+def reject_request(request, request_id):
+    get_object_or_404(TourRequest, id=request_id, guide=request.user)
+    if reject_tour_request(request.user, request_id):
+        messages.success(request, "Tour request rejected.")
+    else:
+        messages.info(request, "That request has already been answered.")
+    return redirect('tour_requests')
+
+
+@login_required
+@role_required(['guide'])
+@require_POST
+def triage_requests(request):
+    """Accept or reject every selected pending request at once"""
+    request_ids = [pk for pk in request.POST.getlist('request_ids') if pk.isdigit()]
+    action = request.POST.get('action')
+    if not request_ids or action not in ('accept', 'reject'):
+        messages.error(request, "Select some requests and an action.")
+        return redirect('tour_requests')
+
+    if action == 'reject':
+        rejected = reject_tour_requests(request.user, request_ids)
+        messages.success(request, f"Rejected {len(rejected)} request(s).")
+        return redirect('tour_requests')
+
+    try:
+        accepted, skipped = accept_tour_requests(request.user, request_ids)
+    except GuideUnavailable as exc:
+        messages.error(request, f"{exc} Nothing was accepted; please try again.")
+        return redirect('tour_requests')
+    messages.success(request, f"Accepted {len(accepted)} request(s).")
+    if skipped:
+        dates = sorted({str(r.date) for r in skipped})
+        dates = ', '.join(dates[:5]) + (' and more' if len(dates) > 5 else '')
+        messages.warning(request, f"{len(skipped)} request(s) left pending: you are already booked on {dates}.")
     return redirect('tour_requests')
 
 
 @login_required
 @role_required(['guide'])
-def reject_request(request, request_id):
-    tr = get_object_or_404(TourRequest, id=request_id, guide=request.user)
-    tr.status = "rejected"
-    tr.save()
+def tour_request_groups_api(request):
+    """The guide's pending requests that could run as merged group tours"""
+    groups = propose_groups(request.user)
+    for group in groups:
+        group['date'] = group['date'].isoformat()
+        group['price'] = str(group['price'])
+    return JsonResponse({'capacity': GROUP_CAPACITY, 'groups': groups})
 
-    # CREATE NOTIFICATION FOR TOURIST - ADDED FOR NOTIFICATION SYSTEM
-    Notification.objects.create(
-        user=tr.tourist,
-        message=f"Your tour request for {tr.destination} has been declined by {request.user.get_full_name()}",
-    )
 
-    messages.success(request, "Tour request rejected.")
+@login_required
+@role_required(['guide'])
+@require_POST
+def merge_requests(request):
+    """Accept the posted requests together as one group tour"""
+    request_ids = [pk for pk in request.POST.getlist('request_ids') if pk.isdigit()]
+    try:
+        tour, merged = accept_group(request.user, request_ids)
+    except GuideUnavailable:
+        messages.error(request, "You already have a tour or a blackout on that day.")
+        return redirect('tour_requests')
+    if tour is None:
+        messages.error(request, "Those requests can no longer be merged into one tour.")
+    else:
+        messages.success(request, f"Merged {len(merged)} requests into one group tour to {tour.destination}.")
     return redirect('tour_requests')
 
 
+# --------------------------
+# OPEN REQUEST BOARD
+# --------------------------
+@login_required
+@role_required(['guide'])
+def open_requests(request):
+    """Unclaimed requests the guide could take, filtered by language, destination and date"""
+    form = OpenRequestFilterForm(request.GET or None)
+    filters = form.cleaned_data if form.is_valid() else {}
+    requests = matching_requests(
+        request.user,
+        language=filters.get('language'),
+        destination=filters.get('destination'),
+        date=filters.get('date'),
+    )
+    page, links = request_page(request, lambda cursor: board_page(requests, cursor))
+    return render(request, "guides/open_requests.html", {
+        'requests': page,
+        'form': form,
+        **links,
+    })
+
+
+@login_required
+@role_required(['guide'])
+@require_POST
+def claim_open_request(request, request_id):
+    get_object_or_404(TourRequest, id=request_id)
+    try:
+        tour = claim_request(request.user, request_id)
+    except GuideUnavailable:
+        messages.error(request, "You already have a tour or a blackout on that day.")
+        return redirect('open_requests')
+    if tour is None:
+        messages.info(request, "Another guide has already claimed that request.")
+        return redirect('open_requests')
+    messages.success(request, f"You claimed the tour to {tour.destination} on {tour.start_date}.")
+    return redirect('my_tours')
+
+
 # --------------------------
 # MY TOURS & TOUR DETAILS
 # --------------------------
 @login_required
 @role_required(['guide'])
 def my_tours(request):
-    tours = Tour.objects.filter(guide=request.user)
-    return render(request, "guides/my_tours.html", {"tours": tours})
+    cursor = request.GET.get('cursor')
+    try:
+        page = tour_page(request.user, cursor)
+    except InvalidCursor:
+        cursor, page = None, tour_page(request.user)
+    return render(request, "guides/my_tours.html", {
+        "tours": page,
+        "next_cursor": page.next_cursor,
+        "is_first_page": not cursor,
+    })
 
 
 @login_required
 @role_required(['guide'])
 def tour_detail(request, tour_id):
-    # Get the tour object or return 404
-    tour = get_object_or_404(Tour, id=tour_id, guide=request.user)
+    # The tour with its guide's profile and participant count, then one page of participants
+    tour = get_object_or_404(guide_tours(request.user).select_related('guide__guideprofile'), id=tour_id)
+    guide_profile = loaded_profile(tour.guide, 'guideprofile')
 
-    # Get guide profile with contact information
-    guide_profile = None
+    cursor = request.GET.get('cursor')
     try:
-        guide_profile = GuideProfile.objects.get(user=tour.guide)
-    except GuideProfile.DoesNotExist:
-        pass
-
-    # Get tourist profiles for all tourists in this tour
-    tourist_profiles = []
-    for tourist_user in tour.tourists.all():
-        try:
-            tourist_profile = Tourist.objects.get(user=tourist_user)
-            tourist_profiles.append({
-                'user': tourist_user,
-                'profile': tourist_profile
-            })
-        except Tourist.DoesNotExist:
-            tourist_profiles.append({
-                'user': tourist_user,
-                'profile': None
-            })
+        participants = participant_page(tour, cursor)
+    except InvalidCursor:
+        cursor, participants = None, participant_page(tour)
+    tourist_profiles = [
+        {'user': tourist_user, 'profile': loaded_profile(tourist_user, 'tourist_profile')}
+        for tourist_user in participants
+    ]
 
     context = {
         'tour': tour,
         'guide_profile': guide_profile,
         'tourist_profiles': tourist_profiles,
+        'participant_count': tour.tourist_count,
+        'next_cursor': participants.next_cursor,
+        'is_first_page': not cursor,
     }
     return render(request, "guides/tour_detail.html", context)
 
@@ -304,49 +381,45 @@ def tour_detail(request, tour_id):
 @login_required
 @role_required(['guide'])
 def earnings(request):
-    earnings = Earning.objects.filter(guide=request.user).order_by('-date')
-    total = sum(e.amount for e in earnings)
-
-    # Calculate completed tours count - FIXED
-    completed_tours_count = Tour.objects.filter(
-        guide=request.user,
-        status="completed"
-    ).count()
+    """Totals from the monthly rollup and the ledger a keyset page at a time"""
+    summary = earnings_summary(request.user)
+    cursor = request.GET.get('cursor')
+    try:
+        page = ledger_page(request.user, cursor)
+    except InvalidCursor:
+        cursor, page = None, ledger_page(request.user)
+    recent = page.object_list[:5] if not cursor else recent_earnings(request.user)
 
-    # Alternative: Count from earnings if tours aren't marked as completed
+    completed_tours_count = Tour.objects.filter(guide=request.user, status="completed").count()
+    # Tours aren't always marked completed, so fall back to the number of earnings
     if completed_tours_count == 0:
-        completed_tours_count = earnings.count()
-
-    # Calculate average earnings per tour - FIXED
-    avg_per_tour = 0
-    if completed_tours_count > 0:
-        avg_per_tour = round(total / completed_tours_count, 2)
-    else:
-        avg_per_tour = total  # If no completed tours but has earnings
-
-    # Get monthly earnings
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-    monthly_earnings = Earning.objects.filter(
-        guide=request.user,
-        date__month=current_month,
-        date__year=current_year
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
-
-    # For chart max value
-    max_amount = max([e.amount for e in earnings]) if earnings else 0
+        completed_tours_count = summary['count']
+    avg_per_tour = round(summary['total'] / completed_tours_count, 2) if completed_tours_count else summary['total']
 
     context = {
-        'earnings': earnings,
-        'total': total,
-        'monthly_earnings': monthly_earnings,
+        'earnings': page,
+        'recent_earnings': recent,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not cursor,
+        'total': summary['total'],
+        'monthly_earnings': summary['monthly_earnings'],
         'completed_tours_count': completed_tours_count,
         'avg_per_tour': avg_per_tour,
-        'max_amount': max_amount,
+        'chart_days': CHART_DAYS,
+        'chart_year': YEAR,
     }
     return render(request, "guides/earnings.html", context)
 
 
+@login_required
+@role_required(['guide'])
+def earnings_chart_api(request):
+    """Chart series from the earnings rollups: ?days=7|30|90 (daily) or 365 (this year, monthly)"""
+    days = request.GET.get('days', '')
+    days = int(days) if days.isdigit() and int(days) in (*CHART_DAYS, YEAR) else 30
+    return JsonResponse(chart_series(request.user, days))
+
+
 # --------------------------
 # MESSAGES
 # --------------------------
@@ -382,13 +455,7 @@ def create_review(request, guide_id):
             review.save()
 
             # CREATE NOTIFICATION FOR GUIDE - ADDED FOR NOTIFICATION SYSTEM
-            Notification.objects.create(
-                user=guide_user,
-                message=f"New {review.rating}-star review from {request.user.get_full_name()}",
-            )
-
-            # Update guide's average rating
-            update_guide_rating(guide_user)
+            notify(guide_user, f"New {review.rating}-star review from {request.user.get_full_name()}")
 
             messages.success(request, "Review submitted successfully!")
             return redirect("guide_detail", guide_id=guide_profile.id)
@@ -415,9 +482,6 @@ def edit_review(request, review_id):
         if form.is_valid():
             form.save()
 
-            # Update guide's average rating
-            update_guide_rating(review.guide)
-
             messages.success(request, "Review updated successfully!")
             return redirect("guide_detail", guide_id=guide_profile.id)
     else:
@@ -442,9 +506,6 @@ def delete_review(request, review_id):
     if request.method == "POST":
         review.delete()
 
-        # Update guide's average rating
-        update_guide_rating(review.guide)
-
         messages.success(request, "Review deleted successfully!")
         return redirect("guide_detail", guide_id=guide_profile.id)
 
@@ -455,27 +516,72 @@ def delete_review(request, review_id):
     return render(request, "guides/confirm_delete_review.html", context)
 
 
+def guide_recommend_api(request):
+    """Guides ranked for a tour request: ?destination=&date=&party_size=&language=&limit="""
+    day = parse_date(request.GET.get('date', ''))
+    party_size = request.GET.get('party_size', '')
+    limit = request.GET.get('limit', '')
+    language = request.GET.get('language', '').strip()
+
+    language_id = None
+    if language:
+        language_id = Language.objects.filter(name__iexact=language).values_list('pk', flat=True).first()
+
+    guides = recommend_guides(
+        destination=request.GET.get('destination', ''),
+        date=day,
+        party_size=int(party_size) if party_size.isdigit() else 1,
+        language=language_id,
+        limit=min(int(limit), 50) if limit.isdigit() and int(limit) > 0 else 10,
+    )
+    for guide in guides:
+        guide['url'] = reverse('guide_detail', args=[guide['id']])
+    return JsonResponse({'guides': guides})
+
+
+# --------------------------
+# AVAILABILITY CALENDAR
+# --------------------------
+@login_required
+@role_required(['guide'])
+def guide_availability(request):
+    """Upcoming booked and blacked-out days; POST blocks or frees a date"""
+    if request.method == "POST":
+        day = parse_date(request.POST.get('date', ''))
+        if day is None or day < timezone.localdate():
+            messages.error(request, "Please choose a date from today on.")
+        elif request.POST.get('action') == 'unblock':
+            if unblock_date(request.user, day):
+                messages.success(request, f"{day} is open for tours again.")
+            else:
+                messages.error(request, f"{day} isn't blocked off; a day with a tour opens when the tour is cancelled.")
+        elif block_date(request.user, day):
+            messages.success(request, f"{day} is blocked off.")
+        else:
+            messages.error(request, f"You already have a tour or a blackout on {day}.")
+        return redirect('guide_availability')
+
+    busy_days = GuideDay.objects.filter(
+        guide=request.user, date__gte=timezone.localdate()
+    ).select_related('tour').order_by('date')[:180]
+    return render(request, "guides/availability.html", {"busy_days": busy_days})
+
+
 # --------------------------
 # PUBLIC GUIDE DETAIL (Tourist view) - UPDATED VERSION
 # --------------------------
 def guide_detail(request, guide_id):
     guide = get_object_or_404(GuideProfile, id=guide_id)
 
-    # Get reviews and calculate stats
+    # Reviews; the rating and count are maintained on the profile by guides.signals
     reviews = Review.objects.filter(guide=guide.user).select_related('tourist').order_by('-created_at')
-    review_count = reviews.count()
-
-    # Calculate average rating
-    if review_count > 0:
-        avg_rating = sum(review.rating for review in reviews) / review_count
-        guide.average_rating = round(avg_rating, 2)
-        guide.save()
+    review_count = guide.review_count
 
     # Handle booking form
     booking_form = None
     if request.user.is_authenticated and getattr(request.user, "role", None) == "tourist":
         if request.method == "POST" and 'submit_booking' in request.POST:
-            booking_form = TourRequestForm(request.POST)
+            booking_form = TourRequestForm(request.POST, guide=guide.user)
             if booking_form.is_valid():
                 tour_request = booking_form.save(commit=False)
                 tour_request.tourist = request.user
@@ -483,9 +589,9 @@ def guide_detail(request, guide_id):
                 tour_request.save()
 
                 # CREATE NOTIFICATION FOR GUIDE - ADDED FOR NOTIFICATION SYSTEM
-                Notification.objects.create(
-                    user=guide.user,
-                    message=f"New tour request from {request.user.get_full_name()} for {tour_request.destination}",
+                notify(
+                    guide.user_id,
+                    f"New tour request from {request.user.get_full_name()} for {tour_request.destination}",
                 )
 
                 messages.success(request, "Tour request sent successfully!")
@@ -505,11 +611,7 @@ def guide_detail(request, guide_id):
     # Calculate additional stats for template
     completed_tours = Tour.objects.filter(guide=guide.user, status="completed").count()
 
-    # Count languages
-    total_languages = 0
-    if guide.languages:
-        languages = [lang.strip() for lang in guide.languages.split(',')]
-        total_languages = len(languages)
+    languages = list(guide.spoken_languages.all())
 
     context = {
         'guide': guide,
@@ -518,7 +620,8 @@ def guide_detail(request, guide_id):
         'reviews': reviews,
         'review_count': review_count,
         'completed_tours': completed_tours,
-        'total_languages': total_languages,
+        'languages': languages,
+        'total_languages': len(languages),
         'user_review': user_review,
         'review_form': review_form,  # Add this for template context
     }
@@ -532,7 +635,7 @@ def book_guide(request, guide_id):
     guide = get_object_or_404(GuideProfile, id=guide_id)
 
     if request.method == "POST":
-        form = TourRequestForm(request.POST)
+        form = TourRequestForm(request.POST, guide=guide.user)
         if form.is_valid():
             tour_request = form.save(commit=False)
             tour_request.tourist = request.user
@@ -540,9 +643,9 @@ def book_guide(request, guide_id):
             tour_request.save()
 
             # CREATE NOTIFICATION FOR GUIDE - ADDED FOR NOTIFICATION SYSTEM
-            Notification.objects.create(
-                user=guide.user,
-                message=f"New tour request from {request.user.get_full_name()} for {tour_request.destination}",
+            notify(
+                guide.user_id,
+                f"New tour request from {request.user.get_full_name()} for {tour_request.destination}",
             )
 
             messages.success(request, "Tour request sent successfully!")
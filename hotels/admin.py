@@ -1,29 +1,32 @@
+from django import forms
 from django.contrib import admin
-from .models import Hotel, HotelImage, RoomType, HotelBooking, HotelReview, Notification
+
+from .inventory import held_stay, stay_fits
+from .models import Hotel, HotelImage, RoomType, HotelBooking, HotelReview, Notification, ArchivedNotification, RoomNight, HotelDailyStats
 
 
 @admin.register(Hotel)
 class HotelAdmin(admin.ModelAdmin):
     list_display = (
-        "name", "owner", "city", "area", "average_rating",
+        "name", "owner", "city", "area", "average_rating", "review_count",
         "min_price", "max_price", "created_at"
     )
     list_filter = ("city", "area", "has_wifi", "has_pool", "has_ac", "has_parking")
     search_fields = ("name", "city", "area", "landmark", "owner__username")
-    readonly_fields = ("average_rating", "created_at", "updated_at")
+    readonly_fields = ("average_rating", "review_count", "rating_sum", "created_at", "updated_at")
     ordering = ("-created_at",)
     fieldsets = (
         ("Basic Info", {
             "fields": ("owner", "name", "profile_image", "address", "phone", "description")
         }),
         ("Location", {
-            "fields": ("city", "area", "landmark")
+            "fields": ("city", "area", "landmark", "latitude", "longitude")
         }),
         ("Amenities", {
             "fields": ("has_wifi", "has_pool", "has_ac", "has_breakfast", "has_parking", "has_gym")
         }),
         ("Price & Ratings", {
-            "fields": ("min_price", "max_price", "average_rating")
+            "fields": ("min_price", "max_price", "average_rating", "review_count", "rating_sum")
         }),
         ("Timestamps", {
             "fields": ("created_at", "updated_at")
@@ -47,8 +50,26 @@ class RoomTypeAdmin(admin.ModelAdmin):
     ordering = ("hotel", "name")
 
 
+class HotelBookingAdminForm(forms.ModelForm):
+    class Meta:
+        model = HotelBooking
+        fields = '__all__'
+
+    def clean(self):
+        # Saving a holding booking takes its nights (hotels.signals); catch a full night here rather than as a 500
+        cleaned_data = super().clean()
+        fields = ('room_type', 'check_in', 'check_out', 'number_of_rooms', 'status')
+        room_type, check_in, check_out, rooms, status = (cleaned_data.get(name) for name in fields)
+        if room_type and check_in and check_out and rooms and status in HotelBooking.HOLDING_STATUSES:
+            previous = held_stay(self.instance) if self.instance.pk else None
+            if not stay_fits((room_type.pk, check_in, check_out, rooms), previous):
+                raise forms.ValidationError(f"Not enough {room_type.name} rooms left for {check_in} to {check_out}.")
+        return cleaned_data
+
+
 @admin.register(HotelBooking)
 class HotelBookingAdmin(admin.ModelAdmin):
+    form = HotelBookingAdminForm
     list_display = (
         "id", "tourist", "hotel", "room_type",
         "check_in", "check_out", "status", "total_amount"
@@ -59,6 +80,22 @@ class HotelBookingAdmin(admin.ModelAdmin):
     ordering = ("-created_at",)
 
 
+@admin.register(RoomNight)
+class RoomNightAdmin(admin.ModelAdmin):
+    list_display = ("room_type", "date", "booked")
+    list_filter = ("date",)
+    search_fields = ("room_type__hotel__name", "room_type__name")
+    ordering = ("room_type", "date")
+
+
+@admin.register(HotelDailyStats)
+class HotelDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ("hotel", "date", "bookings", "pending", "confirmed", "cancelled", "completed", "checkins")
+    list_filter = ("date",)
+    search_fields = ("hotel__name",)
+    ordering = ("hotel", "-date")
+
+
 @admin.register(HotelReview)
 class HotelReviewAdmin(admin.ModelAdmin):
     list_display = ("hotel", "tourist", "rating", "created_at")
@@ -75,3 +112,12 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ("user__username", "message")
     readonly_fields = ("created_at",)
     ordering = ("-created_at",)
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ("user", "message", "created_at", "archived_at")
+    list_filter = ("created_at", "archived_at")
+    search_fields = ("user__username", "message")
+    readonly_fields = ("created_at", "archived_at")
+    ordering = ("-created_at",)
@@ -0,0 +1,71 @@
+"""
+Cached, user-independent parts of the hotel detail page.
+
+The hotel, its gallery, room types and latest reviews are loaded in one batch
+and cached per hotel as plain values. Signals bump the hotel's cache version
+whenever one of those rows changes (see main.cache), so every process sees
+the change as soon as it commits; anything that depends on the viewer is
+added by the view.
+"""
+from django.core.cache import cache
+from django.db.models import FileField, Prefetch
+from django.shortcuts import get_object_or_404
+
+from main.cache import bump_version, versioned_key
+
+from .models import Hotel, HotelReview
+
+REVIEWS_SHOWN = 10
+# Upper bound on staleness for changes no signal sees, such as a reviewer renaming themselves
+CACHE_SECONDS = 15 * 60
+
+
+def cache_key(hotel_id):
+    return f'hotels:detail:{hotel_id}'
+
+
+def load_hotel_detail(hotel_id):
+    """The hotel with gallery_images, room_types and latest_reviews prefetched, in four queries"""
+    latest_reviews = HotelReview.objects.select_related('tourist').order_by('-created_at', '-id')
+    return get_object_or_404(
+        Hotel.objects.prefetch_related(
+            'gallery_images',
+            'room_types',
+            Prefetch('reviews', queryset=latest_reviews[:REVIEWS_SHOWN], to_attr='latest_reviews'),
+        ),
+        pk=hotel_id,
+    )
+
+
+def values(obj):
+    """A row's column values by attribute name (`hotel_id`, not `hotel`), with files as their stored names"""
+    data = {}
+    for field in obj._meta.concrete_fields:
+        value = getattr(obj, field.attname)
+        data[field.attname] = getattr(value, 'name', value) if isinstance(field, FileField) else value
+    return data
+
+
+def review_values(review):
+    return {**values(review), 'tourist_name': review.tourist.get_full_name() or review.tourist.username}
+
+
+def hotel_detail_data(hotel_id):
+    """Cached detail data for a hotel as dicts, loading it on a miss; raises Http404 for unknown ids"""
+    key = versioned_key(cache_key(hotel_id))
+    data = cache.get(key)
+    if data is None:
+        hotel = load_hotel_detail(hotel_id)
+        data = {
+            'hotel': values(hotel),
+            'gallery_images': [values(image) for image in hotel.gallery_images.all()],
+            'room_types': [values(room_type) for room_type in hotel.room_types.all()],
+            'reviews': [review_values(review) for review in hotel.latest_reviews],
+        }
+        cache.set(key, data, CACHE_SECONDS)
+    return data
+
+
+def invalidate_hotel_detail(hotel_id):
+    """Retire a hotel's cached detail, for every process once the current transaction commits"""
+    bump_version(cache_key(hotel_id))
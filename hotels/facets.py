@@ -0,0 +1,117 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .models import AMENITY_BITS
+
+FACETS = ('amenities', 'cities', 'ratings', 'prices')
+
+# (lower bound, label) for the cumulative rating facets, matching HotelSearchForm.RATING_CHOICES
+RATING_BUCKETS = [(4.5, '4.5+ Stars'), (4.0, '4.0+ Stars'), (3.5, '3.5+ Stars'), (3.0, '3.0+ Stars')]
+
+# (min, max, label) bands over Hotel.min_price; max is exclusive and None means open-ended
+PRICE_BANDS = [
+    (0, 2000, 'Under ৳2,000'),
+    (2000, 5000, '৳2,000 - ৳5,000'),
+    (5000, 10000, '৳5,000 - ৳10,000'),
+    (10000, None, '৳10,000+'),
+]
+
+
+def amenity_masks(mask, match='any'):
+    """
+    Every amenities value satisfying `mask`: supersets for 'all', overlaps for 'any'.
+
+    With six amenities there are only 64 possible values, so the bitwise test
+    becomes an IN list the amenities index can answer directly.
+    """
+    values = range(1 << len(AMENITY_BITS))
+    if match == 'all':
+        return [value for value in values if value & mask == mask]
+    return [value for value in values if value & mask]
+
+
+def filter_amenities(hotels, names, match='any'):
+    """Narrow a Hotel queryset to hotels with any (or all) of the named amenities"""
+    mask = sum(AMENITY_BITS[name] for name in names if name in AMENITY_BITS)
+    if not mask:
+        return hotels
+    return hotels.filter(amenities__in=amenity_masks(mask, match))
+
+
+def _bucket_expression(bounds):
+    """CASE expression giving the index of the first (lookup, bound) pair that matches"""
+    return Case(
+        *[When(**{lookup: bound}, then=Value(i)) for i, (lookup, bound) in enumerate(bounds)],
+        default=Value(None),
+        output_field=IntegerField(),
+    )
+
+
+def narrow(hotels, selections, skip=None):
+    """Apply every facet's selection to a Hotel queryset, except `skip`'s"""
+    for facet, select in selections.items():
+        if facet != skip:
+            hotels = select(hotels)
+    return hotels
+
+
+def facet_counts(hotels, selections=None):
+    """
+    Counts per amenity, city, rating bucket and price band for a Hotel queryset.
+
+    `selections` maps a facet ('amenities', 'cities', 'ratings' or 'prices')
+    to a function narrowing a queryset to what was picked in it, and `hotels`
+    has every other filter applied. Counts are disjunctive: each facet counts
+    the hotels matching every selection but its own, so picking one option
+    doesn't zero its alternatives. Unselected facets share one query over the
+    fully narrowed set; each selected facet costs one more.
+    """
+    selections = selections or {}
+    counts = {}
+    if len(selections) < len(FACETS):
+        counts = _counts(narrow(hotels, selections))
+    for facet in selections:
+        counts[facet] = _counts(narrow(hotels, selections, skip=facet))[facet]
+    return counts
+
+
+def _counts(hotels):
+    """
+    Every facet's counts over `hotels`, from one GROUP BY over (amenities,
+    city, rating bucket, price band) rolled up in Python.
+    """
+    rating_bucket = _bucket_expression([('average_rating__gte', low) for low, _ in RATING_BUCKETS])
+    price_band = _bucket_expression([
+        ('min_price__lt', high) if high is not None else ('min_price__gte', low)
+        for low, high, _ in PRICE_BANDS
+    ])
+    groups = hotels.order_by().values('amenities', 'city').annotate(
+        rating_bucket=rating_bucket, price_band=price_band, hotels=Count('pk'),
+    ).values_list('amenities', 'city', 'rating_bucket', 'price_band', 'hotels')
+
+    amenities, cities, ratings, prices = Counter(), Counter(), Counter(), Counter()
+    for mask, city, bucket, band, count in groups:
+        for name, bit in AMENITY_BITS.items():
+            if mask & bit:
+                amenities[name] += count
+        if city:
+            cities[city.strip()] += count
+        if bucket is not None:
+            ratings[bucket] += count
+        if band is not None:
+            prices[band] += count
+
+    # Rating facets are cumulative: a 4.7 hotel counts towards 4.5+, 4.0+, ...
+    rating_totals = defaultdict(int)
+    running = 0
+    for i in range(len(RATING_BUCKETS)):
+        running += ratings[i]
+        rating_totals[i] = running
+
+    return {
+        'amenities': dict(amenities),
+        'cities': cities.most_common(),
+        'ratings': [(str(low), label, rating_totals[i]) for i, (low, label) in enumerate(RATING_BUCKETS)],
+        'prices': [(low, high, label, prices[i]) for i, (low, high, label) in enumerate(PRICE_BANDS)],
+    }
@@ -1,5 +1,6 @@
 from django import forms
 from .models import Hotel, RoomType, HotelBooking, HotelReview, HotelImage
+from destinations.models import Destination
 
 
 class HotelForm(forms.ModelForm):
@@ -7,13 +8,15 @@ class HotelForm(forms.ModelForm):
         model = Hotel
         fields = [
             'name', 'address', 'phone', 'description', 'profile_image',
-            'city', 'area', 'landmark',
+            'city', 'area', 'landmark', 'latitude', 'longitude',
             'has_wifi', 'has_pool', 'has_ac', 'has_breakfast',
             'has_parking', 'has_gym'
         ]
         widgets = {
             'description': forms.Textarea(attrs={'rows': 4}),
             'address': forms.Textarea(attrs={'rows': 3}),
+            'latitude': forms.NumberInput(attrs={'step': 'any', 'min': -90, 'max': 90}),
+            'longitude': forms.NumberInput(attrs={'step': 'any', 'min': -180, 'max': 180}),
         }
 
 
@@ -82,6 +85,40 @@ class HotelSearchForm(forms.Form):
         ],
         widget=forms.CheckboxSelectMultiple
     )
+    # Proximity: around a destination, or around explicit coordinates
+    near = forms.ModelChoiceField(
+        required=False,
+        queryset=Destination.objects.filter(latitude__isnull=False, longitude__isnull=False),
+        empty_label='Anywhere',
+    )
+    latitude = forms.FloatField(required=False, min_value=-90, max_value=90, widget=forms.HiddenInput)
+    longitude = forms.FloatField(required=False, min_value=-180, max_value=180, widget=forms.HiddenInput)
+    radius_km = forms.IntegerField(required=False, min_value=1, max_value=500, initial=10)
+
+    amenity_match = forms.ChoiceField(
+        required=False,
+        choices=[('any', 'Any selected'), ('all', 'All selected')],
+        initial='any',
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        check_in = cleaned_data.get('check_in')
+        check_out = cleaned_data.get('check_out')
+        if check_in and check_out and check_out <= check_in:
+            self.add_error('check_out', "Check-out date must be after check-in date.")
+        if (cleaned_data.get('latitude') is None) != (cleaned_data.get('longitude') is None):
+            self.add_error('longitude', "Latitude and longitude must be given together.")
+        return cleaned_data
+
+    def search_center(self):
+        """(latitude, longitude) to search around, or None"""
+        near = self.cleaned_data.get('near')
+        if near:
+            return near.latitude, near.longitude
+        if self.cleaned_data.get('latitude') is not None and self.cleaned_data.get('longitude') is not None:
+            return self.cleaned_data['latitude'], self.cleaned_data['longitude']
+        return None
 
 
 class HotelReviewForm(forms.ModelForm):
@@ -0,0 +1,153 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import HotelBooking, RoomNight, RoomType
+
+
+class RoomUnavailable(Exception):
+    """Raised when a stay cannot be held because a night is already full"""
+
+
+def stay_nights(check_in, check_out):
+    """Return the nights of a stay: every date in [check_in, check_out)"""
+    return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+
+def held_stay(booking):
+    """The (room type, check-in, check-out, rooms) a booking keeps out of inventory, if any"""
+    if booking.status not in HotelBooking.HOLDING_STATUSES:
+        return None
+    return booking.room_type_id, booking.check_in, booking.check_out, booking.number_of_rooms
+
+
+def stay_fits(stay, previous=None):
+    """
+    Whether `stay` could be held once `previous`, the hold it replaces, is given back.
+
+    A read-only check for forms; hold_rooms still has the final say.
+    """
+    room_type_id, check_in, check_out, rooms = stay
+    booked = dict(RoomNight.objects.filter(
+        room_type_id=room_type_id, date__gte=check_in, date__lt=check_out
+    ).values_list('date', 'booked'))
+    if previous and previous[0] == room_type_id:
+        for night in stay_nights(previous[1], previous[2]):
+            if night in booked:
+                booked[night] -= previous[3]
+    total = RoomType.objects.values_list('available_rooms', flat=True).get(pk=room_type_id)
+    return max(booked.values(), default=0) + rooms <= total
+
+
+def hold_rooms(room_type_id, check_in, check_out, rooms):
+    """
+    Add `rooms` to the ledger for every night of the stay, or raise RoomUnavailable.
+
+    The capacity check lives in the UPDATE's WHERE clause, so two concurrent
+    holds can never both pass it: the database serializes writes to the same
+    rows and the loser matches fewer nights than requested and rolls back.
+    """
+    nights = stay_nights(check_in, check_out)
+    if not nights:
+        return
+    with transaction.atomic():
+        total = RoomType.objects.select_for_update().values_list(
+            'available_rooms', flat=True
+        ).get(pk=room_type_id)
+        RoomNight.objects.bulk_create(
+            [RoomNight(room_type_id=room_type_id, date=night) for night in nights],
+            ignore_conflicts=True,
+        )
+        held = RoomNight.objects.filter(
+            room_type_id=room_type_id, date__gte=check_in, date__lt=check_out,
+            booked__lte=total - rooms,
+        ).update(booked=F('booked') + rooms)
+        if held != len(nights):
+            raise RoomUnavailable(f"Not enough rooms left for {check_in} to {check_out}.")
+
+
+def release_rooms(room_type_id, check_in, check_out, rooms):
+    """Give `rooms` back to inventory for every night of the stay"""
+    RoomNight.objects.filter(
+        room_type_id=room_type_id, date__gte=check_in, date__lt=check_out
+    ).update(booked=Greatest(F('booked') - rooms, Value(0)))
+
+
+def release_stays(stays):
+    """
+    Give back many (room type, check-in, check-out, rooms) stays at once:
+    one UPDATE per room type and number of rooms freed, however many stays.
+    """
+    freed = Counter()
+    for room_type_id, check_in, check_out, rooms in stays:
+        for night in stay_nights(check_in, check_out):
+            freed[room_type_id, night] += rooms
+    nights = defaultdict(list)
+    for (room_type_id, night), rooms in freed.items():
+        nights[room_type_id, rooms].append(night)
+    for (room_type_id, rooms), dates in nights.items():
+        RoomNight.objects.filter(room_type_id=room_type_id, date__in=dates).update(
+            booked=Greatest(F('booked') - rooms, Value(0))
+        )
+
+
+def free_rooms_expression(check_in, check_out):
+    """
+    Expression for rooms of a RoomType free on every night of the stay:
+    total rooms minus the busiest night, read from the (room_type, date) index.
+    """
+    peak = RoomNight.objects.filter(
+        room_type=OuterRef('pk'), date__gte=check_in, date__lt=check_out
+    ).values('room_type').annotate(peak=Max('booked')).values('peak')
+    return F('available_rooms') - Coalesce(Subquery(peak), Value(0))
+
+
+def free_rooms(room_type, check_in, check_out):
+    """Number of rooms of this type that can still be booked for the whole stay"""
+    return RoomType.objects.filter(pk=room_type.pk).annotate(
+        free=free_rooms_expression(check_in, check_out)
+    ).values_list('free', flat=True).get()
+
+
+def available_room_types(check_in, check_out, rooms=1, guests=1):
+    """Room types with `rooms` free every night that together sleep `guests`"""
+    return RoomType.objects.annotate(
+        free=free_rooms_expression(check_in, check_out),
+        sleeps=F('capacity') * rooms,
+    ).filter(free__gte=rooms, sleeps__gte=guests)
+
+
+def available_hotels(hotels, check_in, check_out, rooms=1, guests=1):
+    """Narrow a Hotel queryset to hotels with a room type that fits the stay"""
+    room_types = available_room_types(check_in, check_out, rooms, guests)
+    return hotels.filter(Exists(room_types.filter(hotel=OuterRef('pk'))))
+
+
+def place_booking(booking):
+    """Save a new booking and hold its nights in one transaction"""
+    with transaction.atomic():
+        booking.save()
+    return booking
+
+
+def rebuild_ledger(batch_size=2000):
+    """Recompute every RoomNight row from the holding HotelBooking rows"""
+    held = Counter()
+    bookings = HotelBooking.objects.filter(
+        status__in=HotelBooking.HOLDING_STATUSES, check_out__gt=F('check_in')
+    ).values_list('room_type_id', 'check_in', 'check_out', 'number_of_rooms')
+    for room_type_id, check_in, check_out, rooms in bookings.iterator(chunk_size=batch_size):
+        for night in stay_nights(check_in, check_out):
+            held[room_type_id, night] += rooms
+
+    with transaction.atomic():
+        RoomNight.objects.all().delete()
+        RoomNight.objects.bulk_create(
+            (RoomNight(room_type_id=room_type_id, date=night, booked=booked)
+             for (room_type_id, night), booked in held.items()),
+            batch_size=batch_size,
+        )
+    return len(held)
@@ -0,0 +1,74 @@
+"""
+Booking status by date: confirmed stays complete after check-out, which
+opens them for review, and bookings still pending after
+PENDING_BOOKING_HOURS are cancelled and their rooms released.
+
+The sweeps update rows in bulk, so they apply the inventory and daily
+stats changes that hotels.signals would make for a single save.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.utils import timezone
+
+from main.lifecycle import CHUNK_SIZE, advance_in_chunks
+from main.notifications import notify_each
+
+from .inventory import release_stays
+from .models import HotelBooking
+from .stats import apply_tally, booking_tally
+
+# How long a hotel has to confirm a booking before it lapses
+PENDING_BOOKING_HOURS = 48
+BOOKING_FIELDS = ['pk', 'tourist_id', 'hotel_id', 'hotel__name', 'room_type_id', 'check_in', 'check_out',
+                  'number_of_rooms', 'status', 'created_at']
+
+
+def set_status(bookings, status, message):
+    """Move locked bookings to `status`, keeping the daily stats in step, and tell their tourists"""
+    tally = Counter()
+    for booking in bookings:
+        tally.subtract(booking_tally(booking))
+        booking.status = status
+        tally.update(booking_tally(booking))
+    HotelBooking.objects.filter(pk__in=[booking.pk for booking in bookings]).update(
+        status=status, updated_at=timezone.now())
+    apply_tally(tally)
+    notify_each([(booking.tourist_id, message.format(booking=booking), booking) for booking in bookings])
+
+
+def due_to_complete(today=None):
+    return HotelBooking.objects.filter(status='confirmed', check_out__lt=today or timezone.localdate())
+
+
+def due_to_expire(hours=PENDING_BOOKING_HOURS):
+    return HotelBooking.objects.filter(status='pending', created_at__lt=timezone.now() - timedelta(hours=hours))
+
+
+def booking_rows(bookings):
+    # The hotel name comes along for the message; only the booking rows are locked
+    return bookings.select_related('hotel').only(*BOOKING_FIELDS)
+
+
+def complete_stays(today=None, chunk_size=CHUNK_SIZE, pause=0):
+    """Mark confirmed bookings completed once check-out has passed; returns how many completed"""
+    return advance_in_chunks(
+        booking_rows(due_to_complete(today)), ['check_out', 'id'],
+        lambda bookings: set_status(bookings, 'completed',
+                                    "Your stay at {booking.hotel.name} is complete. We'd love your review!"),
+        chunk_size, pause,
+    )
+
+
+def expire_bookings(bookings):
+    # Completed and confirmed bookings keep holding their rooms; expiry is the only release
+    release_stays([(booking.room_type_id, booking.check_in, booking.check_out, booking.number_of_rooms)
+                   for booking in bookings])
+    set_status(bookings, 'cancelled',
+               "Your booking at {booking.hotel.name} was cancelled because the hotel didn't confirm it in time.")
+
+
+def expire_pending_bookings(hours=PENDING_BOOKING_HOURS, chunk_size=CHUNK_SIZE, pause=0):
+    """Cancel bookings left pending for `hours` and give their rooms back; returns how many expired"""
+    return advance_in_chunks(booking_rows(due_to_expire(hours)), ['created_at', 'id'], expire_bookings,
+                             chunk_size, pause)
@@ -0,0 +1,43 @@
+from django.db.models import F
+
+from main.keyset import paginate
+
+# Sort key -> (label, keyset ordering); each ordering has a matching index on Hotel
+SORTS = {
+    'rating': ("Top rated", ['-average_rating', '-review_count', '-id']),
+    'price': ("Lowest price", ['min_price', 'id']),
+    'newest': ("Newest", ['-created_at', '-id']),
+    'reviews': ("Most reviewed", ['-review_count', '-id']),
+}
+# Only meaningful with a text search or a search center
+CONTEXT_SORTS = {
+    'relevance': ("Best match", ['relevance', 'id']),
+    'distance': ("Nearest", ['distance_km', 'id']),
+}
+
+
+def sort_choices(searching=False, near=False):
+    choices = [(key, label) for key, (label, _) in SORTS.items()]
+    if searching:
+        choices.insert(0, ('relevance', CONTEXT_SORTS['relevance'][0]))
+    if near:
+        choices.insert(0, ('distance', CONTEXT_SORTS['distance'][0]))
+    return choices
+
+
+def hotel_page(hotels, sort=None, cursor=None, per_page=12, searching=False, near=False):
+    """
+    One keyset page of a filtered Hotel queryset, shared by the HTML listing and the API.
+
+    `searching` means the queryset is joined to the full-text index and `near`
+    that it carries a distance_km annotation; each enables its sort, which is
+    also the default. Raises main.keyset.InvalidCursor for a bad cursor.
+    Returns (sort key used, page).
+    """
+    available = dict(sort_choices(searching, near))
+    if sort not in available:
+        sort = 'distance' if near else 'relevance' if searching else 'rating'
+    if sort == 'relevance':
+        hotels = hotels.annotate(relevance=F('search_index__rank'))
+    ordering = {**SORTS, **CONTEXT_SORTS}[sort][1]
+    return sort, paginate(hotels, ordering, cursor, per_page)
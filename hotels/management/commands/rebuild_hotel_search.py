@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hotels.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text hotel search index"
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError("Full-text hotel search needs SQLite with FTS5.")
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Hotel search index rebuilt."))
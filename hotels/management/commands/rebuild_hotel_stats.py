@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from hotels.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-hotel daily booking stats from hotel bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        days = rebuild_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {days} hotel-days."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from hotels.inventory import rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-night room inventory ledger from hotel bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        nights = rebuild_ledger(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {nights} room-nights."))
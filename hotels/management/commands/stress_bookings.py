@@ -0,0 +1,178 @@
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+
+class LockTimer:
+    """Execute wrapper that times statements which wait for a write lock"""
+
+    def __init__(self):
+        self.waits = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not (sql.startswith('BEGIN') or 'FOR UPDATE' in sql):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.waits.append(time.perf_counter() - started)
+
+
+def book_worker(database, room_type_id, tourist_id, check_in, check_out, attempts, start, results):
+    """Fire `attempts` one-room bookings at a room type in `database` once `start` is set"""
+    import django
+    django.setup()
+
+    from django.db import OperationalError, connection
+    # Set explicitly so spawned (not forked) workers never touch the configured database
+    connection.close()
+    connection.settings_dict['NAME'] = database
+    from hotels.inventory import RoomUnavailable, place_booking
+    from hotels.models import HotelBooking, RoomType
+
+    room_type = RoomType.objects.select_related('hotel').get(pk=room_type_id)
+    timer = LockTimer()
+    booked = rejected = errors = 0
+    latencies = []
+
+    start.wait()
+    with connection.execute_wrapper(timer):
+        for _ in range(attempts):
+            booking = HotelBooking(
+                tourist_id=tourist_id, hotel=room_type.hotel, room_type=room_type,
+                check_in=check_in, check_out=check_out, number_of_rooms=1, total_guests=1,
+                room_price=room_type.price_per_night, total_amount=room_type.price_per_night,
+                guest_name="Stress Test", guest_email="stress@example.com", guest_phone="0",
+            )
+            started = time.perf_counter()
+            try:
+                place_booking(booking)
+                booked += 1
+            except RoomUnavailable:
+                rejected += 1
+            except OperationalError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    results.put({
+        'booked': booked, 'rejected': rejected, 'errors': errors,
+        'latencies': latencies, 'lock_waits': timer.waits,
+    })
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = ("Fire concurrent bookings at one room type from many processes and check for overselling. "
+            "Runs in a throwaway copy of the schema unless --use-configured-db is given.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+        parser.add_argument('--attempts', type=int, default=2000, help="Total booking attempts")
+        parser.add_argument('--rooms', type=int, default=50, help="Rooms of the scratch room type")
+        parser.add_argument('--nights', type=int, default=2)
+        parser.add_argument('--use-configured-db', action='store_true',
+                            help="Book against the configured database (scratch rows are deleted afterwards)")
+
+    def handle(self, *args, **options):
+        if options['use_configured_db']:
+            return self.stress(connection.settings_dict['NAME'], options)
+        if connection.vendor != 'sqlite':
+            raise CommandError("A throwaway database is only made for SQLite; pass --use-configured-db.")
+        # A migrated database in its own directory, so its WAL files go with it; being
+        # throwaway, it always runs in WAL mode (opt-in for the configured database)
+        scratch = tempfile.mkdtemp(prefix='stress-bookings-')
+        connection.settings_dict['TEST'] = {**connection.settings_dict['TEST'],
+                                            'NAME': os.path.join(scratch, 'stress.sqlite3')}
+        connection.settings_dict['OPTIONS'] = {**connection.settings_dict['OPTIONS'],
+                                               'init_command': settings.SQLITE_WAL_PRAGMAS}
+        configured = connection.settings_dict['NAME']
+        database = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            return self.stress(database, options)
+        finally:
+            connection.creation.destroy_test_db(configured, verbosity=0)
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    def stress(self, database, options):
+        from accounts.models import User
+        from hotels.models import Hotel, HotelBooking, RoomNight, RoomType
+
+        workers, rooms = options['workers'], options['rooms']
+        suffix = uuid.uuid4().hex[:8]
+        manager = User.objects.create_user(f"stress-manager-{suffix}", role='hotel_manager')
+        tourist = User.objects.create_user(f"stress-tourist-{suffix}", role='tourist')
+        hotel = Hotel.objects.create(owner=manager, name=f"Stress Test Hotel {suffix}")
+        room_type = RoomType.objects.create(hotel=hotel, name="Stress Room", capacity=1,
+                                            price_per_night=100, available_rooms=rooms)
+        check_in = date.today() + timedelta(days=365)
+        check_out = check_in + timedelta(days=options['nights'])
+
+        # Forked children must not share the parent's database connection
+        connections.close_all()
+        ctx = multiprocessing.get_context()
+        start, results = ctx.Event(), ctx.Queue()
+        share, extra = divmod(options['attempts'], workers)
+        processes = [
+            ctx.Process(target=book_worker, args=(
+                database, room_type.pk, tourist.pk, check_in, check_out, share + (i < extra), start, results,
+            ))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        started = time.perf_counter()
+        start.set()
+        reports = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            process.join()
+
+        booked = sum(r['booked'] for r in reports)
+        rejected = sum(r['rejected'] for r in reports)
+        errors = sum(r['errors'] for r in reports)
+        latencies = [x for r in reports for x in r['latencies']]
+        lock_waits = [x for r in reports for x in r['lock_waits']]
+
+        stored = HotelBooking.objects.filter(room_type=room_type).count()
+        peak = max(RoomNight.objects.filter(room_type=room_type).values_list('booked', flat=True), default=0)
+
+        self.stdout.write(f"Workers: {workers}, attempts: {len(latencies)}, rooms: {rooms}")
+        self.stdout.write(f"Booked: {booked}, rejected: {rejected}, errors: {errors}")
+        self.stdout.write(f"Throughput: {len(latencies) / elapsed:.1f} attempts/s over {elapsed:.2f}s")
+        for label, values in (("Latency", latencies), ("Lock wait", lock_waits)):
+            self.stdout.write(
+                f"{label} ms: p50={percentile(values, 50) * 1000:.2f} "
+                f"p95={percentile(values, 95) * 1000:.2f} "
+                f"max={max(values, default=0) * 1000:.2f} "
+                f"mean={(statistics.fmean(values) if values else 0) * 1000:.2f}"
+            )
+
+        hotel.delete()
+        manager.delete()
+        tourist.delete()
+
+        if stored > rooms or peak > rooms or stored != booked or peak != booked:
+            raise CommandError(
+                f"Oversold: {stored} bookings stored, ledger peak {peak}, {booked} reported, {rooms} rooms."
+            )
+        if errors:
+            # Lock timeouts are failures too: those customers got an error page
+            raise CommandError(f"{errors} booking attempts failed with database errors (lock timeouts).")
+        self.stdout.write(self.style.SUCCESS("No oversell."))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:03
+
+from collections import Counter
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_room_nights(apps, schema_editor):
+    HotelBooking = apps.get_model('hotels', 'HotelBooking')
+    RoomNight = apps.get_model('hotels', 'RoomNight')
+    held = Counter()
+    bookings = HotelBooking.objects.filter(status__in=['pending', 'confirmed', 'completed'])
+    for room_type_id, check_in, check_out, rooms in bookings.values_list(
+            'room_type_id', 'check_in', 'check_out', 'number_of_rooms'):
+        for i in range((check_out - check_in).days):
+            held[room_type_id, check_in + timedelta(days=i)] += rooms
+    RoomNight.objects.bulk_create(
+        [RoomNight(room_type_id=room_type_id, date=night, booked=booked)
+         for (room_type_id, night), booked in held.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0005_alter_hotelreview_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='hotels.roomtype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room_type', 'date'), name='unique_room_night')],
+            },
+        ),
+        migrations.RunPython(backfill_room_nights, migrations.RunPython.noop),
+    ]
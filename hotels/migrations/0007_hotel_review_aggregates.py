@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_review_aggregates(apps, schema_editor):
+    Hotel = apps.get_model('hotels', 'Hotel')
+    totals = Hotel.objects.annotate(count=Count('reviews'), total=Sum('reviews__rating'))
+    for hotel in totals.filter(count__gt=0):
+        hotel.review_count = hotel.count
+        hotel.rating_sum = hotel.total
+        hotel.average_rating = round(hotel.total / hotel.count, 2)
+        hotel.save(update_fields=['review_count', 'rating_sum', 'average_rating'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0006_roomnight'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['-average_rating', '-review_count'], name='hotel_rating_idx'),
+        ),
+        migrations.RunPython(backfill_review_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COLUMNS = 'name, city, area, landmark, address, description'
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS hotels_hotel_fts USING fts5("
+        f"{COLUMNS}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    # Default ranking weights columns so a name hit outranks a description hit
+    schema_editor.execute(
+        "INSERT INTO hotels_hotel_fts(hotels_hotel_fts, rank) "
+        "VALUES ('rank', 'bm25(10.0, 5.0, 5.0, 3.0, 1.0, 0.5)')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO hotels_hotel_fts(rowid, {COLUMNS}) SELECT id, {COLUMNS} FROM hotels_hotel"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS hotels_hotel_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0007_hotel_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelSearchIndex',
+            fields=[
+                ('hotel', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='hotels.hotel')),
+                ('document', models.TextField(db_column='hotels_hotel_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'hotels_hotel_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:08
+
+from django.db import migrations, models
+from django.db.models import Case, IntegerField, Value, When
+
+AMENITY_BITS = {'wifi': 1, 'pool': 2, 'ac': 4, 'breakfast': 8, 'parking': 16, 'gym': 32}
+
+
+def backfill_amenities(apps, schema_editor):
+    Hotel = apps.get_model('hotels', 'Hotel')
+    mask = sum(
+        (Case(When(**{f'has_{name}': True}, then=Value(bit)), default=Value(0), output_field=IntegerField())
+         for name, bit in AMENITY_BITS.items()),
+        Value(0),
+    )
+    Hotel.objects.update(amenities=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0008_hotel_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='amenities',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_amenities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0010_geo_location'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='hotel',
+            name='hotel_rating_idx',
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['-average_rating', '-review_count', '-id'], name='hotel_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['min_price', 'id'], name='hotel_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['-created_at', '-id'], name='hotel_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['-review_count', '-id'], name='hotel_reviews_idx'),
+        ),
+    ]
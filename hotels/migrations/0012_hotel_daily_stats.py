@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:14
+
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_daily_stats(apps, schema_editor):
+    HotelBooking = apps.get_model('hotels', 'HotelBooking')
+    HotelDailyStats = apps.get_model('hotels', 'HotelDailyStats')
+    stats = defaultdict(Counter)
+    for hotel_id, created_at, status, check_in in HotelBooking.objects.values_list(
+            'hotel_id', 'created_at', 'status', 'check_in'):
+        day = timezone.localdate(created_at)
+        stats[hotel_id, day]['bookings'] += 1
+        stats[hotel_id, day][status] += 1
+        if status == 'confirmed':
+            stats[hotel_id, check_in]['checkins'] += 1
+    HotelDailyStats.objects.bulk_create(
+        [HotelDailyStats(hotel_id=hotel_id, date=day, **counts) for (hotel_id, day), counts in stats.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0011_listing_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('confirmed', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('checkins', models.PositiveIntegerField(default=0)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='hotels.hotel')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'date'), name='unique_hotel_day')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0013_notification_retention'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hotelbooking',
+            index=models.Index(fields=['status', 'check_out', 'id'], name='booking_status_checkout_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotelbooking',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='booking_status_created_idx'),
+        ),
+    ]
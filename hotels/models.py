@@ -1,6 +1,18 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from main.geo import cell_for
+
+
+# Bit for each amenity in Hotel.amenities, keyed by the HotelSearchForm amenity choice
+AMENITY_BITS = {
+    'wifi': 1 << 0,
+    'pool': 1 << 1,
+    'ac': 1 << 2,
+    'breakfast': 1 << 3,
+    'parking': 1 << 4,
+    'gym': 1 << 5,
+}
 
 
 class Hotel(models.Model):
@@ -19,9 +31,17 @@ class Hotel(models.Model):
     city = models.CharField(max_length=100, blank=True)
     area = models.CharField(max_length=100, blank=True)
     landmark = models.CharField(max_length=200, blank=True)
-
-    # Rating
+    latitude = models.FloatField(null=True, blank=True,
+                                 validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True,
+                                  validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    # Grid cell of (latitude, longitude) for proximity search, kept in sync by save()
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
+
+    # Rating, maintained from HotelReview rows by delta updates (see hotels.ratings)
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
 
     # Amenities for filtering
     has_wifi = models.BooleanField(default=False)
@@ -30,6 +50,8 @@ class Hotel(models.Model):
     has_breakfast = models.BooleanField(default=False)
     has_parking = models.BooleanField(default=False)
     has_gym = models.BooleanField(default=False)
+    # The has_* flags packed into one indexed column, kept in sync by save()
+    amenities = models.PositiveSmallIntegerField(default=0, editable=False, db_index=True)
 
     # Price range
     min_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
@@ -38,9 +60,35 @@ class Hotel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # One index per listing sort in hotels.listing.SORTS, ending in id for keyset paging
+        indexes = [
+            models.Index(fields=['-average_rating', '-review_count', '-id'], name='hotel_rating_idx'),
+            models.Index(fields=['min_price', 'id'], name='hotel_price_idx'),
+            models.Index(fields=['-created_at', '-id'], name='hotel_newest_idx'),
+            models.Index(fields=['-review_count', '-id'], name='hotel_reviews_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.amenities = self.amenity_mask()
+        self.geo_cell = cell_for(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if any(f'has_{name}' in update_fields for name in AMENITY_BITS):
+                update_fields.add('amenities')
+            if update_fields & {'latitude', 'longitude'}:
+                update_fields.add('geo_cell')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+    def amenity_mask(self):
+        """Pack the has_* amenity flags into a bitmask"""
+        return sum(bit for name, bit in AMENITY_BITS.items() if getattr(self, f'has_{name}'))
+
     def update_price_range(self):
         """Update min and max price based on room types"""
         room_prices = self.room_types.all().values_list('price_per_night', flat=True)
@@ -50,6 +98,23 @@ class Hotel(models.Model):
             self.save()
 
 
+class HotelSearchIndex(models.Model):
+    """
+    Read-only view of the SQLite FTS5 table over hotel text (see hotels.search).
+
+    `document` maps to the FTS table's hidden column of the same name, which is
+    what a MATCH query targets; `rank` is FTS5's built-in bm25 relevance.
+    """
+    hotel = models.OneToOneField(Hotel, on_delete=models.DO_NOTHING, primary_key=True,
+                                 db_column='rowid', related_name='search_index')
+    document = models.TextField(db_column='hotels_hotel_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'hotels_hotel_fts'
+
+
 class HotelImage(models.Model):
     hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='gallery_images')
     image = models.ImageField(upload_to='hotel_gallery/')
@@ -87,6 +152,8 @@ class HotelBooking(models.Model):
         ('cancelled', 'Cancelled'),
         ('completed', 'Completed'),
     ]
+    # Statuses that keep rooms out of inventory for the nights of the stay
+    HOLDING_STATUSES = ('pending', 'confirmed', 'completed')
 
     tourist = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='hotel_bookings')
     hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='bookings')
@@ -114,10 +181,55 @@ class HotelBooking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Stays due to complete and pending bookings due to expire, for hotels.lifecycle
+            models.Index(fields=['status', 'check_out', 'id'], name='booking_status_checkout_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='booking_status_created_idx'),
+        ]
+
     def __str__(self):
         return f"Booking #{self.id} - {self.hotel.name}"
 
 
+class RoomNight(models.Model):
+    """Rooms of one room type held on one night, derived from HotelBooking rows"""
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='nights')
+    date = models.DateField()
+    booked = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room_type', 'date'], name='unique_room_night'),
+        ]
+
+    def __str__(self):
+        return f"{self.room_type} on {self.date}: {self.booked} booked"
+
+
+class HotelDailyStats(models.Model):
+    """Booking counts for one hotel on one day, derived from HotelBooking rows"""
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+
+    # Bookings created on this date, and how many of those are in each status now
+    bookings = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    confirmed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    # Confirmed bookings checking in on this date
+    checkins = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'date'], name='unique_hotel_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.hotel} on {self.date}: {self.bookings} bookings"
+
+
 class HotelReview(models.Model):
     hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='reviews')
     tourist = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='hotel_reviews')
@@ -139,5 +251,35 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Inbox pages (main.notifications.INBOX_ORDERING) and the retention sweep
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_inbox_idx'),
+            models.Index(fields=['is_read', 'created_at'], name='notification_retention_idx'),
+        ]
+
+    def __str__(self):
+        return f"Notification for {self.user.username}"
+
+
+class PendingNotification(models.Model):
+    """A notification written with the change that caused it, until main.notifications fans it out"""
+    recipients = models.JSONField()  # user ids
+    message = models.TextField()
+    booking = models.ForeignKey(HotelBooking, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Pending notification for {len(self.recipients)} users"
+
+
+class ArchivedNotification(models.Model):
+    """A read notification moved out of Notification by the retention sweep"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_notifications')
+    message = models.TextField()
+    booking = models.ForeignKey(HotelBooking, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
     def __str__(self):
-        return f"Notification for {self.user.username}"
\ No newline at end of file
+        return f"Archived notification for {self.user.username}"
\ No newline at end of file
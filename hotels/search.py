@@ -0,0 +1,71 @@
+from django.db import connection
+from django.db.models import Lookup, Q, TextField
+
+FTS_TABLE = 'hotels_hotel_fts'
+FTS_COLUMNS = ('name', 'city', 'area', 'landmark', 'address', 'description')
+
+
+@TextField.register_lookup
+class FullTextMatch(Lookup):
+    lookup_name = 'fts'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def rebuild_index():
+    """Repopulate the FTS table from every Hotel row"""
+    columns = ', '.join(FTS_COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(f"INSERT INTO {FTS_TABLE}(rowid, {columns}) SELECT id, {columns} FROM hotels_hotel")
+
+
+def index_hotel(hotel):
+    """Replace a hotel's row in the FTS table"""
+    values = [getattr(hotel, column) or '' for column in FTS_COLUMNS]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [hotel.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)}) "
+            f"VALUES (%s, {', '.join(['%s'] * len(FTS_COLUMNS))})",
+            [hotel.pk, *values],
+        )
+
+
+def unindex_hotel(hotel_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [hotel_id])
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query: every word must match, the last as a prefix"""
+    words = [word.replace('"', '""') for word in text.split()]
+    if not words:
+        return ''
+    return ' '.join(f'"{word}"' for word in words[:-1]) + (' ' if len(words) > 1 else '') + f'"{words[-1]}"*'
+
+
+def search_hotels(hotels, text, fields=FTS_COLUMNS):
+    """
+    Filter a Hotel queryset to hotels matching `text`, best matches first.
+
+    Falls back to icontains over `fields` on databases without FTS5.
+    """
+    query = match_expression(text)
+    if not query:
+        return hotels
+    if not fts_available():
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': text})
+        return hotels.filter(condition)
+    return hotels.filter(search_index__document__fts=query).order_by(
+        'search_index__rank', *hotels.query.order_by
+    )
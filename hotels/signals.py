@@ -0,0 +1,128 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from main.notifications import adjust_unread, publish
+from main.ratings import track_review_ratings
+
+from .detail import invalidate_hotel_detail
+from .inventory import held_stay, hold_rooms, release_rooms
+from .models import Hotel, HotelBooking, HotelImage, HotelReview, Notification, RoomType
+from .search import FTS_COLUMNS, fts_available, index_hotel, unindex_hotel
+from .stats import apply_tally, booking_tally
+
+
+@receiver(pre_save, sender=HotelBooking)
+def remember_held_stay(sender, instance, raw=False, **kwargs):
+    instance._previous_stay = None
+    instance._previous_tally = Counter()
+    if raw or instance.pk is None:
+        return
+    previous = HotelBooking.objects.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._previous_stay = held_stay(previous)
+        instance._previous_tally = booking_tally(previous)
+
+
+@receiver(post_save, sender=HotelBooking)
+def sync_room_ledger(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous, current = getattr(instance, '_previous_stay', None), held_stay(instance)
+    if previous == current:
+        return
+    if previous:
+        release_rooms(*previous)
+    if current:
+        hold_rooms(*current)
+
+
+@receiver(post_delete, sender=HotelBooking)
+def release_deleted_stay(sender, instance, **kwargs):
+    stay = held_stay(instance)
+    if stay:
+        release_rooms(*stay)
+
+
+@receiver(post_save, sender=HotelBooking)
+def update_daily_stats(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    delta = booking_tally(instance)
+    delta.subtract(getattr(instance, '_previous_tally', Counter()))
+    apply_tally(delta)
+
+
+@receiver(post_delete, sender=HotelBooking)
+def remove_from_daily_stats(sender, instance, **kwargs):
+    apply_tally(Counter({key: -count for key, count in booking_tally(instance).items()}))
+
+
+track_review_ratings(HotelReview, Hotel, 'hotel_id')
+
+
+@receiver(post_save, sender=Hotel)
+def index_saved_hotel(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not fts_available():
+        return
+    if update_fields is not None and not set(update_fields) & set(FTS_COLUMNS):
+        return
+    index_hotel(instance)
+
+
+@receiver(post_delete, sender=Hotel)
+def unindex_deleted_hotel(sender, instance, **kwargs):
+    if fts_available():
+        unindex_hotel(instance.pk)
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def drop_cached_hotel_detail(sender, instance, **kwargs):
+    invalidate_hotel_detail(instance.pk)
+
+
+@receiver(post_save, sender=RoomType)
+@receiver(post_delete, sender=RoomType)
+@receiver(post_save, sender=HotelImage)
+@receiver(post_delete, sender=HotelImage)
+@receiver(post_save, sender=HotelReview)
+@receiver(post_delete, sender=HotelReview)
+def drop_cached_parent_detail(sender, instance, **kwargs):
+    invalidate_hotel_detail(instance.hotel_id)
+    previous = getattr(instance, '_previous_rating', None)
+    if previous and previous[0] != instance.hotel_id:
+        invalidate_hotel_detail(previous[0])
+
+
+# Single-row notification changes; bulk inserts and mark-all-read adjust the counter themselves
+@receiver(pre_save, sender=Notification)
+def remember_unread_owner(sender, instance, raw=False, **kwargs):
+    instance._previous_unread = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_unread = Notification.objects.filter(pk=instance.pk, is_read=False).values_list(
+        'user_id', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Notification)
+def count_unread_notification(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        transaction.on_commit(lambda: publish([instance]))
+    delta = Counter()
+    if getattr(instance, '_previous_unread', None) is not None:
+        delta[instance._previous_unread] -= 1
+    if not instance.is_read:
+        delta[instance.user_id] += 1
+    adjust_unread(delta)
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread({instance.user_id: -1})
@@ -0,0 +1,90 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from .models import HotelBooking, HotelDailyStats
+
+STATUS_FIELDS = [status for status, _ in HotelBooking.BOOKING_STATUS]
+DASHBOARD_FIELDS = ['total_bookings', 'pending_bookings', 'confirmed_bookings', 'today_checkins',
+                    'recent_bookings_count']
+RECENT_DAYS = 7
+
+
+def booking_tally(booking):
+    """The (hotel, date, field) counters one booking contributes to"""
+    created = timezone.localdate(booking.created_at)
+    tally = Counter({
+        (booking.hotel_id, created, 'bookings'): 1,
+        (booking.hotel_id, created, booking.status): 1,
+    })
+    if booking.status == 'confirmed':
+        tally[booking.hotel_id, booking.check_in, 'checkins'] += 1
+    return tally
+
+
+def apply_tally(delta):
+    """Add a Counter of (hotel, date, field) deltas to the daily stats, one UPDATE per day touched"""
+    days = defaultdict(dict)
+    for (hotel_id, day, field), change in delta.items():
+        if change:
+            days[hotel_id, day][field] = change
+    if not days:
+        return
+    # Only increments create rows, so removing a deleted hotel's bookings never recreates its stats
+    with transaction.atomic():
+        HotelDailyStats.objects.bulk_create(
+            [HotelDailyStats(hotel_id=hotel_id, date=day)
+             for (hotel_id, day), changes in days.items() if any(change > 0 for change in changes.values())],
+            ignore_conflicts=True,
+        )
+        for (hotel_id, day), changes in days.items():
+            HotelDailyStats.objects.filter(hotel_id=hotel_id, date=day).update(**{
+                field: Greatest(F(field) + change, Value(0)) for field, change in changes.items()
+            })
+
+
+def dashboard_stats(hotels):
+    """
+    Dashboard counters for a Hotel queryset: (totals, {hotel id: counters}).
+
+    Reads the daily stats rows of those hotels in a single grouped query.
+    """
+    today = timezone.localdate()
+    rows = HotelDailyStats.objects.filter(hotel__in=hotels).values('hotel_id').annotate(
+        total_bookings=Sum('bookings'),
+        pending_bookings=Sum('pending'),
+        confirmed_bookings=Sum('confirmed'),
+        today_checkins=Sum('checkins', filter=Q(date=today)),
+        recent_bookings_count=Sum('bookings', filter=Q(date__gt=today - timedelta(days=RECENT_DAYS))),
+    )
+    per_hotel = {row.pop('hotel_id'): {field: row[field] or 0 for field in DASHBOARD_FIELDS} for row in rows}
+    totals = {field: sum(stats[field] for stats in per_hotel.values()) for field in DASHBOARD_FIELDS}
+    return totals, per_hotel
+
+
+def rebuild_stats(batch_size=2000):
+    """Recompute every HotelDailyStats row from HotelBooking with two conditional aggregations"""
+    stats = defaultdict(Counter)
+    created = HotelBooking.objects.annotate(day=TruncDate('created_at')).values('hotel_id', 'day').annotate(
+        bookings=Count('pk'),
+        **{status: Count('pk', filter=Q(status=status)) for status in STATUS_FIELDS},
+    ).order_by()
+    for row in created:
+        stats[row.pop('hotel_id'), row.pop('day')].update(row)
+    checkins = HotelBooking.objects.filter(status='confirmed').values('hotel_id', 'check_in').annotate(
+        checkins=Count('pk'),
+    ).order_by()
+    for row in checkins:
+        stats[row['hotel_id'], row['check_in']]['checkins'] += row['checkins']
+
+    with transaction.atomic():
+        HotelDailyStats.objects.all().delete()
+        HotelDailyStats.objects.bulk_create(
+            (HotelDailyStats(hotel_id=hotel_id, date=day, **counts) for (hotel_id, day), counts in stats.items()),
+            batch_size=batch_size,
+        )
+    return len(stats)
@@ -0,0 +1,57 @@
+import threading
+from datetime import date, timedelta
+
+import pytest
+from django.db import OperationalError, connection
+
+from accounts.models import User
+from hotels.inventory import RoomUnavailable, place_booking
+from hotels.models import Hotel, HotelBooking, RoomNight, RoomType
+
+ROOMS = 5
+THREADS = 8
+ATTEMPTS = 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_bookings_never_oversell():
+    manager = User.objects.create_user(username='manager', password='x', role='hotel_manager')
+    tourist = User.objects.create_user(username='tourist', password='x', role='tourist')
+    hotel = Hotel.objects.create(owner=manager, name='Busy Hotel')
+    room_type = RoomType.objects.create(hotel=hotel, name='Double', capacity=2, price_per_night=100,
+                                        available_rooms=ROOMS)
+    check_in = date.today() + timedelta(days=30)
+    outcomes = []
+    start = threading.Barrier(THREADS)
+
+    def book():
+        start.wait()
+        try:
+            for _ in range(ATTEMPTS):
+                booking = HotelBooking(
+                    tourist=tourist, hotel=hotel, room_type=room_type, check_in=check_in,
+                    check_out=check_in + timedelta(days=2), number_of_rooms=1, total_guests=1,
+                    room_price=100, total_amount=200, guest_name='Guest', guest_email='guest@example.com',
+                    guest_phone='0',
+                )
+                try:
+                    place_booking(booking)
+                    outcomes.append('booked')
+                except RoomUnavailable:
+                    outcomes.append('rejected')
+                except OperationalError:
+                    outcomes.append('error')
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=book) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count('error') == 0
+    assert outcomes.count('booked') == ROOMS
+    assert outcomes.count('rejected') == THREADS * ATTEMPTS - ROOMS
+    assert HotelBooking.objects.filter(room_type=room_type).count() == ROOMS
+    assert set(RoomNight.objects.filter(room_type=room_type).values_list('booked', flat=True)) == {ROOMS}
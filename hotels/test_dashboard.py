@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from hotels.models import Hotel, HotelBooking, HotelDailyStats, RoomType
+from hotels.stats import DASHBOARD_FIELDS, rebuild_stats
+
+
+@pytest.fixture
+def manager_client(db):
+    manager = User.objects.create_user(username='manager', password='x', role='hotel_manager')
+    hotel = Hotel.objects.create(owner=manager, name='Sea View')
+    room_type = RoomType.objects.create(hotel=hotel, name='Double', capacity=2, price_per_night=100,
+                                        available_rooms=10)
+    client = Client()
+    client.force_login(manager)
+    return client, room_type
+
+
+def book(room_type, check_in):
+    tourist = User.objects.create_user(username=f'tourist{HotelBooking.objects.count()}', password='x',
+                                       role='tourist')
+    return HotelBooking.objects.create(
+        tourist=tourist, hotel=room_type.hotel, room_type=room_type, check_in=check_in,
+        check_out=check_in + timedelta(days=1), number_of_rooms=1, total_guests=1, room_price=100,
+        total_amount=100, guest_name='Guest', guest_email='guest@example.com', guest_phone='0',
+    )
+
+
+def daily_stats():
+    # Counters that drop back to zero leave their row behind; a rebuild doesn't make them
+    counts = HotelDailyStats.objects.order_by('hotel', 'date').values_list(
+        'hotel', 'date', 'bookings', 'pending', 'confirmed', 'cancelled', 'completed', 'checkins')
+    return [row for row in counts if any(row[2:])]
+
+
+def counters(client):
+    """The dashboard's totals, checked against its per-hotel counters and a rebuild from the bookings"""
+    context = client.get(reverse('hotel_dashboard')).context
+    totals = {field: context[field] for field in DASHBOARD_FIELDS}
+    assert context['hotels'][0].stats == totals
+    stats = daily_stats()
+    rebuild_stats()
+    assert stats == daily_stats()
+    return tuple(totals.values())
+
+
+def set_status(booking, status):
+    booking.status = status
+    booking.save()
+
+
+def test_dashboard_counters_follow_bookings(manager_client):
+    client, room_type = manager_client
+    today = timezone.localdate()
+    # (total, pending, confirmed, today's check-ins, recent)
+    assert counters(client) == (0, 0, 0, 0, 0)
+
+    arriving, later, extra = book(room_type, today), book(room_type, today + timedelta(days=3)), book(room_type, today)
+    assert counters(client) == (3, 3, 0, 0, 3)
+
+    set_status(arriving, 'confirmed')
+    set_status(later, 'confirmed')
+    assert counters(client) == (3, 1, 2, 1, 3)
+
+    set_status(extra, 'cancelled')
+    assert counters(client) == (3, 0, 2, 1, 3)
+
+    set_status(later, 'completed')
+    assert counters(client) == (3, 0, 1, 1, 3)
+
+    arriving.delete()
+    extra.delete()
+    assert counters(client) == (1, 0, 0, 0, 1)
+
+    # Bookings made more than a week ago count in the total but not as recent
+    HotelBooking.objects.filter(pk=later.pk).update(created_at=timezone.now() - timedelta(days=10))
+    rebuild_stats()
+    assert counters(client) == (1, 0, 0, 0, 0)
@@ -0,0 +1,63 @@
+import pytest
+
+from accounts.models import User
+from hotels.detail import cache_key
+from hotels.models import Hotel, HotelImage, HotelReview, RoomType
+from main.cache import FIRST_VERSION, bump_version, versioned_key
+
+
+@pytest.fixture
+def hotel(db):
+    manager = User.objects.create_user(username='manager', password='x', role='hotel_manager')
+    return Hotel.objects.create(owner=manager, name='Sea View')
+
+
+def detail_key(hotel):
+    return versioned_key(cache_key(hotel.pk))
+
+
+def test_first_bump_moves_off_the_unbumped_version(db):
+    assert versioned_key('fresh') == f'fresh:v{FIRST_VERSION}'
+    bump_version('fresh')
+    assert versioned_key('fresh') == f'fresh:v{FIRST_VERSION + 1}'
+
+
+def test_detail_key_changes_with_every_row_on_the_page(hotel):
+    tourist = User.objects.create_user(username='tourist', password='x', role='tourist')
+    seen = [detail_key(hotel)]
+
+    def assert_new_key():
+        key = detail_key(hotel)
+        assert key not in seen
+        seen.append(key)
+
+    hotel.name = 'Sea View Resort'
+    hotel.save()
+    assert_new_key()
+    room_type = RoomType.objects.create(hotel=hotel, name='Double', capacity=2, price_per_night=100,
+                                        available_rooms=2)
+    assert_new_key()
+    image = HotelImage.objects.create(hotel=hotel, image='hotel_gallery/front.jpg')
+    assert_new_key()
+    review = HotelReview.objects.create(hotel=hotel, tourist=tourist, rating=4)
+    assert_new_key()
+    for row in (review, image, room_type):
+        row.delete()
+        assert_new_key()
+
+
+def test_moving_a_review_changes_both_hotels_keys(hotel):
+    other = Hotel.objects.create(owner=hotel.owner, name='Hill Top')
+    tourist = User.objects.create_user(username='tourist', password='x', role='tourist')
+    review = HotelReview.objects.create(hotel=hotel, tourist=tourist, rating=4)
+    before = detail_key(hotel), detail_key(other)
+
+    review.hotel = other
+    review.save()
+
+    assert detail_key(hotel) != before[0]
+    assert detail_key(other) != before[1]
+
+    key = detail_key(other)
+    other.delete()
+    assert detail_key(other) != key
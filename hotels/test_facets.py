@@ -0,0 +1,61 @@
+import pytest
+from django.urls import reverse
+
+from accounts.models import User
+from hotels.facets import amenity_masks, facet_counts, filter_amenities
+from hotels.models import AMENITY_BITS, Hotel
+
+
+@pytest.fixture
+def hotels(db):
+    owner = User.objects.create_user(username='manager', password='x', role='hotel_manager')
+    return [
+        Hotel.objects.create(owner=owner, name='Sea View', city='Cox\'s Bazar', has_wifi=True, has_pool=True,
+                             average_rating=4.6),
+        Hotel.objects.create(owner=owner, name='Hill Top', city='Sylhet', has_wifi=True, average_rating=4.1),
+        Hotel.objects.create(owner=owner, name='Tea Garden', city='Sylhet', has_gym=True, average_rating=3.2),
+    ]
+
+
+def test_a_facet_ignores_its_own_selection(hotels):
+    facets = facet_counts(Hotel.objects.all(), {
+        'amenities': lambda hotels: filter_amenities(hotels, ['pool']),
+        'ratings': lambda hotels: hotels.filter(average_rating__gte=4.0),
+    })
+    # Other amenities are counted among 4.0+ hotels, not among pool hotels
+    assert facets['amenities'] == {'wifi': 2, 'pool': 1}
+    # Ratings are counted among pool hotels, whatever rating was picked
+    assert [count for _, _, count in facets['ratings']] == [1, 1, 1, 1]
+    # Unselected facets count the hotels every selection leaves
+    assert facets['cities'] == [("Cox's Bazar", 1)]
+
+
+def test_hotel_list_counts_alternatives_to_the_picked_amenity(client, hotels):
+    response = client.get(reverse('hotels_info'), {'amenities': ['gym']})
+    assert [hotel.name for hotel in response.context['page']] == ['Tea Garden']
+    counts = {value: count for value, _, count in response.context['amenity_counts']}
+    assert counts == {'wifi': 2, 'pool': 1, 'ac': 0, 'breakfast': 0, 'parking': 0, 'gym': 1}
+    assert response.context['facets']['cities'] == [('Sylhet', 1)]
+
+
+def test_amenity_mask_follows_the_flags(hotels):
+    sea_view, hill_top, _ = hotels
+    assert Hotel.objects.get(pk=sea_view.pk).amenities == AMENITY_BITS['wifi'] | AMENITY_BITS['pool']
+
+    hill_top.has_wifi, hill_top.has_gym = False, True
+    hill_top.save(update_fields=['has_wifi', 'has_gym'])
+    assert Hotel.objects.get(pk=hill_top.pk).amenities == AMENITY_BITS['gym']
+
+
+def test_any_or_all_of_the_picked_amenities(hotels):
+    def matching(names, match):
+        return sorted(hotel.name for hotel in filter_amenities(Hotel.objects.all(), names, match))
+
+    assert matching(['wifi', 'gym'], 'any') == ['Hill Top', 'Sea View', 'Tea Garden']
+    assert matching(['wifi', 'pool'], 'all') == ['Sea View']
+    assert matching(['wifi', 'gym'], 'all') == []
+    # Unknown names are ignored, and nothing known picked means no filter
+    assert matching(['sauna', 'pool'], 'any') == ['Sea View']
+    assert matching(['sauna'], 'all') == ['Hill Top', 'Sea View', 'Tea Garden']
+    assert len(amenity_masks(AMENITY_BITS['wifi'], 'any')) == 32
+    assert len(amenity_masks(AMENITY_BITS['wifi'] | AMENITY_BITS['pool'], 'all')) == 16
@@ -0,0 +1,136 @@
+from datetime import date, timedelta
+
+import pytest
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import User
+from hotels.inventory import RoomUnavailable, hold_rooms, rebuild_ledger, release_rooms
+from hotels.models import Hotel, HotelBooking, RoomNight, RoomType
+
+CHECK_IN = date(2030, 3, 1)
+
+
+@pytest.fixture
+def room_type(db):
+    manager = User.objects.create_user(username='manager', password='x', role='hotel_manager')
+    hotel = Hotel.objects.create(owner=manager, name='Sea View')
+    return RoomType.objects.create(hotel=hotel, name='Double', capacity=2, price_per_night=100, available_rooms=2)
+
+
+@pytest.fixture
+def tourist(db):
+    return User.objects.create_user(username='tourist', password='x', role='tourist')
+
+
+def nights(room_type):
+    return dict(RoomNight.objects.filter(room_type=room_type).exclude(booked=0).values_list('date', 'booked'))
+
+
+def day(offset):
+    return CHECK_IN + timedelta(days=offset)
+
+
+def book(room_type, tourist, check_in=CHECK_IN, nights=2, rooms=1, status='pending'):
+    return HotelBooking.objects.create(
+        tourist=tourist, hotel=room_type.hotel, room_type=room_type, check_in=check_in,
+        check_out=check_in + timedelta(days=nights), number_of_rooms=rooms, total_guests=1, room_price=100,
+        total_amount=100 * nights * rooms, status=status, guest_name='Guest', guest_email='guest@example.com',
+        guest_phone='0',
+    )
+
+
+def test_last_free_room_can_be_held_once(room_type):
+    hold_rooms(room_type.pk, day(0), day(1), 1)
+    hold_rooms(room_type.pk, day(0), day(1), 1)
+    with pytest.raises(RoomUnavailable):
+        hold_rooms(room_type.pk, day(0), day(1), 1)
+    assert nights(room_type) == {day(0): 2}
+
+
+def test_stay_that_does_not_fit_every_night_holds_nothing(room_type):
+    hold_rooms(room_type.pk, day(1), day(2), 2)
+    with pytest.raises(RoomUnavailable):
+        hold_rooms(room_type.pk, day(0), day(3), 1)
+    assert nights(room_type) == {day(1): 2}
+
+
+def test_release_never_goes_below_zero(room_type):
+    hold_rooms(room_type.pk, day(0), day(2), 1)
+    release_rooms(room_type.pk, day(0), day(2), 2)
+    assert nights(room_type) == {}
+
+
+def test_cancelling_a_booking_releases_its_nights(room_type, tourist):
+    booking = book(room_type, tourist)
+    assert nights(room_type) == {day(0): 1, day(1): 1}
+    booking.status = 'cancelled'
+    booking.save()
+    assert nights(room_type) == {}
+
+
+def test_moving_a_booking_moves_its_nights(room_type, tourist):
+    booking = book(room_type, tourist, rooms=2, status='confirmed')
+    booking.check_in, booking.check_out = day(1), day(3)
+    booking.save()
+    assert nights(room_type) == {day(1): 2, day(2): 2}
+
+
+def test_booking_that_no_longer_fits_keeps_its_old_nights(room_type, tourist):
+    booking = book(room_type, tourist)
+    book(room_type, tourist, check_in=day(5), nights=1, rooms=2)
+    booking.check_in, booking.check_out = day(4), day(6)
+    # Views save bookings in a transaction, so the failed hold rolls back the release too
+    with pytest.raises(RoomUnavailable), transaction.atomic():
+        booking.save()
+    assert nights(room_type) == {day(0): 1, day(1): 1, day(5): 2}
+
+
+def test_deleting_a_booking_releases_its_nights(room_type, tourist):
+    book(room_type, tourist).delete()
+    assert nights(room_type) == {}
+
+
+def test_rebuild_matches_incremental_ledger(room_type, tourist):
+    book(room_type, tourist, nights=3)
+    book(room_type, tourist, check_in=day(1), rooms=1, status='confirmed')
+    moved = book(room_type, tourist, check_in=day(6))
+    moved.check_in, moved.check_out = day(7), day(9)
+    moved.save()
+    cancelled = book(room_type, tourist, check_in=day(10))
+    cancelled.status = 'cancelled'
+    cancelled.save()
+    incremental = nights(room_type)
+
+    rebuild_ledger()
+
+    assert nights(room_type) == incremental
+    assert incremental == {day(0): 1, day(1): 2, day(2): 2, day(7): 1, day(8): 1}
+
+
+def test_admin_rejects_a_change_that_does_not_fit(room_type, tourist):
+    admin = User.objects.create_superuser(username='admin', password='x', email='admin@example.com')
+    client = Client()
+    client.force_login(admin)
+    waiting = book(room_type, tourist, rooms=2, status='cancelled')
+    staying = book(room_type, tourist, check_in=day(1), nights=1)
+
+    def change(booking, **fields):
+        data = {
+            'tourist': tourist.pk, 'hotel': room_type.hotel.pk, 'room_type': room_type.pk,
+            'check_in': booking.check_in, 'check_out': booking.check_out, 'number_of_rooms': booking.number_of_rooms,
+            'total_guests': 1, 'room_price': '100', 'total_amount': '100', 'status': booking.status,
+            'guest_name': 'Guest', 'guest_email': 'guest@example.com', 'guest_phone': '0', 'special_requests': '',
+        }
+        return client.post(reverse('admin:hotels_hotelbooking_change', args=[booking.pk]), {**data, **fields})
+
+    response = change(waiting, status='confirmed')
+    assert response.status_code == 200
+    assert response.context['adminform'].form.non_field_errors() == [
+        f"Not enough Double rooms left for {day(0)} to {day(2)}."]
+    assert nights(room_type) == {day(1): 1}
+
+    # The booking's own hold is given back before the check
+    assert change(staying, number_of_rooms=2).status_code == 302
+    assert nights(room_type) == {day(1): 2}
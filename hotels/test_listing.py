@@ -0,0 +1,75 @@
+import base64
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from hotels.models import Hotel
+from main.keyset import encode_cursor
+
+# (name, rating, reviews, lowest price); ties on each sort column fall back to id
+HOTELS = [
+    ('Sea View', 4.5, 10, 3000), ('Hill Top', 4.5, 10, 1500), ('Tea Garden', 4.8, 2, 3000),
+    ('Lake Side', 3.9, 40, 800), ('River Inn', 4.5, 12, 1500),
+]
+
+
+@pytest.fixture
+def hotels(db):
+    owner = User.objects.create_user(username='manager', password='x', role='hotel_manager')
+    created = [Hotel.objects.create(owner=owner, name=name, average_rating=rating, review_count=reviews,
+                                    min_price=price)
+               for name, rating, reviews, price in HOTELS]
+    # Newest first is the reverse of creation, whatever the clock's resolution
+    for age, hotel in enumerate(created):
+        Hotel.objects.filter(pk=hotel.pk).update(created_at=timezone.now() - timedelta(days=len(created) - age))
+    return created
+
+
+def api(client, **params):
+    response = client.get(reverse('hotel_search_api'), params)
+    return response.status_code, response.json()
+
+
+def walk(client, sort):
+    """Every hotel name, following next_cursor two at a time"""
+    names, cursor = [], ''
+    while True:
+        _, data = api(client, sort=sort, limit='2', cursor=cursor)
+        names += [hotel['name'] for hotel in data['hotels']]
+        cursor = data['next_cursor']
+        if not cursor:
+            return names
+
+
+@pytest.mark.parametrize('sort, expected', [
+    ('rating', ['Tea Garden', 'River Inn', 'Hill Top', 'Sea View', 'Lake Side']),
+    ('price', ['Lake Side', 'Hill Top', 'River Inn', 'Sea View', 'Tea Garden']),
+    ('newest', ['River Inn', 'Lake Side', 'Tea Garden', 'Hill Top', 'Sea View']),
+])
+def test_pages_follow_the_sort_without_gaps_or_repeats(client, hotels, sort, expected):
+    assert walk(client, sort) == expected
+
+
+def test_a_hotel_added_while_paging_does_not_shift_later_pages(client, hotels):
+    _, first = api(client, sort='price', limit='2')
+    Hotel.objects.create(owner=hotels[0].owner, name='Budget Stay', min_price=500)
+    _, second = api(client, sort='price', limit='2', cursor=first['next_cursor'])
+    assert [hotel['name'] for hotel in first['hotels'] + second['hotels']] == [
+        'Lake Side', 'Hill Top', 'River Inn', 'Sea View']
+
+
+def test_a_tampered_cursor_is_rejected_by_the_api_and_restarts_the_listing(client, hotels):
+    _, page = api(client, sort='price', limit='2')
+    not_a_list = base64.urlsafe_b64encode(b'{"min_price": 1}').decode()
+    for cursor in ('not-a-cursor', page['next_cursor'][:-3], encode_cursor(['cheap', 'x']), not_a_list):
+        assert api(client, sort='price', cursor=cursor) == (400, {'error': 'Invalid cursor.'})
+    # A price cursor doesn't fit the rating sort's three columns
+    assert api(client, sort='rating', cursor=page['next_cursor'])[0] == 400
+
+    response = client.get(reverse('hotels_info'), {'sort': 'price', 'cursor': 'not-a-cursor'})
+    assert response.context['is_first_page']
+    assert [hotel.name for hotel in response.context['page']][:2] == ['Lake Side', 'Hill Top']
+    assert response.context['first_page_query'] == 'sort=price'
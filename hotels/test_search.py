@@ -0,0 +1,58 @@
+import pytest
+from django.urls import reverse
+
+from accounts.models import User
+from hotels.models import Hotel
+from hotels.search import rebuild_index, search_hotels
+
+
+@pytest.fixture
+def hotels(db):
+    manager = User.objects.create_user(username='manager', password='x', role='hotel_manager')
+
+    def hotel(name, city, **fields):
+        return Hotel.objects.create(owner=manager, name=name, city=city, **fields)
+
+    return {
+        'pearl': hotel('Sea Pearl', "Cox's Bazar", area='Kolatoli', description='Rooms over the sea, sea views'),
+        'inn': hotel('Bazar Inn', 'Dhaka', area='Gulshan'),
+        'tea': hotel('Tea Garden Resort', 'Sylhet', landmark='Near the sea of tea gardens'),
+    }
+
+
+def names(hotels):
+    return [hotel.name for hotel in hotels]
+
+
+def test_every_word_matches_and_the_last_as_a_prefix(hotels):
+    assert names(search_hotels(Hotel.objects.all(), 'cox baz')) == ['Sea Pearl']
+    assert sorted(names(search_hotels(Hotel.objects.all(), 'baza'))) == ['Bazar Inn', 'Sea Pearl']
+    assert names(search_hotels(Hotel.objects.all(), 'gul bazar')) == []
+    # Quotes and FTS syntax in the text are searched for, not parsed
+    assert names(search_hotels(Hotel.objects.all(), 'sea "pearl')) == ['Sea Pearl']
+    assert names(search_hotels(Hotel.objects.all(), 'tea OR')) == []
+    assert search_hotels(Hotel.objects.all(), '   ').count() == 3
+
+
+def test_best_matches_come_first(hotels):
+    assert names(search_hotels(Hotel.objects.all(), 'sea')) == ['Sea Pearl', 'Tea Garden Resort']
+    assert names(search_hotels(Hotel.objects.filter(city='Sylhet'), 'sea')) == ['Tea Garden Resort']
+
+
+def test_index_follows_hotel_changes(hotels):
+    pearl = hotels['pearl']
+    pearl.name = 'Ocean Pearl'
+    pearl.save()
+    hotels['inn'].delete()
+
+    assert names(search_hotels(Hotel.objects.all(), 'ocean')) == ['Ocean Pearl']
+    assert names(search_hotels(Hotel.objects.all(), 'sea pearl')) == ['Ocean Pearl']
+    assert names(search_hotels(Hotel.objects.all(), 'bazar')) == ['Ocean Pearl']
+    rebuild_index()
+    assert names(search_hotels(Hotel.objects.all(), 'bazar')) == ['Ocean Pearl']
+
+
+def test_search_api_ranks_location_matches(client, hotels):
+    data = client.get(reverse('hotel_search_api'), {'location': 'bazar'}).json()
+    assert data['sort'] == 'relevance'
+    assert [hotel['name'] for hotel in data['hotels']] == ['Bazar Inn', 'Sea Pearl']
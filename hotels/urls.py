@@ -39,7 +39,10 @@ urlpatterns = [
     path("notifications/", h_views.my_notifications, name="my_notifications"),
     path("notifications/<int:notification_id>/read/", h_views.mark_notification_read, name="mark_notification_read"),
     path("notifications/mark-all-read/", h_views.mark_hotel_notifications_read, name="mark_hotel_notifications_read"),
+    path("notifications/stream/", h_views.notification_stream, name="notification_stream"),
+    path("notifications/poll/", h_views.notification_poll, name="notification_poll"),
 
     # API
     path("api/search/", h_views.hotel_search_api, name="hotel_search_api"),
+    path("api/nearby/", h_views.hotel_nearby_api, name="hotel_nearby_api"),
 ]
\ No newline at end of file
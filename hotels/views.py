@@ -1,42 +1,44 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponseForbidden, JsonResponse
-from django.db.models import Q, Avg, Count
-from django.utils import timezone
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.db import transaction
+from django.utils.dateparse import parse_date
 from django.views.decorators.http import require_http_methods
 from .models import Hotel, RoomType, HotelBooking, HotelReview, Notification, HotelImage
 from .forms import HotelForm, RoomTypeForm, HotelBookingForm, HotelSearchForm, HotelReviewForm, HotelImageForm
+from .inventory import available_hotels, free_rooms, place_booking, RoomUnavailable
+from .search import fts_available, search_hotels
+from .listing import hotel_page, sort_choices
+from .detail import hotel_detail_data
+from .stats import DASHBOARD_FIELDS, dashboard_stats
+from .facets import facet_counts, filter_amenities, narrow
+from main.geo import nearest, within_radius
+from main.keyset import InvalidCursor, request_page
+from main.notifications import inbox_page, mark_all_read, notify
+from main.streams import LONG_POLL_SECONDS, parse_after, streaming, wait_for_events
+from destinations.models import Destination
 from accounts.utils import role_required
-from datetime import datetime, timedelta
 
 
 @login_required
 @role_required(['hotel_manager'])
 def hotel_dashboard(request):
-    hotels = Hotel.objects.filter(owner=request.user)
+    hotels = list(Hotel.objects.filter(owner=request.user))
 
     # Get bookings for all hotels owned by this user
-    bookings = HotelBooking.objects.filter(hotel__owner=request.user).select_related('tourist', 'room_type').order_by(
-        '-created_at')
+    bookings = HotelBooking.objects.filter(hotel__owner=request.user).select_related(
+        'tourist', 'hotel', 'room_type').order_by('-created_at')
 
-    # Statistics
-    total_bookings = bookings.count()
-    pending_bookings = bookings.filter(status='pending').count()
-    confirmed_bookings = bookings.filter(status='confirmed').count()
-    today_checkins = bookings.filter(check_in=timezone.now().date(), status='confirmed').count()
-
-    # Recent bookings (last 7 days)
-    recent_bookings = bookings.filter(created_at__gte=timezone.now() - timedelta(days=7))
+    # Statistics, summed from the daily stats rows of each hotel
+    totals, per_hotel = dashboard_stats(Hotel.objects.filter(owner=request.user))
+    for hotel in hotels:
+        hotel.stats = per_hotel.get(hotel.pk, dict.fromkeys(DASHBOARD_FIELDS, 0))
 
     context = {
         'hotels': hotels,
         'bookings': bookings[:10],  # Last 10 bookings
-        'total_bookings': total_bookings,
-        'pending_bookings': pending_bookings,
-        'confirmed_bookings': confirmed_bookings,
-        'today_checkins': today_checkins,
-        'recent_bookings_count': recent_bookings.count(),
+        **totals,
     }
     return render(request, "hotels/hotel_dashboard.html", context)
 
@@ -203,14 +205,15 @@ def update_booking_status(request, booking_id, status):
 
     if status in ['confirmed', 'cancelled', 'completed']:
         booking.status = status
-        booking.save()
+        try:
+            with transaction.atomic():
+                booking.save()
+        except RoomUnavailable:
+            messages.error(request, "Those rooms are no longer available for the booked dates.")
+            return redirect('hotel_dashboard')
 
         # Create notification for tourist
-        Notification.objects.create(
-            user=booking.tourist,
-            message=f"Your booking at {booking.hotel.name} has been {status}.",
-            booking=booking
-        )
+        notify(booking.tourist_id, f"Your booking at {booking.hotel.name} has been {status}.", booking=booking)
 
         messages.success(request, f"Booking {status} successfully!")
 
@@ -220,10 +223,10 @@ def update_booking_status(request, booking_id, status):
 # Public views
 def hotels_info(request):
     form = HotelSearchForm(request.GET or None)
-    hotels = Hotel.objects.all().annotate(
-        avg_rating=Avg('reviews__rating'),
-        review_count=Count('reviews')
-    )
+    hotels = Hotel.objects.all()
+    # Filters the facets count by, applied last so each facet can leave its own out
+    selections = {}
+    searching = near = False
 
     if form.is_valid():
         location = form.cleaned_data.get('location')
@@ -231,72 +234,83 @@ def hotels_info(request):
         min_price = form.cleaned_data.get('min_price')
         max_price = form.cleaned_data.get('max_price')
         amenities = form.cleaned_data.get('amenities', [])
+        amenity_match = form.cleaned_data.get('amenity_match') or 'any'
+        check_in = form.cleaned_data.get('check_in')
+        check_out = form.cleaned_data.get('check_out')
 
-        # Location filter
+        # Location filter (full-text, best matches first); the city facet links replace it
         if location:
-            hotels = hotels.filter(
-                Q(city__icontains=location) |
-                Q(area__icontains=location) |
-                Q(landmark__icontains=location) |
-                Q(address__icontains=location)
-            )
+            selections['cities'] = lambda hotels: search_hotels(
+                hotels, location, fields=('city', 'area', 'landmark', 'address'))
+            searching = fts_available()
 
         # Rating filter
         if min_rating:
-            hotels = hotels.filter(avg_rating__gte=float(min_rating))
+            selections['ratings'] = lambda hotels: hotels.filter(average_rating__gte=float(min_rating))
 
         # Price filter
+        price_range = {}
         if min_price:
-            hotels = hotels.filter(min_price__gte=min_price)
+            price_range['min_price__gte'] = min_price
         if max_price:
-            hotels = hotels.filter(max_price__lte=max_price)
-
-        # Amenities filter
-        amenity_filters = Q()
-        if 'wifi' in amenities:
-            amenity_filters |= Q(has_wifi=True)
-        if 'pool' in amenities:
-            amenity_filters |= Q(has_pool=True)
-        if 'ac' in amenities:
-            amenity_filters |= Q(has_ac=True)
-        if 'breakfast' in amenities:
-            amenity_filters |= Q(has_breakfast=True)
-        if 'parking' in amenities:
-            amenity_filters |= Q(has_parking=True)
-        if 'gym' in amenities:
-            amenity_filters |= Q(has_gym=True)
+            price_range['max_price__lte'] = max_price
+        if price_range:
+            selections['prices'] = lambda hotels: hotels.filter(**price_range)
 
+        # Amenities filter over the packed bitmask
         if amenities:
-            hotels = hotels.filter(amenity_filters)
+            selections['amenities'] = lambda hotels: filter_amenities(hotels, amenities, amenity_match)
+
+        # Availability filter: enough free rooms on every night of the stay
+        if check_in and check_out:
+            hotels = available_hotels(
+                hotels, check_in, check_out,
+                rooms=form.cleaned_data.get('rooms') or 1,
+                guests=form.cleaned_data.get('guests') or 1,
+            )
+
+        # Proximity filter: grid-cell prefilter, exact haversine, nearest first
+        center = form.search_center()
+        if center:
+            hotels = within_radius(hotels, *center, form.cleaned_data.get('radius_km') or 10)
+            near = True
+
+    facets = facet_counts(hotels, selections)
+    hotels = narrow(hotels, selections)
+
+    # Keyset pagination; a stale or tampered cursor falls back to the first page
+    (sort, page), links = request_page(request, lambda cursor: hotel_page(
+        hotels, request.GET.get('sort'), cursor, searching=searching, near=near))
 
     context = {
-        'hotels': hotels,
+        'hotels': page,
+        'page': page,
+        'sort': sort,
+        'sort_choices': sort_choices(searching, near),
+        **links,
         'form': form,
+        'facets': facets,
+        'amenity_counts': [(value, label, facets['amenities'].get(value, 0))
+                           for value, label in form.fields['amenities'].choices],
     }
     return render(request, "hotels/hotels_list.html", context)
 
 
 def hotel_detail(request, hotel_id):
-    hotel = get_object_or_404(Hotel, pk=hotel_id)
-    room_types = hotel.room_types.all()
-    reviews = hotel.reviews.all().select_related('tourist').order_by('-created_at')
-    gallery_images = hotel.gallery_images.all()
-
-    # Calculate average rating
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+    data = hotel_detail_data(hotel_id)
+    hotel, reviews = data['hotel'], data['reviews']
 
-    # Check if current user has reviewed this hotel
+    # Check if current user has reviewed this hotel; only look further than the shown reviews if needed
     user_review = None
     if request.user.is_authenticated:
-        user_review = reviews.filter(tourist=request.user).first()
+        user_review = next((review for review in reviews if review['tourist_id'] == request.user.pk), None)
+        if user_review is None and hotel['review_count'] > len(reviews):
+            user_review = HotelReview.objects.filter(hotel_id=hotel['id'], tourist=request.user).only('id').first()
 
     context = {
-        'hotel': hotel,
-        'room_types': room_types,
-        'reviews': reviews,
-        'gallery_images': gallery_images,
-        'avg_rating': round(avg_rating, 1),
-        'review_count': reviews.count(),
+        **data,
+        'avg_rating': round(hotel['average_rating'], 1),
+        'review_count': hotel['review_count'],
         'user_review': user_review,
     }
     return render(request, "hotels/hotel_detail.html", context)
@@ -334,28 +348,31 @@ def book_hotel(request, hotel_id, room_type_id):
 
             booking.total_amount = room_type.price_per_night * booking.number_of_rooms * nights
 
-            # Check if requested rooms are available
-            if booking.number_of_rooms > room_type.available_rooms:
-                messages.error(request, f"Only {room_type.available_rooms} rooms available for this type.")
+            # Check if requested rooms are free on every night of the stay
+            rooms_left = free_rooms(room_type, booking.check_in, booking.check_out)
+            if booking.number_of_rooms > rooms_left:
+                messages.error(request, f"Only {max(rooms_left, 0)} rooms available for these dates.")
                 return render(request, "hotels/hotel_booking.html", {
                     'hotel': hotel,
                     'room_type': room_type,
                     'form': form
                 })
 
-            booking.save()
+            # Save and hold the nights atomically; a concurrent booking may have taken the last room
+            try:
+                place_booking(booking)
+            except RoomUnavailable:
+                messages.error(request, "Sorry, those rooms were just booked by someone else.")
+                return render(request, "hotels/hotel_booking.html", {
+                    'hotel': hotel,
+                    'room_type': room_type,
+                    'form': form
+                })
 
             # Create notifications
-            Notification.objects.create(
-                user=request.user,
-                message=f"Your booking at {hotel.name} is pending confirmation.",
-                booking=booking
-            )
-            Notification.objects.create(
-                user=hotel.owner,
-                message=f"New booking request for {hotel.name} from {request.user.get_full_name()}.",
-                booking=booking
-            )
+            notify(request.user, f"Your booking at {hotel.name} is pending confirmation.", booking=booking)
+            notify(hotel.owner_id, f"New booking request for {hotel.name} from {request.user.get_full_name()}.",
+                   booking=booking)
 
             messages.success(request, "Hotel booking request submitted successfully!")
             return redirect('tourist_dashboard')
@@ -397,15 +414,7 @@ def submit_review(request, booking_id):
             review.hotel = booking.hotel
             review.tourist = request.user
             review.booking = booking
-            review.save()
-
-            # Update hotel average rating
-            hotel = booking.hotel
-            hotel_reviews = hotel.reviews.all()
-            if hotel_reviews:
-                avg_rating = hotel_reviews.aggregate(Avg('rating'))['rating__avg']
-                hotel.average_rating = round(avg_rating, 2)
-                hotel.save()
+            review.save()  # hotel rating aggregates are updated by signal
 
             messages.success(request, "Thank you for your review!")
             return redirect('tourist_dashboard')
@@ -438,14 +447,7 @@ def submit_hotel_review(request, hotel_id):
             review.hotel = hotel
             review.tourist = request.user
             # No booking required for direct reviews
-            review.save()
-
-            # Update hotel average rating
-            hotel_reviews = hotel.reviews.all()
-            if hotel_reviews:
-                avg_rating = hotel_reviews.aggregate(Avg('rating'))['rating__avg']
-                hotel.average_rating = round(avg_rating, 2)
-                hotel.save()
+            review.save()  # hotel rating aggregates are updated by signal
 
             messages.success(request, "Thank you for your review!")
             return redirect('hotel_detail', hotel_id=hotel_id)
@@ -469,15 +471,7 @@ def edit_review(request, review_id):
         form = HotelReviewForm(request.POST, instance=review)
         if form.is_valid():
             updated_review = form.save(commit=False)
-            updated_review.save()
-
-            # Update hotel average rating
-            hotel = review.hotel
-            hotel_reviews = hotel.reviews.all()
-            if hotel_reviews:
-                avg_rating = hotel_reviews.aggregate(Avg('rating'))['rating__avg']
-                hotel.average_rating = round(avg_rating, 2)
-                hotel.save()
+            updated_review.save()  # hotel rating aggregates are updated by signal
 
             messages.success(request, "Review updated successfully!")
             return redirect('hotel_detail', hotel_id=review.hotel.id)
@@ -500,18 +494,9 @@ def delete_review(request, review_id):
     hotel = review.hotel
 
     if request.method == "POST":
-        # Delete the review
+        # Delete the review; hotel rating aggregates are updated by signal
         review.delete()
 
-        # Update hotel average rating
-        hotel_reviews = hotel.reviews.all()
-        if hotel_reviews:
-            avg_rating = hotel_reviews.aggregate(Avg('rating'))['rating__avg']
-            hotel.average_rating = round(avg_rating, 2) if avg_rating else 0.00
-        else:
-            hotel.average_rating = 0.00
-        hotel.save()
-
         messages.success(request, "Review deleted successfully!")
         return redirect('hotel_detail', hotel_id=hotel.id)
 
@@ -532,9 +517,17 @@ def booking_detail(request, booking_id):
 
 @login_required
 def my_notifications(request):
-    """View all notifications for the current user"""
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, "tourists/notifications.html", {"notifications": notifications})
+    """The current user's notifications, newest first, a page at a time"""
+    cursor = request.GET.get('cursor')
+    try:
+        page = inbox_page(request.user, cursor)
+    except InvalidCursor:
+        cursor, page = None, inbox_page(request.user)
+    return render(request, "tourists/notifications.html", {
+        "notifications": page,
+        "next_cursor": page.next_cursor,
+        "is_first_page": not cursor,
+    })
 
 
 @login_required
@@ -547,38 +540,85 @@ def mark_notification_read(request, notification_id):
     return redirect('my_notifications')
 
 
+def notification_stream(request):
+    """
+    Server-sent events with the user's new notifications. Under ASGI,
+    asgi.py serves this path with main.streams.notification_stream_app;
+    a request that gets here is WSGI, which would buffer the stream until
+    it ends, so 204 tells EventSource not to reconnect.
+    """
+    if not request.user.is_authenticated:
+        return HttpResponse(status=401)
+    return HttpResponse(status=204)
+
+
+async def notification_poll(request):
+    """
+    Notifications after ?after=. Over ASGI this long-polls, waiting a while
+    for one if there are none; under WSGI, where a waiting request holds a
+    worker thread, it answers at once and the page polls on a timer.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Login required.'}, status=401)
+    last_id, found = await wait_for_events(user.pk, parse_after(request.GET.get('after')),
+                                           timeout=LONG_POLL_SECONDS if streaming(request) else 0)
+    return JsonResponse({'notifications': found, 'last_id': last_id})
+
+
 def hotel_search_api(request):
     """API endpoint for hotel search (for AJAX requests)"""
     if request.method == "GET":
         location = request.GET.get('location', '')
         min_rating = request.GET.get('min_rating', '')
+        check_in = parse_date(request.GET.get('check_in', ''))
+        check_out = parse_date(request.GET.get('check_out', ''))
+        rooms = request.GET.get('rooms', '')
+        guests = request.GET.get('guests', '')
+        limit = request.GET.get('limit', '')
 
-        hotels = Hotel.objects.all().annotate(
-            avg_rating=Avg('reviews__rating')
-        )
+        hotels = Hotel.objects.all()
+        searching = False
 
         if location:
-            hotels = hotels.filter(
-                Q(city__icontains=location) |
-                Q(area__icontains=location) |
-                Q(name__icontains=location)
-            )
+            hotels = search_hotels(hotels, location, fields=('city', 'area', 'name'))
+            searching = fts_available()
 
         if min_rating:
-            hotels = hotels.filter(avg_rating__gte=float(min_rating))
+            try:
+                hotels = hotels.filter(average_rating__gte=float(min_rating))
+            except ValueError:
+                return JsonResponse({'error': 'Invalid min_rating.'}, status=400)
+
+        if check_in and check_out and check_out > check_in:
+            hotels = available_hotels(
+                hotels, check_in, check_out,
+                rooms=int(rooms) if rooms.isdigit() and int(rooms) > 0 else 1,
+                guests=int(guests) if guests.isdigit() and int(guests) > 0 else 1,
+            )
+
+        try:
+            sort, page = hotel_page(
+                hotels, request.GET.get('sort'), request.GET.get('cursor'),
+                per_page=min(int(limit), 50) if limit.isdigit() and int(limit) > 0 else 10,
+                searching=searching,
+            )
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor.'}, status=400)
 
         hotel_data = []
-        for hotel in hotels[:10]:
+        for hotel in page:
             hotel_data.append({
                 'id': hotel.id,
                 'name': hotel.name,
                 'city': hotel.city,
                 'area': hotel.area,
                 'min_price': float(hotel.min_price),
-                'avg_rating': float(hotel.avg_rating) if hotel.avg_rating else 0.0,
+                'avg_rating': float(hotel.average_rating),
+                'review_count': hotel.review_count,
             })
 
-        return JsonResponse({'hotels': hotel_data})
+        return JsonResponse({'hotels': hotel_data, 'sort': sort, 'next_cursor': page.next_cursor})
 
 
 @login_required
@@ -586,6 +626,42 @@ def hotel_search_api(request):
 def mark_hotel_notifications_read(request):
     """Mark all notifications as read for hotel manager"""
     if request.method == "POST":
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        mark_all_read(request.user)
         messages.success(request, "All notifications marked as read!")
-    return redirect('hotel_dashboard')
\ No newline at end of file
+    return redirect('hotel_dashboard')
+
+
+def hotel_nearby_api(request):
+    """Hotels near a point or destination: within `radius` km, or the `k` nearest"""
+    destination_id = request.GET.get('destination')
+    try:
+        if destination_id:
+            destination = get_object_or_404(Destination, pk=int(destination_id))
+            if destination.latitude is None or destination.longitude is None:
+                return JsonResponse({'error': 'Destination has no coordinates.'}, status=400)
+            latitude, longitude = destination.latitude, destination.longitude
+        else:
+            latitude, longitude = float(request.GET['lat']), float(request.GET['lng'])
+        radius = float(request.GET['radius']) if request.GET.get('radius') else None
+        k = min(int(request.GET.get('k', 10)), 50)
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Give lat and lng (or destination), plus radius or k.'}, status=400)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or k < 1 or (radius is not None and radius <= 0):
+        return JsonResponse({'error': 'Coordinates, radius or k out of range.'}, status=400)
+
+    if radius is not None:
+        hotels = within_radius(Hotel.objects.all(), latitude, longitude, min(radius, 500)).order_by('distance_km')[:k]
+    else:
+        hotels = nearest(Hotel.objects.all(), latitude, longitude, k)
+
+    return JsonResponse({'hotels': [{
+        'id': hotel.id,
+        'name': hotel.name,
+        'city': hotel.city,
+        'area': hotel.area,
+        'latitude': hotel.latitude,
+        'longitude': hotel.longitude,
+        'distance_km': round(hotel.distance_km, 2),
+        'min_price': float(hotel.min_price),
+        'avg_rating': float(hotel.average_rating),
+    } for hotel in hotels]})
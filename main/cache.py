@@ -0,0 +1,28 @@
+"""
+Cache keys that go stale with the database instead of by signal per process.
+
+The default cache is local to each process, so deleting an entry only
+helps the process that made the change. Instead a CacheVersion row is
+bumped in the same transaction as the change, and readers put the current
+version in the cache key: once the change commits every process misses its
+old entry, and an entry computed from data read before the commit is
+stored under the old version, which nobody reads any more.
+"""
+from django.db.models import F
+
+from .models import CacheVersion
+
+# The version of a key that was never bumped, matching CacheVersion.version's default
+FIRST_VERSION = 1
+
+
+def versioned_key(key):
+    """`key` with its current version; one indexed read"""
+    version = CacheVersion.objects.filter(key=key).values_list('version', flat=True).first() or FIRST_VERSION
+    return f'{key}:v{version}'
+
+
+def bump_version(key):
+    """Retire every cached entry under `key`; call inside the transaction that changes the data"""
+    CacheVersion.objects.bulk_create([CacheVersion(key=key, version=FIRST_VERSION)], ignore_conflicts=True)
+    CacheVersion.objects.filter(key=key).update(version=F('version') + 1)
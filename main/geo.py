@@ -0,0 +1,110 @@
+"""
+Grid index for latitude/longitude proximity search on plain SQLite.
+
+Models store a `geo_cell` number for a fixed CELL_DEGREES grid. A radius query
+prefilters with the indexed cells covering the circle's bounding box plus a
+latitude/longitude range, then refines with an exact haversine distance.
+"""
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEGREES = 0.1  # about 11 km north-south
+GRID_COLUMNS = round(360 / CELL_DEGREES)
+# Past this many cells an IN list stops paying off; the coordinate range alone is used
+MAX_CELLS = 400
+
+
+def cell_for(latitude, longitude):
+    """Grid cell number for a point, or None if the point is not set"""
+    if latitude is None or longitude is None:
+        return None
+    row = math.floor((latitude + 90) / CELL_DEGREES)
+    column = math.floor((longitude + 180) / CELL_DEGREES) % GRID_COLUMNS
+    return row * GRID_COLUMNS + column
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    (min_lat, max_lat, min_lon, max_lon) enclosing the circle.
+
+    Latitudes are clipped at the poles, and a circle reaching a pole spans
+    every longitude. Longitudes are not wrapped: a box across the
+    antimeridian runs past ±180 (see longitude_ranges).
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    lat_delta = math.degrees(angle)
+    min_lat, max_lat = latitude - lat_delta, latitude + lat_delta
+    if min_lat <= -90 or max_lat >= 90:
+        return max(-90.0, min_lat), min(90.0, max_lat), -180.0, 180.0
+    lon_delta = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(latitude)))))
+    return min_lat, max_lat, longitude - lon_delta, longitude + lon_delta
+
+
+def longitude_ranges(min_lon, max_lon):
+    """A bounding box's longitude span as one range, or two split at the antimeridian"""
+    if min_lon < -180:
+        return [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return [(min_lon, max_lon)]
+
+
+def cells_covering(box):
+    """Every grid cell touching the box, or None if there are too many to list; columns wrap at ±180"""
+    min_lat, max_lat, min_lon, max_lon = box
+    first_row, last_row = (math.floor((lat + 90) / CELL_DEGREES) for lat in (min_lat, max_lat))
+    first_col, last_col = (math.floor((lon + 180) / CELL_DEGREES) for lon in (min_lon, max_lon))
+    if (last_row - first_row + 1) * (last_col - first_col + 1) > MAX_CELLS:
+        return None
+    return [row * GRID_COLUMNS + column % GRID_COLUMNS
+            for row in range(first_row, last_row + 1)
+            for column in range(first_col, last_col + 1)]
+
+
+def distance_expression(latitude, longitude):
+    """Haversine distance in km from the point to each row's latitude/longitude"""
+    phi = math.radians(latitude)
+    half_dlat = (Radians(F('latitude')) - Value(phi)) / 2
+    half_dlon = (Radians(F('longitude')) - Value(math.radians(longitude))) / 2
+    a = Power(Sin(half_dlat), 2) + Value(math.cos(phi)) * Cos(Radians(F('latitude'))) * Power(Sin(half_dlon), 2)
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """Rows within radius_km of the point, annotated with distance_km"""
+    box = bounding_box(latitude, longitude, radius_km)
+    longitudes = Q()
+    for span in longitude_ranges(*box[2:]):
+        longitudes |= Q(longitude__range=span)
+    queryset = queryset.filter(longitudes, latitude__range=box[:2])
+    cells = cells_covering(box)
+    if cells is not None:
+        queryset = queryset.filter(geo_cell__in=cells)
+    return queryset.annotate(
+        distance_km=distance_expression(latitude, longitude)
+    ).filter(distance_km__lte=radius_km)
+
+
+def nearest(queryset, latitude, longitude, k, start_km=5, max_km=1000):
+    """
+    The k rows closest to the point, nearest first, each with distance_km.
+
+    Searches a growing radius so a dense area never scans beyond the first
+    few cells, and stops at max_km for sparse ones.
+    """
+    radius = start_km
+    while True:
+        rows = list(within_radius(queryset, latitude, longitude, radius).order_by('distance_km')[:k])
+        if len(rows) >= k or radius >= max_km:
+            return rows
+        radius = min(radius * 2, max_km)
@@ -0,0 +1,173 @@
+"""
+Resized WebP/JPEG derivatives of uploaded images.
+
+Every ImageField file gets a thumb, card and hero width in both formats,
+stored next to MEDIA_ROOT under derivatives/ with names derived from the
+original, so no model needs extra columns. Templates use the `images` tag
+library; until an image has been processed the original is served.
+
+New uploads are resized on a background thread (`derivative_queue`) once
+their row commits, so uploads don't wait on the encoder;
+build_image_derivatives catches up on anything it missed. Whether an image
+has been processed is remembered per process instead of asking storage on
+every render. Derivatives are deleted along with the row or the upload
+they were made from (main.signals).
+"""
+import io
+import logging
+import queue
+import threading
+import time
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .workers import BackgroundWorker
+
+logger = logging.getLogger(__name__)
+
+# name -> (width in px, default `sizes` attribute)
+SIZES = {
+    'thumb': (320, '160px'),
+    'card': (640, '(max-width: 640px) 100vw, 400px'),
+    'hero': (1600, '100vw'),
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DERIVATIVE_ROOT = 'derivatives'
+# How long "not processed yet" is believed before storage is asked again
+UNPROCESSED_SECONDS = 30
+
+# name -> (processed, when checked); processed images stay processed until deleted
+_processed = {}
+_processed_lock = threading.Lock()
+
+
+def derivative_name(name, size, ext):
+    return f'{DERIVATIVE_ROOT}/{name}.{size}.{ext}'
+
+
+def derivative_url(name, size, ext='jpg'):
+    return default_storage.url(derivative_name(name, size, ext))
+
+
+def _remember(name, processed):
+    with _processed_lock:
+        _processed[name] = (processed, time.monotonic())
+
+
+def has_derivatives(name):
+    """Whether `name` has been processed; the last file written marks a complete set"""
+    with _processed_lock:
+        processed, checked = _processed.get(name, (False, None))
+    if processed or (checked is not None and time.monotonic() - checked < UNPROCESSED_SECONDS):
+        return processed
+    last_size, last_ext = list(SIZES)[-1], list(FORMATS)[-1]
+    processed = default_storage.exists(derivative_name(name, last_size, last_ext))
+    _remember(name, processed)
+    return processed
+
+
+def image_fields():
+    """(model, field name) for every ImageField of every installed model"""
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, models.ImageField)
+    ]
+
+
+def _encode(image, fmt):
+    format_name, options = FORMATS[fmt]
+    if format_name == 'JPEG' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, 'white')
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format_name, **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(name, force=False):
+    """
+    Write every derivative of the stored image `name`.
+
+    Returns the number of files written; 0 if the set already exists, and
+    None if the original is missing or not an image.
+    """
+    if not force and has_derivatives(name):
+        return 0
+    try:
+        with default_storage.open(name) as original:
+            image = Image.open(original)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+        logger.warning("Cannot make derivatives of %s: %s", name, e)
+        return None
+
+    written = 0
+    for size, (width, _) in SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+        for ext in FORMATS:
+            target = derivative_name(name, size, ext)
+            default_storage.delete(target)
+            default_storage.save(target, ContentFile(_encode(resized, ext)))
+            written += 1
+    _remember(name, True)
+    return written
+
+
+def delete_derivatives(name):
+    with _processed_lock:
+        _processed.pop(name, None)
+    for size in SIZES:
+        for ext in FORMATS:
+            default_storage.delete(derivative_name(name, size, ext))
+
+
+class DerivativeQueue(BackgroundWorker):
+    """Makes derivatives of newly stored images on a daemon thread, one image at a time"""
+
+    thread_name = 'image-derivatives'
+
+    def __init__(self, max_pending=1000):
+        super().__init__()
+        self._queue = queue.Queue(maxsize=max_pending)
+
+    def submit(self, name):
+        self.ensure_running()
+        try:
+            self._queue.put_nowait(name)
+        except queue.Full:
+            # The original is served meanwhile; build_image_derivatives picks it up later
+            logger.warning("Derivative queue full, skipped %s", name)
+
+    def run(self):
+        while True:
+            name = self._queue.get()
+            try:
+                # A re-uploaded name replaces whatever was made for the old file
+                generate_derivatives(name, force=True)
+            except Exception:
+                logger.exception("Failed to make derivatives of %s", name)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every submitted image has been processed"""
+        if self.running():
+            self._queue.join()
+
+
+derivative_queue = DerivativeQueue()
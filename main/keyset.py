@@ -0,0 +1,139 @@
+"""
+Keyset (cursor) pagination shared by listing pages and JSON APIs.
+
+A page is fetched with WHERE (sort columns) past the last row seen instead of
+OFFSET, so with an index matching the ordering every page costs the same as
+the first. The ordering must end in a unique column (usually pk) and its
+columns must not be NULL.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor):
+        self.object_list = items
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(model, name, value):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return value
+    return field.to_python(value)
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor.")
+    if not isinstance(values, list):
+        raise InvalidCursor("Malformed cursor.")
+    return values
+
+
+def _row_value(row, name):
+    for part in name.split('__'):
+        row = getattr(row, part)
+    return row
+
+
+def _after(ordering, values):
+    """Q selecting rows strictly after `values` in `ordering`"""
+    condition = Q()
+    equal = Q()
+    for name, value in zip(ordering, values):
+        field = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def paginate(queryset, ordering, cursor=None, per_page=20):
+    """
+    Return the KeysetPage of `queryset` in `ordering` that follows `cursor`.
+
+    `ordering` is a list like ['-average_rating', '-id']; raises InvalidCursor
+    if the cursor does not fit it.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(ordering):
+            raise InvalidCursor("Cursor does not match the sort order.")
+        model = queryset.model
+        try:
+            values = [_decode_value(model, name.lstrip('-'), value) for name, value in zip(ordering, values)]
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor("Cursor does not match the sort order.")
+        queryset = queryset.filter(_after(ordering, values))
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor([_row_value(rows[-1], name.lstrip('-')) for name in ordering])
+    return KeysetPage(rows, next_cursor)
+
+
+def request_page(request, fetch):
+    """
+    `fetch(cursor)` for the request's ?cursor=, or `fetch(None)` if that
+    cursor is stale or tampered with, so a bad link shows the first page.
+
+    `fetch` returns a KeysetPage, or a tuple ending in one, like the
+    (sort, page) of the listing pages. Returns (what `fetch` returned,
+    links), where links holds the template's first_page_query,
+    next_page_query (None on the last page) and is_first_page, keeping the
+    request's other query parameters.
+    """
+    cursor = request.GET.get('cursor')
+    try:
+        result = fetch(cursor)
+    except InvalidCursor:
+        cursor, result = None, fetch(None)
+    page = result[-1] if isinstance(result, tuple) else result
+
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    links = {'first_page_query': params.urlencode(), 'next_page_query': None, 'is_first_page': not cursor}
+    if page.has_next:
+        params['cursor'] = page.next_cursor
+        links['next_page_query'] = params.urlencode()
+    return result, links
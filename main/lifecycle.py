@@ -0,0 +1,91 @@
+"""
+Date-driven status changes: tours start and finish, hotel stays complete
+and unconfirmed bookings expire.
+
+Each transition is a queryset of rows due for it, read through an index on
+(status, date), and a function that advances a chunk of them. Chunks are
+locked, advanced and committed one at a time, so a sweep over a large
+backlog never holds the write lock for long, and a row that has moved on
+no longer matches, so two sweepers never advance the same row twice.
+
+`sweep_lifecycle` runs one pass. Schedule the `sweep_lifecycle` command
+(from cron, or as one long-running process with --every); setting
+LIFECYCLE_SWEEP_SECONDS instead makes each web process start an in-process
+scheduler on its first request.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .workers import BackgroundWorker
+
+logger = logging.getLogger(__name__)
+
+# Rows per transaction, as for notification compaction
+CHUNK_SIZE = 500
+
+
+def advance_in_chunks(rows, ordering, advance, chunk_size=CHUNK_SIZE, pause=0):
+    """
+    Lock up to `chunk_size` of `rows` at a time and hand them to `advance`,
+    which must move them out of `rows`; returns how many were advanced.
+    Sleeps `pause` seconds between transactions so other writers get in.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(rows.select_for_update(of=('self',)).order_by(*ordering)[:chunk_size])
+            if chunk:
+                advance(chunk)
+        total += len(chunk)
+        if len(chunk) < chunk_size:
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+def sweep_lifecycle(chunk_size=CHUNK_SIZE, pause=0):
+    """Run every transition that is due; returns a dict of how many rows each one advanced"""
+    from guides.lifecycle import complete_tours, start_tours
+    from hotels.lifecycle import complete_stays, expire_pending_bookings
+
+    counts = {}
+    # Finish before starting, so a tour that is already over goes straight to completed
+    for name, transition in [('tours_completed', complete_tours), ('tours_started', start_tours),
+                             ('stays_completed', complete_stays), ('bookings_expired', expire_pending_bookings)]:
+        counts[name] = transition(chunk_size=chunk_size, pause=pause)
+    return counts
+
+
+class LifecycleScheduler(BackgroundWorker):
+    """Runs sweep_lifecycle every `interval` seconds on a daemon thread"""
+
+    thread_name = 'lifecycle-sweeper'
+
+    def __init__(self, interval):
+        super().__init__()
+        self.interval = interval
+        self.last_run = None
+
+    def ensure_running(self):
+        if self.interval:
+            super().ensure_running()
+
+    def run(self):
+        while True:
+            # Sleep first, so a burst of process starts doesn't sweep all at once
+            time.sleep(self.interval)
+            try:
+                counts = sweep_lifecycle()
+                self.last_run = counts
+                if any(counts.values()):
+                    logger.info("Lifecycle sweep: %s", counts)
+            except Exception:
+                logger.exception("Lifecycle sweep failed")
+            finally:
+                close_old_connections()
+
+
+scheduler = LifecycleScheduler(getattr(settings, 'LIFECYCLE_SWEEP_SECONDS', 0))
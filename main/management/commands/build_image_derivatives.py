@@ -0,0 +1,49 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+
+def build(name, force):
+    from main.images import generate_derivatives
+    return name, generate_derivatives(name, force=force)
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG derivatives for every uploaded image, in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+        parser.add_argument('--force', action='store_true', help="Regenerate images that already have derivatives")
+
+    def handle(self, *args, **options):
+        from django.db import connections
+        from main.images import image_fields
+
+        names = set()
+        for model, field_name in image_fields():
+            names.update(model._default_manager.exclude(**{field_name: ''}).exclude(
+                **{f'{field_name}__isnull': True}).values_list(field_name, flat=True))
+        names = sorted(names)
+        self.stdout.write(f"{len(names)} images, {options['workers']} workers")
+
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+        started = time.perf_counter()
+        processed = skipped = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            for name, written in pool.map(build, names, [options['force']] * len(names), chunksize=4):
+                if written is None:
+                    failed += 1
+                    self.stderr.write(f"Skipped unreadable image {name}")
+                elif written:
+                    processed += 1
+                else:
+                    skipped += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {processed}, already done {skipped}, failed {failed} "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
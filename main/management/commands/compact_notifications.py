@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from main.notifications import CHUNK_SIZE, RETENTION_DAYS, compact_notifications
+
+
+class Command(BaseCommand):
+    help = "Archive (or delete) read notifications older than the retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=RETENTION_DAYS,
+                            help=f"Keep read notifications newer than this many days (default {RETENTION_DAYS})")
+        parser.add_argument('--delete', action='store_true', help="Delete old notifications instead of archiving them")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Rows per transaction")
+        parser.add_argument('--pause', type=float, default=0.05, help="Seconds to sleep between transactions")
+
+    def handle(self, *args, **options):
+        removed = compact_notifications(
+            days=options['days'], archive=not options['delete'],
+            chunk_size=options['chunk_size'], pause=options['pause'],
+        )
+        action = "Deleted" if options['delete'] else "Archived"
+        self.stdout.write(self.style.SUCCESS(f"{action} {removed} notifications."))
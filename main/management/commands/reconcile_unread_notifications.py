@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from main.notifications import outbox, reconcile_unread_counts
+
+
+class Command(BaseCommand):
+    help = "Repair users' unread notification counters from the notifications table"
+
+    def handle(self, *args, **options):
+        # Deliver anything a dead process left pending, so it is counted too
+        outbox.drain()
+        fixed = reconcile_unread_counts()
+        self.stdout.write(self.style.SUCCESS(f"Fixed {fixed} unread counters."))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.lifecycle import CHUNK_SIZE, sweep_lifecycle
+
+
+class Command(BaseCommand):
+    help = "Advance tour and hotel booking statuses by date and expire stale pending bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Rows per transaction")
+        parser.add_argument('--pause', type=float, default=0.05, help="Seconds to sleep between transactions")
+        parser.add_argument('--every', type=int, default=0,
+                            help="Keep running, sweeping every this many seconds (default: sweep once)")
+
+    def handle(self, *args, **options):
+        while True:
+            counts = sweep_lifecycle(chunk_size=options['chunk_size'], pause=options['pause'])
+            summary = ", ".join(f"{name.replace('_', ' ')}: {count}" for name, count in counts.items())
+            self.stdout.write(self.style.SUCCESS(f"Swept lifecycle ({summary})."))
+            if not options['every']:
+                return
+            time.sleep(options['every'])
@@ -1,3 +1,13 @@
 from django.db import models
 
-# Create your models here.
+
+class CacheVersion(models.Model):
+    """
+    Version number for a group of cached data, bumped in the writing
+    transaction; main.cache puts it in the cache key.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
@@ -0,0 +1,295 @@
+"""
+Notification outbox.
+
+Views hand notifications to `notify()` instead of inserting them. Each
+message is stored as one PendingNotification row, listing its recipients,
+in the caller's transaction, so it commits or rolls back with the change
+that caused it and survives a crash. Once it commits, a background thread
+fans pending rows out into Notification rows with one bulk INSERT per batch.
+When this process's backlog passes `max_pending` the committing caller
+writes a batch itself, so a burst slows requests down rather than piling up.
+Rows left by a process that died are picked up by the next drain anywhere.
+
+Written notifications are published to `events`, which the notification
+stream and long-poll views subscribe to. Read notifications older than
+RETENTION_DAYS are moved to ArchivedNotification by `compact_notifications`.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .keyset import paginate
+from .pubsub import Broker
+from .workers import BackgroundWorker
+
+logger = logging.getLogger(__name__)
+
+# Notification events keyed by user id
+events = Broker()
+
+INBOX_ORDERING = ['-created_at', '-id']
+INBOX_PAGE_SIZE = 20
+RETENTION_DAYS = 90
+# Rows per transaction for bulk mark-read and compaction, so SQLite's write lock is held briefly
+CHUNK_SIZE = 500
+
+
+def _pk(obj):
+    return getattr(obj, 'pk', obj)
+
+
+class NotificationOutbox(BackgroundWorker):
+    thread_name = 'notification-outbox'
+
+    def __init__(self, batch_size=200, flush_interval=0.05, poll_interval=5, max_pending=10000):
+        super().__init__()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # How often an idle worker looks for rows other processes left behind
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        # One drain at a time per process, so flush() also waits for the worker's batch
+        self._draining = threading.Lock()
+        self._wake = threading.Event()
+        self._backlog = 0
+        self._metrics = {
+            'enqueued': 0, 'written': 0, 'skipped': 0, 'batches': 0,
+            'inline_writes': 0, 'max_batch': 0, 'max_backlog': 0, 'last_write_ms': 0.0,
+        }
+
+    def send(self, recipients, message, booking=None):
+        """Store one notification for the recipients (users or user ids) in the current transaction"""
+        if not isinstance(recipients, (list, tuple, set)):
+            recipients = [recipients]
+        self.send_each([(recipient, message, booking) for recipient in recipients])
+
+    def send_each(self, notifications):
+        """
+        Store a batch of (recipient, message) or (recipient, message, booking)
+        notifications, each with its own message, in one INSERT; recipients
+        of the same message share a row
+        """
+        from hotels.models import PendingNotification
+
+        recipients = defaultdict(dict)
+        for recipient, message, *booking in notifications:
+            booking_id = _pk(booking[0]) if booking and booking[0] is not None else None
+            recipients[message, booking_id][_pk(recipient)] = None
+        if not recipients:
+            return
+        PendingNotification.objects.bulk_create([
+            PendingNotification(recipients=list(user_ids), message=message, booking_id=booking_id)
+            for (message, booking_id), user_ids in recipients.items()
+        ])
+        count = sum(len(user_ids) for user_ids in recipients.values())
+        transaction.on_commit(lambda: self._committed(count))
+
+    def _committed(self, count):
+        self.ensure_running()
+        with self._lock:
+            self._backlog += count
+            self._metrics['enqueued'] += count
+            self._metrics['max_backlog'] = max(self._metrics['max_backlog'], self._backlog)
+            behind = self._backlog > self.max_pending
+        if behind:
+            # Backpressure: the worker is behind, so this caller pays for a batch
+            self._drain_batch(inline=True)
+        self._wake.set()
+
+    def run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            # Let a burst of commits gather into one batch
+            time.sleep(self.flush_interval)
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Notification outbox drain failed")
+                connection.close()
+
+    def drain(self):
+        """Fan out every pending notification, from any process, in this thread; returns how many were written"""
+        total = 0
+        while True:
+            drained, written = self._drain_batch()
+            total += written
+            if not drained:
+                with self._lock:
+                    self._backlog = 0
+                return total
+
+    def _drain_batch(self, inline=False):
+        from accounts.models import User
+        from hotels.models import Notification, PendingNotification
+
+        started = time.perf_counter()
+        with self._draining, transaction.atomic():
+            pending = list(PendingNotification.objects.select_for_update(skip_locked=True).order_by('pk')[
+                :self.batch_size])
+            if not pending:
+                return 0, 0
+            user_ids = {user_id for row in pending for user_id in row.recipients}
+            # Anyone deleted since the notification was sent just doesn't get it
+            users = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+            rows = [Notification(user_id=user_id, message=row.message, booking_id=row.booking_id)
+                    for row in pending for user_id in row.recipients if user_id in users]
+            Notification.objects.bulk_create(rows, batch_size=self.batch_size)
+            adjust_unread(Counter(row.user_id for row in rows))
+            PendingNotification.objects.filter(pk__in=[row.pk for row in pending]).delete()
+        publish(rows)
+        with self._lock:
+            self._backlog = max(0, self._backlog - len(rows))
+            self._metrics['written'] += len(rows)
+            self._metrics['skipped'] += sum(len(row.recipients) for row in pending) - len(rows)
+            if inline:
+                self._metrics['inline_writes'] += len(rows)
+            self._metrics['batches'] += 1
+            self._metrics['max_batch'] = max(self._metrics['max_batch'], len(rows))
+            self._metrics['last_write_ms'] = (time.perf_counter() - started) * 1000
+        return len(pending), len(rows)
+
+    def flush(self):
+        """Write everything this process has committed now, rather than when the worker gets to it"""
+        if self._pid == os.getpid() and self._backlog:
+            self.drain()
+
+    def metrics(self):
+        from hotels.models import PendingNotification
+
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics['backlog'] = self._backlog
+        metrics['pending'] = PendingNotification.objects.count()
+        metrics['subscribers'] = events.subscriber_count()
+        metrics['mean_batch'] = round(metrics['written'] / metrics['batches'], 1) if metrics['batches'] else 0.0
+        return metrics
+
+
+outbox = NotificationOutbox()
+# Not needed for durability, only so a clean shutdown doesn't leave delivery to the next process
+atexit.register(outbox.flush)
+
+
+def notify(recipients, message, booking=None):
+    outbox.send(recipients, message, booking=booking)
+
+
+def notify_each(notifications):
+    outbox.send_each(notifications)
+
+
+def notification_event(notification):
+    return {
+        'id': notification.pk,
+        'message': notification.message,
+        'booking_id': notification.booking_id,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+def publish(notifications):
+    """Push stored notifications to their recipients' open streams in this process"""
+    for notification in notifications:
+        if notification.pk is not None:
+            events.publish(notification.user_id, notification_event(notification))
+
+
+def adjust_unread(deltas):
+    """Apply a Counter of user id -> change to the users' unread counters, one UPDATE per distinct change"""
+    from accounts.models import User
+
+    by_change = defaultdict(list)
+    for user_id, change in deltas.items():
+        if change:
+            by_change[change].append(user_id)
+    for change, user_ids in by_change.items():
+        User.objects.filter(pk__in=user_ids).update(
+            unread_notifications=Greatest(F('unread_notifications') + change, Value(0))
+        )
+
+
+def mark_all_read(user, chunk_size=CHUNK_SIZE):
+    """Mark every unread notification of a user as read, a chunk per transaction; returns how many were unread"""
+    from hotels.models import Notification
+
+    total = 0
+    while True:
+        ids = list(Notification.objects.filter(user=user, is_read=False).values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            count = Notification.objects.filter(pk__in=ids, is_read=False).update(is_read=True)
+            adjust_unread({user.pk: -count})
+        total += count
+
+
+def inbox_page(user, cursor=None, per_page=INBOX_PAGE_SIZE):
+    """A KeysetPage of the user's notifications, newest first; raises InvalidCursor for a bad cursor"""
+    from hotels.models import Notification
+
+    notifications = Notification.objects.filter(user=user).select_related('booking__hotel')
+    return paginate(notifications, INBOX_ORDERING, cursor, per_page)
+
+
+def latest_notifications(user, count=5):
+    from hotels.models import Notification
+
+    return list(Notification.objects.filter(user=user).select_related('booking__hotel').order_by(*INBOX_ORDERING)[:count])
+
+
+def compact_notifications(days=RETENTION_DAYS, archive=True, chunk_size=CHUNK_SIZE, pause=0):
+    """
+    Move read notifications older than `days` into ArchivedNotification, or
+    delete them when `archive` is False. Works oldest first in transactions
+    of `chunk_size` rows, sleeping `pause` seconds between them so other
+    writers get the database; returns how many rows were removed.
+    """
+    from hotels.models import ArchivedNotification, Notification
+
+    cutoff = timezone.now() - timedelta(days=days)
+    total = 0
+    while True:
+        ids = list(Notification.objects.filter(is_read=True, created_at__lt=cutoff).order_by(
+            'created_at'
+        ).values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            rows = Notification.objects.filter(pk__in=ids, is_read=True)
+            if archive:
+                ArchivedNotification.objects.bulk_create([
+                    ArchivedNotification(user_id=row['user_id'], message=row['message'],
+                                         booking_id=row['booking_id'], created_at=row['created_at'])
+                    for row in rows.values('user_id', 'message', 'booking_id', 'created_at')
+                ])
+            deleted, _ = rows.delete()
+        total += deleted
+        if pause:
+            time.sleep(pause)
+
+
+def reconcile_unread_counts():
+    """Reset every unread counter that disagrees with the notifications table; returns how many were wrong"""
+    from accounts.models import User
+    from hotels.models import Notification
+
+    unread = Notification.objects.filter(user=OuterRef('pk'), is_read=False).order_by().values('user').annotate(
+        count=Count('pk')
+    ).values('count')
+    actual = Coalesce(Subquery(unread), 0)
+    with transaction.atomic():
+        return User.objects.annotate(actual=actual).exclude(unread_notifications=F('actual')).update(
+            unread_notifications=actual
+        )
@@ -0,0 +1,83 @@
+"""
+In-process publish/subscribe for pushing events to open async connections.
+
+Subscribers are asyncio queues owned by the event loop serving a request;
+publishers may run in any thread (the notification outbox worker, a sync
+view) and hand events over with call_soon_threadsafe. Only subscribers in
+the same process see an event, so clients resync from the database when
+they reconnect.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+
+class Subscription:
+    def __init__(self, key, max_pending):
+        self.key = key
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def _deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A reader this far behind is told to reconnect and catch up from the database
+            self.overflowed = True
+
+    async def get(self, timeout=None):
+        """The next event, or None on timeout; raises OverflowError once events were dropped"""
+        if self.overflowed:
+            raise OverflowError
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            if self.overflowed:
+                raise OverflowError
+            return None
+
+    def drain(self):
+        events = []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+
+class Broker:
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, key):
+        """Start receiving events for `key`; must be called from inside the consuming event loop"""
+        subscription = Subscription(key, self.max_pending)
+        with self._lock:
+            self._subscribers[key].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.key]
+
+    def publish(self, key, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # The request's loop has already closed
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self, key=None):
+        """Open subscriptions for `key`, or for every key"""
+        with self._lock:
+            if key is not None:
+                return len(self._subscribers.get(key, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
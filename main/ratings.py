@@ -0,0 +1,74 @@
+"""
+Review aggregates (count, rating sum and average) kept on the reviewed row.
+
+Hotels and guides both store their reviews' totals on the reviewed model;
+`track_review_ratings` connects the signal handlers that keep them in step
+as reviews are created, edited and deleted.
+"""
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast, Round
+from django.db.models.signals import post_delete, post_save, pre_save
+
+
+def apply_review_delta(targets, count_delta, rating_delta, count='review_count', total='rating_sum',
+                       average='average_rating'):
+    """
+    Adjust the review aggregates of the `targets` queryset in one UPDATE.
+
+    The new average is computed from the pre-update columns, so concurrent
+    reviews of the same row cannot overwrite each other's contribution.
+    """
+    review_count = F(count) + count_delta
+    rating_sum = F(total) + rating_delta
+    targets.update(**{
+        count: review_count,
+        total: rating_sum,
+        average: Case(
+            When(**{f'{count}__gt': -count_delta}, then=Round(Cast(rating_sum, FloatField()) / review_count, 2)),
+            default=Value(0.0),
+        ),
+    })
+
+
+def track_review_ratings(review_model, target_model, review_fk, target_field='pk', rating='rating',
+                         count='review_count', total='rating_sum', average='average_rating'):
+    """
+    Keep `target_model`'s `count`, `total` and `average` columns in step
+    with `review_model` rows, whose `review_fk` column holds the reviewed
+    row's `target_field`.
+
+    Before a review is saved its stored (target, rating) is put on
+    `_previous_rating`, where other post_save handlers can see it too.
+    """
+    def apply(target_id, count_delta, rating_delta):
+        targets = target_model.objects.filter(**{target_field: target_id})
+        apply_review_delta(targets, count_delta, rating_delta, count, total, average)
+
+    def remember_review_rating(sender, instance, raw=False, **kwargs):
+        instance._previous_rating = None
+        if raw or instance.pk is None:
+            return
+        instance._previous_rating = review_model.objects.filter(pk=instance.pk).values_list(
+            review_fk, rating
+        ).first()
+
+    def add_review_rating(sender, instance, created, raw=False, **kwargs):
+        if raw:
+            return
+        target_id, value = getattr(instance, review_fk), int(getattr(instance, rating))
+        previous = getattr(instance, '_previous_rating', None)
+        if created or previous is None:
+            apply(target_id, 1, value)
+        elif previous[0] != target_id:
+            apply(previous[0], -1, -previous[1])
+            apply(target_id, 1, value)
+        elif previous[1] != value:
+            apply(target_id, 0, value - previous[1])
+
+    def remove_review_rating(sender, instance, **kwargs):
+        apply(getattr(instance, review_fk), -1, -int(getattr(instance, rating)))
+
+    uid = f'review_ratings:{review_model._meta.label}'
+    pre_save.connect(remember_review_rating, sender=review_model, weak=False, dispatch_uid=uid)
+    post_save.connect(add_review_rating, sender=review_model, weak=False, dispatch_uid=uid)
+    post_delete.connect(remove_review_rating, sender=review_model, weak=False, dispatch_uid=uid)
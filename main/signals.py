@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from destinations.models import Destination
+from hotels.models import Hotel
+from packages.models import Package
+
+from .images import delete_derivatives, derivative_queue, image_fields
+from .lifecycle import scheduler
+from .suggest import destination_terms, hotel_terms, package_terms, suggestions
+
+SUGGEST_SOURCES = {
+    Hotel: ('hotel', hotel_terms),
+    Destination: ('destination', destination_terms),
+    Package: ('package', package_terms),
+}
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_save, sender=Destination)
+@receiver(post_save, sender=Package)
+def refresh_suggestions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    kind, terms = SUGGEST_SOURCES[sender]
+    # Index what was committed; a rolled-back save leaves the suggestions alone
+    source, source_terms = (kind, instance.pk), terms(instance)
+    transaction.on_commit(lambda: suggestions.update(source, source_terms))
+
+
+@receiver(post_delete, sender=Hotel)
+@receiver(post_delete, sender=Destination)
+@receiver(post_delete, sender=Package)
+def drop_suggestions(sender, instance, **kwargs):
+    kind, _ = SUGGEST_SOURCES[sender]
+    source = (kind, instance.pk)
+    transaction.on_commit(lambda: suggestions.remove(source))
+
+
+IMAGE_FIELDS = defaultdict(list)
+for model, field_name in image_fields():
+    IMAGE_FIELDS[model].append(field_name)
+
+
+def image_names(instance):
+    return {getattr(instance, field_name).name for field_name in IMAGE_FIELDS[type(instance)]} - {None, ''}
+
+
+def remember_image_names(sender, instance, raw=False, **kwargs):
+    instance._previous_images = set()
+    if raw or instance.pk is None:
+        return
+    previous = sender._default_manager.filter(pk=instance.pk).values_list(*IMAGE_FIELDS[sender]).first()
+    instance._previous_images = set(previous or ()) - {None, ''}
+
+
+def make_image_derivatives(sender, instance, raw=False, **kwargs):
+    """Queue newly stored images for resizing and drop the derivatives of replaced ones, after commit"""
+    if raw:
+        return
+    current, previous = image_names(instance), getattr(instance, '_previous_images', set())
+    for name in current - previous:
+        transaction.on_commit(lambda name=name: derivative_queue.submit(name))
+    for name in previous - current:
+        transaction.on_commit(lambda name=name: delete_derivatives(name))
+
+
+def drop_image_derivatives(sender, instance, **kwargs):
+    for name in image_names(instance):
+        transaction.on_commit(lambda name=name: delete_derivatives(name))
+
+
+for model in IMAGE_FIELDS:
+    uid = f'image_derivatives_{model._meta.label}'
+    pre_save.connect(remember_image_names, sender=model, dispatch_uid=uid)
+    post_save.connect(make_image_derivatives, sender=model, dispatch_uid=uid)
+    post_delete.connect(drop_image_derivatives, sender=model, dispatch_uid=uid)
+
+
+@receiver(request_started)
+def start_lifecycle_scheduler(sender, **kwargs):
+    # Only with LIFECYCLE_SWEEP_SECONDS set; started by the first request rather
+    # than at import, so management commands and tests don't sweep
+    scheduler.ensure_running()
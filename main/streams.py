@@ -0,0 +1,172 @@
+"""
+Live notification delivery for open connections: server-sent events and long-polling.
+
+Django's ASGI handler keeps a worker thread for the sync middleware for
+the whole life of a response, so an idle event stream served through it
+would pin a thread. asgi.py therefore answers the stream path with
+`notification_stream_app`, which borrows a pool thread only to check the
+session and read the backlog.
+
+Under WSGI a streaming response must finish before anything is sent and
+a waiting request holds a worker thread, so the stream and long-polls are
+only offered to pages served over ASGI (see `streaming`); WSGI pages poll
+every SHORT_POLL_SECONDS and get an immediate answer. Streams also end after STREAM_SECONDS, and
+the browser reconnects with Last-Event-ID, so no connection lives forever.
+"""
+import asyncio
+import json
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.http.cookie import parse_cookie
+
+from .notifications import events, notification_event
+
+HEARTBEAT_SECONDS = 20
+STREAM_SECONDS = 300
+LONG_POLL_SECONDS = 25
+SHORT_POLL_SECONDS = 30
+BACKLOG = 50
+
+
+def streaming(request):
+    """Whether this request is served over ASGI, where an event stream can be sent as it is produced"""
+    return isinstance(request, ASGIRequest)
+
+
+def parse_after(value):
+    """The last notification id a client has seen, or None"""
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _backlog(user_id, after):
+    from hotels.models import Notification
+
+    try:
+        if after is None:
+            latest = Notification.objects.filter(user_id=user_id).order_by('-pk').values_list('pk', flat=True)
+            return latest.first() or 0, []
+        rows = Notification.objects.filter(user_id=user_id, pk__gt=after).order_by('pk')[:BACKLOG]
+        return after, [notification_event(notification) for notification in rows]
+    finally:
+        connections.close_all()
+
+
+async def backlog(user_id, after):
+    """(last id, events) for notifications after `after`; with no `after`, starts from the latest"""
+    return await sync_to_async(_backlog, thread_sensitive=False)(user_id, after)
+
+
+def sse(event):
+    return f"id: {event['id']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(user_id, after=None, lifetime=STREAM_SECONDS):
+    """
+    Server-sent event chunks: the backlog after `after`, then live events
+    and heartbeats for `lifetime` seconds
+    """
+    # Subscribe before reading the backlog so nothing lands in between unseen
+    subscription = events.subscribe(user_id)
+    deadline = asyncio.get_running_loop().time() + lifetime
+    try:
+        _, found = await backlog(user_id, after)
+        # Only skip what the client has already seen; with no `after`, everything subscribed to is new
+        last_id = after or 0
+        yield "retry: 3000\n\n"
+        for event in found:
+            last_id = event['id']
+            yield sse(event)
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                # The client reconnects after `retry` and resumes from Last-Event-ID
+                return
+            try:
+                event = await subscription.get(timeout=min(HEARTBEAT_SECONDS, remaining))
+            except OverflowError:
+                # Too far behind; the client reconnects with Last-Event-ID and reads the backlog
+                return
+            if event is None:
+                yield ": keep-alive\n\n"
+            elif event['id'] > last_id:
+                last_id = event['id']
+                yield sse(event)
+    finally:
+        events.unsubscribe(subscription)
+
+
+async def wait_for_events(user_id, after=None, timeout=LONG_POLL_SECONDS):
+    """(last id, events) after `after`, waiting up to `timeout` seconds if there are none yet"""
+    if not timeout:
+        last_id, found = await backlog(user_id, after)
+        return (found[-1]['id'] if found else last_id), found
+    subscription = events.subscribe(user_id)
+    try:
+        last_id, found = await backlog(user_id, after)
+        if found:
+            return found[-1]['id'], found
+        try:
+            event = await subscription.get(timeout=timeout)
+        except OverflowError:
+            return await backlog(user_id, last_id)
+        if event is None:
+            return last_id, []
+        found = [e for e in [event, *subscription.drain()] if after is None or e['id'] > after]
+        return (max(e['id'] for e in found) if found else last_id), found
+    finally:
+        events.unsubscribe(subscription)
+
+
+def _session_user_id(session_key):
+    try:
+        request = HttpRequest()
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+        user = get_user(request)
+        return user.pk if user.is_authenticated else None
+    finally:
+        connections.close_all()
+
+
+async def notification_stream_app(scope, receive, send):
+    """Bare ASGI version of the notification_stream view"""
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    session_key = parse_cookie(headers.get('cookie', '')).get(settings.SESSION_COOKIE_NAME)
+    user_id = await sync_to_async(_session_user_id, thread_sensitive=False)(session_key) if session_key else None
+    if user_id is None:
+        await send({'type': 'http.response.start', 'status': 401, 'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': b'Login required.'})
+        return
+
+    query = QueryDict(scope.get('query_string', b''))
+    after = parse_after(headers.get('last-event-id') or query.get('after'))
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),
+    ]})
+
+    async def pump():
+        async for chunk in event_stream(user_id, after):
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(disconnected())]
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    for task in done:
+        task.result()
@@ -0,0 +1,133 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.urls import reverse
+
+# Processes other than the one that saved a row only learn about it on rebuild,
+# so an index older than this is rebuilt on the next lookup.
+MAX_AGE_SECONDS = 300
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+def word_starts(label):
+    """Every suffix of the label that starts at a word, so 'bazar' also finds Cox's Bazar"""
+    words = normalize(label).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words))}
+
+
+def location_url(label):
+    return f"{reverse('hotels_info')}?{urlencode({'location': label})}"
+
+
+def hotel_terms(hotel):
+    terms = []
+    for kind, label in (('hotel', hotel.name), ('city', hotel.city), ('area', hotel.area)):
+        if not label or not label.strip():
+            continue
+        label = label.strip()
+        url = reverse('hotel_detail', args=[hotel.pk]) if kind == 'hotel' else location_url(label)
+        terms.append((kind, label, url))
+    return terms
+
+
+def destination_terms(destination):
+    if not destination.name:
+        return []
+    return [('destination', destination.name, reverse('destination_detail', args=[destination.pk]))]
+
+
+def package_terms(package):
+    return [('package', package.destination_name, reverse('package_detail', args=[package.pk]))]
+
+
+class PrefixIndex:
+    """
+    Sorted array of (key, kind, label, url) entries answered with bisect.
+
+    Each source row contributes a few terms; terms shared by several rows
+    (two hotels in the same city) are reference counted so the entry stays
+    until the last row using it goes away.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._terms = Counter()
+        self._sources = {}
+        self._built_at = None
+
+    def build(self):
+        from destinations.models import Destination
+        from hotels.models import Hotel
+        from packages.models import Package
+
+        sources = {}
+        for hotel in Hotel.objects.only('name', 'city', 'area'):
+            sources['hotel', hotel.pk] = hotel_terms(hotel)
+        for destination in Destination.objects.only('name'):
+            sources['destination', destination.pk] = destination_terms(destination)
+        for package in Package.objects.only('destination_name'):
+            sources['package', package.pk] = package_terms(package)
+
+        terms = Counter(term for source_terms in sources.values() for term in source_terms)
+        entries = sorted((key, *term) for term in terms for key in word_starts(term[1]))
+        with self._lock:
+            self._entries, self._terms, self._sources = entries, terms, sources
+            self._built_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        if self._built_at is None or time.monotonic() - self._built_at > MAX_AGE_SECONDS:
+            self.build()
+
+    def update(self, source, terms):
+        """Replace the terms a source row contributes; a no-op until the index is built"""
+        with self._lock:
+            if self._built_at is None:
+                return
+            old = self._sources.pop(source, [])
+            if terms:
+                self._sources[source] = terms
+            for term in old:
+                self._terms[term] -= 1
+                if not self._terms[term]:
+                    del self._terms[term]
+                    for key in word_starts(term[1]):
+                        i = bisect_left(self._entries, (key, *term))
+                        if i < len(self._entries) and self._entries[i] == (key, *term):
+                            del self._entries[i]
+            for term in terms:
+                self._terms[term] += 1
+                if self._terms[term] == 1:
+                    for key in word_starts(term[1]):
+                        insort(self._entries, (key, *term))
+
+    def remove(self, source):
+        self.update(source, [])
+
+    def lookup(self, prefix, limit=8):
+        """Up to `limit` distinct terms with a word starting with `prefix`"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self._ensure_fresh()
+        results, seen = [], set()
+        with self._lock:
+            i = bisect_left(self._entries, (prefix,))
+            while i < len(self._entries) and len(results) < limit:
+                key, kind, label, url = self._entries[i]
+                if not key.startswith(prefix):
+                    break
+                if (kind, label) not in seen:
+                    seen.add((kind, label))
+                    results.append({'kind': kind, 'label': label, 'url': url})
+                i += 1
+        return results
+
+
+suggestions = PrefixIndex()
@@ -0,0 +1,66 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from main.images import FORMATS, SIZES, derivative_url, has_derivatives
+
+register = template.Library()
+
+
+def _name(image):
+    return getattr(image, 'name', image) or ''
+
+
+def _url(image):
+    """URL of an ImageField file or of a stored file name"""
+    if hasattr(image, 'url'):
+        return image.url
+    return default_storage.url(image) if image else ''
+
+
+def _srcset(name, ext):
+    return ', '.join(f'{derivative_url(name, size, ext)} {width}w' for size, (width, _) in SIZES.items())
+
+
+@register.filter
+def derivative(image, size='card'):
+    """URL of one JPEG derivative of an ImageField file, or of the original if it has none yet"""
+    name = _name(image)
+    if not name:
+        return ''
+    return derivative_url(name, size) if has_derivatives(name) else _url(image)
+
+
+@register.filter
+def srcset(image, ext='jpg'):
+    """`srcset` value listing every width of an image in one format; empty if it has no derivatives"""
+    name = _name(image)
+    if not name or ext not in FORMATS or not has_derivatives(name):
+        return ''
+    return _srcset(name, ext)
+
+
+@register.simple_tag
+def picture(image, size='card', sizes=None, **attrs):
+    """
+    <picture> with WebP and JPEG sources for an ImageField file or stored
+    name; extra keyword arguments become <img> attributes. Falls back to a
+    plain <img> of the original.
+    """
+    name = _name(image)
+    if not name:
+        return ''
+    if size != 'hero':
+        attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    if not has_derivatives(name):
+        return format_html('<img src="{}"{}>', _url(image), flatatt(attrs))
+    sizes = sizes or SIZES[size][1]
+    return format_html(
+        '<picture style="display: contents">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}>'
+        '</picture>',
+        _srcset(name, 'webp'), sizes, derivative_url(name, size), _srcset(name, 'jpg'), sizes, flatatt(attrs),
+    )
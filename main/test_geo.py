@@ -0,0 +1,35 @@
+import pytest
+
+from destinations.models import Destination
+from main.geo import cell_for, within_radius
+
+
+def place(name, latitude, longitude):
+    return Destination.objects.create(name=name, description=name, latitude=latitude, longitude=longitude)
+
+
+@pytest.mark.django_db
+def test_saving_only_the_coordinates_moves_the_grid_cell():
+    destination = place('Sajek', 23.38, 92.29)
+    destination.latitude, destination.longitude = 21.43, 92.01
+    destination.save(update_fields=['latitude', 'longitude'])
+    destination.refresh_from_db()
+    assert destination.geo_cell == cell_for(21.43, 92.01)
+
+
+@pytest.mark.django_db
+def test_radius_search_crosses_the_antimeridian():
+    place('Suva', -18.14, 178.44)
+    place('Vava\'u', -18.65, -173.98)
+    place('Apia', -13.83, -171.76)
+    for longitude in (179.9, -179.9):
+        found = within_radius(Destination.objects.all(), -18.0, longitude, 800).order_by('distance_km')
+        assert [destination.name for destination in found] == ['Suva', 'Vava\'u']
+
+
+@pytest.mark.django_db
+def test_radius_search_around_a_pole_spans_every_longitude():
+    place('Alert', 82.50, -62.35)
+    place('Ny-Alesund', 78.92, 11.93)
+    found = within_radius(Destination.objects.all(), 89.0, 100.0, 1500)
+    assert {destination.name for destination in found} == {'Alert', 'Ny-Alesund'}
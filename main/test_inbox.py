@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from hotels.models import ArchivedNotification, Notification
+from main.notifications import compact_notifications, inbox_page, reconcile_unread_counts
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='tourist', password='x', role='tourist')
+
+
+def notification(user, message, age_days=0, is_read=False, created_at=None):
+    row = Notification.objects.create(user=user, message=message, is_read=is_read)
+    Notification.objects.filter(pk=row.pk).update(created_at=created_at or timezone.now() - timedelta(days=age_days))
+    return row
+
+
+def messages(rows):
+    return [row.message for row in rows]
+
+
+def test_inbox_pages_newest_first_with_ties_by_id(user):
+    same_moment = timezone.now() - timedelta(hours=1)
+    for i in range(5):
+        notification(user, f'Batch {i}', created_at=same_moment)
+    notification(user, 'Latest')
+    notification(User.objects.create_user(username='other', password='x', role='tourist'), 'Not mine')
+
+    first = inbox_page(user, per_page=4)
+    second = inbox_page(user, first.next_cursor, per_page=4)
+    assert messages(first) == ['Latest', 'Batch 4', 'Batch 3', 'Batch 2']
+    assert messages(second) == ['Batch 1', 'Batch 0']
+    assert not second.has_next
+
+
+def test_inbox_page_falls_back_to_the_first_page_for_a_bad_cursor(user):
+    notification(user, 'Booking confirmed')
+    client = Client()
+    client.force_login(user)
+    response = client.get(reverse('my_notifications'), {'cursor': 'not-a-cursor'})
+    assert response.context['is_first_page']
+    assert messages(response.context['notifications']) == ['Booking confirmed']
+
+
+def test_compaction_moves_only_old_read_notifications(user):
+    old_read = [notification(user, f'Old read {i}', age_days=100 + i, is_read=True) for i in range(5)]
+    notification(user, 'Old unread', age_days=200)
+    notification(user, 'Recent read', age_days=10, is_read=True)
+
+    assert compact_notifications(days=90, chunk_size=2) == 5
+    assert sorted(messages(Notification.objects.all())) == ['Old unread', 'Recent read']
+    archived = ArchivedNotification.objects.order_by('created_at')
+    assert messages(archived) == [row.message for row in reversed(old_read)]
+    assert archived[0].created_at < timezone.now() - timedelta(days=100)
+    # Only read notifications go, so the unread counter still agrees
+    assert reconcile_unread_counts() == 0
+
+    notification(user, 'Read long ago', age_days=120, is_read=True)
+    assert compact_notifications(days=90, archive=False) == 1
+    assert ArchivedNotification.objects.count() == 5
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.test import Client
+
+from accounts.models import User
+from guides.models import Tour
+from hotels.models import Hotel, HotelBooking, HotelDailyStats, Notification, RoomNight, RoomType
+from main.lifecycle import scheduler, sweep_lifecycle
+from main.notifications import outbox
+
+# Midnight starting 11 May in Dhaka is still 10 May in UTC (18:00)
+MIDNIGHT = datetime(2030, 5, 11, tzinfo=ZoneInfo('Asia/Dhaka'))
+MAY_10, MAY_11 = MIDNIGHT.date() - timedelta(days=1), MIDNIGHT.date()
+NOTHING = {'tours_completed': 0, 'tours_started': 0, 'stays_completed': 0, 'bookings_expired': 0}
+
+
+def at(moment):
+    return patch('django.utils.timezone.now', return_value=moment)
+
+
+def sweep(moment):
+    with at(moment):
+        counts = sweep_lifecycle()
+    outbox.flush()
+    return counts
+
+
+@pytest.fixture
+def people(transactional_db):
+    return {role: User.objects.create_user(username=role, password='x', role=role)
+            for role in ('guide', 'tourist', 'hotel_manager')}
+
+
+def test_tours_move_on_at_dhaka_midnight(people):
+    ends_today = Tour.objects.create(guide=people['guide'], destination='Cox', start_date=MAY_10, end_date=MAY_10,
+                                     price=100)
+    starts_tomorrow = Tour.objects.create(guide=people['guide'], destination='Sylhet', start_date=MAY_11,
+                                          end_date=MAY_11 + timedelta(days=1), price=100)
+    ends_today.tourists.add(people['tourist'])
+
+    assert sweep(MIDNIGHT - timedelta(minutes=1)) == {
+        **NOTHING, 'tours_started': 1}
+    assert sweep(MIDNIGHT + timedelta(minutes=1)) == {
+        **NOTHING, 'tours_completed': 1, 'tours_started': 1}
+    assert sweep(MIDNIGHT + timedelta(minutes=1)) == NOTHING
+
+    ends_today.refresh_from_db()
+    starts_tomorrow.refresh_from_db()
+    assert (ends_today.status, starts_tomorrow.status) == ('completed', 'ongoing')
+    assert Notification.objects.filter(user=people['tourist'], message__contains='is complete').count() == 1
+
+
+def test_bookings_complete_and_expire_by_dhaka_time(people):
+    hotel = Hotel.objects.create(owner=people['hotel_manager'], name='Sea View')
+    room_type = RoomType.objects.create(hotel=hotel, name='Double', capacity=2, price_per_night=100,
+                                        available_rooms=5)
+
+    def book(check_in, check_out, status, created):
+        with at(created):
+            return HotelBooking.objects.create(
+                tourist=people['tourist'], hotel=hotel, room_type=room_type, check_in=check_in,
+                check_out=check_out, number_of_rooms=2, total_guests=2, room_price=100, total_amount=200,
+                status=status, guest_name='Guest', guest_email='guest@example.com', guest_phone='0',
+            )
+
+    stay = book(MAY_10 - timedelta(days=2), MAY_10, 'confirmed', MIDNIGHT - timedelta(days=10))
+    unconfirmed = book(MAY_11 + timedelta(days=3), MAY_11 + timedelta(days=5), 'pending',
+                       MIDNIGHT - timedelta(hours=48) + timedelta(minutes=2))
+
+    # Check-out day in Dhaka: the guest may still be there
+    assert sweep(MIDNIGHT - timedelta(minutes=1)) == NOTHING
+    assert sweep(MIDNIGHT + timedelta(minutes=1)) == {
+        **NOTHING, 'stays_completed': 1}
+    # 48 hours after the booking was made
+    assert sweep(MIDNIGHT + timedelta(minutes=3)) == {
+        **NOTHING, 'bookings_expired': 1}
+    assert sweep(MIDNIGHT + timedelta(minutes=3)) == NOTHING
+
+    stay.refresh_from_db()
+    unconfirmed.refresh_from_db()
+    assert (stay.status, unconfirmed.status) == ('completed', 'cancelled')
+    # The expired booking's nights are free again; the completed stay keeps its (past) nights
+    held = dict(RoomNight.objects.filter(room_type=room_type).exclude(booked=0).values_list('date', 'booked'))
+    assert held == {MAY_10 - timedelta(days=2): 2, MAY_10 - timedelta(days=1): 2}
+    stats = HotelDailyStats.objects.filter(hotel=hotel)
+    assert sum(stats.values_list('completed', flat=True)) == 1
+    assert sum(stats.values_list('cancelled', flat=True)) == 1
+    assert sum(stats.values_list('pending', flat=True)) == sum(stats.values_list('confirmed', flat=True)) == 0
+    assert Notification.objects.filter(user=people['tourist'], booking__isnull=False).count() == 2
+
+
+@pytest.mark.django_db
+def test_requests_do_not_start_the_scheduler_unless_configured():
+    Client().get('/')
+    assert scheduler.interval == 0
+    assert scheduler._worker is None
@@ -0,0 +1,109 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from hotels.models import Notification, PendingNotification
+from main.notifications import NotificationOutbox, notify, notify_each, outbox
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Sends one notification from a separate process, then exits cleanly or is killed
+SENDER = """
+import os, signal, sys
+import django
+from django.conf import settings
+settings.DATABASES['default']['NAME'] = sys.argv[1]
+django.setup()
+from django.db import transaction
+from main.notifications import notify, outbox
+outbox.flush_interval = 60  # the worker never gets to it
+with transaction.atomic():
+    notify(int(sys.argv[2]), 'Sent before exit')
+if sys.argv[3] == 'kill':
+    os.kill(os.getpid(), signal.SIGKILL)
+"""
+
+
+@pytest.fixture
+def users(db):
+    return [User.objects.create_user(username=f'user{i}', password='x', role='tourist') for i in range(3)]
+
+
+def inboxes(users):
+    return {user.username: list(user.notifications.order_by('pk').values_list('message', flat=True))
+            for user in users}
+
+
+def test_notifications_are_stored_with_the_change_that_sent_them(users, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks():
+        with transaction.atomic():
+            notify(users[:2], 'Tour accepted')
+            notify_each([(users[0], 'Booking confirmed'), (users[1], 'Booking confirmed'), (users[2], 'Welcome')])
+        with pytest.raises(RuntimeError), transaction.atomic():
+            notify(users[2], 'Rolled back')
+            raise RuntimeError
+
+    # One row per message, nothing delivered until a drain
+    assert sorted((row.message, row.recipients) for row in PendingNotification.objects.all()) == [
+        ('Booking confirmed', [users[0].pk, users[1].pk]),
+        ('Tour accepted', [users[0].pk, users[1].pk]),
+        ('Welcome', [users[2].pk]),
+    ]
+    assert not Notification.objects.exists()
+
+
+def test_drain_fans_out_a_batch_in_one_insert(users, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks():
+        notify(users, 'Festival this weekend')
+        notify(users[0], 'Booking confirmed')
+        User.objects.filter(pk=users[2].pk).delete()
+
+    box = NotificationOutbox()
+    with CaptureQueriesContext(connection) as queries:
+        assert box.drain() == 3
+    inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT INTO "hotels_notification"')]
+    assert len(inserts) == 1
+    assert inboxes(users[:2]) == {'user0': ['Festival this weekend', 'Booking confirmed'],
+                                  'user1': ['Festival this weekend']}
+    assert [user.unread_notifications for user in User.objects.order_by('pk')] == [2, 1]
+    assert not PendingNotification.objects.exists()
+    metrics = box.metrics()
+    assert (metrics['batches'], metrics['written'], metrics['skipped'], metrics['max_batch']) == (1, 3, 1, 3)
+
+
+def test_a_caller_writes_a_batch_itself_when_the_backlog_is_full(users, django_capture_on_commit_callbacks,
+                                                                 monkeypatch):
+    box = NotificationOutbox(max_pending=2)
+    monkeypatch.setattr(box, 'ensure_running', lambda: None)
+    with django_capture_on_commit_callbacks(execute=True):
+        box.send(users[:2], 'First')
+    assert not Notification.objects.exists()
+    with django_capture_on_commit_callbacks(execute=True):
+        box.send(users[2], 'Second')
+
+    assert inboxes(users) == {'user0': ['First'], 'user1': ['First'], 'user2': ['Second']}
+    metrics = box.metrics()
+    assert (metrics['inline_writes'], metrics['backlog'], metrics['max_backlog']) == (3, 0, 3)
+
+
+def test_the_worker_delivers_after_commit(users, transactional_db):
+    with transaction.atomic():
+        notify(users[0], 'Booking confirmed')
+    outbox.flush()
+    assert inboxes(users[:1]) == {'user0': ['Booking confirmed']}
+
+
+@pytest.mark.parametrize('ending, delivered', [('exit', ['Sent before exit']), ('kill', [])])
+def test_a_sending_process_that_stops_loses_nothing(users, transactional_db, ending, delivered):
+    subprocess.run([sys.executable, '-c', SENDER, connection.settings_dict['NAME'], str(users[0].pk), ending],
+                   cwd=ROOT, env={'DJANGO_SETTINGS_MODULE': 'DeshGhuri.settings', 'PATH': ''}, timeout=60)
+    # A clean exit flushes; a killed process leaves the row for the next drain anywhere
+    assert inboxes(users[:1]) == {'user0': delivered}
+    assert PendingNotification.objects.count() == (0 if delivered else 1)
+    NotificationOutbox().drain()
+    assert inboxes(users[:1]) == {'user0': ['Sent before exit']}
@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+import pytest
+
+from accounts.models import User
+from guides.models import GuideProfile, Review
+from hotels.models import Hotel, HotelReview
+
+
+def tourists(count):
+    return [User.objects.create_user(username=f'tourist{i}', password='x', role='tourist') for i in range(count)]
+
+
+def aggregates(row):
+    row.refresh_from_db()
+    return row.review_count, row.rating_sum, Decimal(row.average_rating).quantize(Decimal('0.01'))
+
+
+@pytest.mark.django_db
+def test_hotel_ratings_follow_reviews():
+    manager = User.objects.create_user(username='manager', password='x', role='hotel_manager')
+    first = Hotel.objects.create(owner=manager, name='Sea View')
+    second = Hotel.objects.create(owner=manager, name='Hill Top')
+    alice, bob, carol = tourists(3)
+
+    reviews = [HotelReview.objects.create(hotel=first, tourist=tourist, rating=rating)
+               for tourist, rating in [(alice, 5), (bob, 4), (carol, 2)]]
+    assert aggregates(first) == (3, 11, Decimal('3.67'))
+
+    reviews[2].rating = 5
+    reviews[2].save()
+    assert aggregates(first) == (3, 14, Decimal('4.67'))
+
+    # Moving a review takes it off one hotel and onto the other
+    reviews[1].hotel = second
+    reviews[1].save()
+    assert aggregates(first) == (2, 10, Decimal('5.00'))
+    assert aggregates(second) == (1, 4, Decimal('4.00'))
+
+    reviews[0].delete()
+    reviews[2].delete()
+    assert aggregates(first) == (0, 0, Decimal('0.00'))
+
+
+@pytest.mark.django_db
+def test_guide_ratings_follow_reviews():
+    guide = User.objects.create_user(username='guide', password='x', role='guide')
+    profile = GuideProfile.objects.create(user=guide)
+    alice, bob = tourists(2)
+
+    first = Review.objects.create(guide=guide, tourist=alice, rating=3, comment='Fine')
+    second = Review.objects.create(guide=guide, tourist=bob, rating=4, comment='Good')
+    assert aggregates(profile) == (2, 7, Decimal('3.50'))
+
+    first.rating = 1
+    first.save()
+    # Saving without a rating change leaves the totals alone
+    second.comment = 'Very good'
+    second.save()
+    assert aggregates(profile) == (2, 5, Decimal('2.50'))
+
+    second.delete()
+    assert aggregates(profile) == (1, 1, Decimal('1.00'))
@@ -0,0 +1,67 @@
+import pytest
+from django.db import transaction
+from django.urls import reverse
+
+from accounts.models import User
+from hotels.models import Hotel
+from main.suggest import suggestions
+
+
+@pytest.fixture
+def manager(db):
+    return User.objects.create_user(username='manager', password='x', role='hotel_manager')
+
+
+def labels(prefix):
+    return [(row['kind'], row['label']) for row in suggestions.lookup(prefix)]
+
+
+def test_any_word_of_a_label_can_start_the_match(manager):
+    Hotel.objects.create(owner=manager, name='Sea Pearl', city="Cox's  Bazar", area='Kolatoli')
+    Hotel.objects.create(owner=manager, name='Bazar Inn', city='Dhaka')
+    suggestions.build()
+
+    assert labels('BAZ') == [('city', "Cox's  Bazar"), ('hotel', 'Bazar Inn')]
+    assert labels("cox's b") == [('city', "Cox's  Bazar")]
+    assert labels('pearl') == [('hotel', 'Sea Pearl')]
+    assert labels('  ') == []
+
+
+def test_saves_and_deletes_update_the_index_once_committed(manager, django_capture_on_commit_callbacks):
+    first = Hotel.objects.create(owner=manager, name='Sea Pearl', city='Dhaka')
+    suggestions.build()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second = Hotel.objects.create(owner=manager, name='Lake View', city='Dhaka')
+    assert labels('dha') == [('city', 'Dhaka')]
+    assert labels('lake') == [('hotel', 'Lake View')]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError), transaction.atomic():
+            Hotel.objects.create(owner=manager, name='Rolled Back', city='Sylhet')
+            raise RuntimeError
+    assert labels('rolled') == []
+
+    # A city stays while any hotel is in it
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert labels('dha') == [('city', 'Dhaka')]
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    assert labels('dha') == []
+
+
+def test_suggest_endpoint_clamps_the_limit(client, manager):
+    for i in range(25):
+        Hotel.objects.create(owner=manager, name=f'Sea View {i}')
+    suggestions.build()
+
+    def count(**params):
+        return len(client.get(reverse('suggest'), params).json()['suggestions'])
+
+    assert (count(q='sea'), count(q='sea', limit='3'), count(q='sea', limit='100'), count(q='sea', limit='x')) == (
+        8, 3, 20, 8)
+    hotel = Hotel.objects.get(name='Sea View 1')
+    assert client.get(reverse('suggest'), {'q': 'sea view 1'}).json()['suggestions'][0] == {
+        'kind': 'hotel', 'label': 'Sea View 1', 'url': reverse('hotel_detail', args=[hotel.pk]),
+    }
@@ -0,0 +1,29 @@
+"""
+Assertions shared by the apps' tests.
+"""
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(func, *args, using='default', **kwargs):
+    """(func's result, number of queries it ran)"""
+    with CaptureQueriesContext(connections[using]) as queries:
+        result = func(*args, **kwargs)
+    return result, len(queries)
+
+
+def assert_constant_queries(fetch, grow, expected=None, using='default'):
+    """
+    Pin the query count of `fetch` (e.g. a test client GET) and check it
+    doesn't grow with the data: runs `fetch`, then `grow` to add more of the
+    rows it shows, then `fetch` again. Fails if the two counts differ (an
+    N+1) or, when given, either differs from `expected`. Returns the last
+    result.
+    """
+    _, before = count_queries(fetch, using=using)
+    grow()
+    result, after = count_queries(fetch, using=using)
+    assert before == after, f"Query count grew with the data: {before} -> {after}"
+    if expected is not None:
+        assert after == expected, f"Expected {expected} queries, got {after}"
+    return result
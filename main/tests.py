@@ -1,3 +1,138 @@
-from django.test import TestCase
+import asyncio
+import json
+import time
 
-# Create your tests here.
+import pytest
+from asgiref.sync import sync_to_async
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import User
+from DeshGhuri.asgi import application
+from main.notifications import events, notify, outbox
+
+
+async def asgi_get(path, cookies, until, timeout=5):
+    """Run a GET through the ASGI application and return the body once `until(body)` holds"""
+    sent = asyncio.Queue()
+    disconnect = asyncio.Event()
+    received = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if received:
+            return received.pop()
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path.split('?')[0], 'raw_path': path.encode(), 'root_path': '',
+        'query_string': path.partition('?')[2].encode(),
+        'headers': [(b'host', b'testserver'), (b'cookie', cookies.encode())],
+        'client': ('127.0.0.1', 1234), 'server': ('testserver', 80),
+    }
+    task = asyncio.create_task(application(scope, receive, sent.put))
+    status, body = None, b''
+    try:
+        async with asyncio.timeout(timeout):
+            while not until(body.decode()):
+                message = await sent.get()
+                if message['type'] == 'http.response.start':
+                    status = message['status']
+                else:
+                    body += message.get('body', b'')
+                    if not message.get('more_body'):
+                        break
+    finally:
+        disconnect.set()
+        await asyncio.wait_for(task, timeout)
+    return status, body.decode()
+
+
+async def subscribed(user, timeout=5):
+    """Wait until a stream or poll has subscribed to the user's events"""
+    async with asyncio.timeout(timeout):
+        while not events.subscriber_count(user.pk):
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def logged_in_user(db):
+    user = User.objects.create_user(username='listener', password='Testpass123', role='tourist')
+    client = Client()
+    client.force_login(user)
+    return user, '; '.join(f'{key}={morsel.value}' for key, morsel in client.cookies.items())
+
+
+def send(user, message):
+    notify(user, message)
+    outbox.flush()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_pushes_new_notifications(logged_in_user):
+    user, cookies = logged_in_user
+
+    async def scenario():
+        stream = asyncio.create_task(asgi_get(reverse('notification_stream'), cookies,
+                                              until=lambda body: 'Booking confirmed' in body))
+        await subscribed(user)
+        await sync_to_async(send)(user, 'Booking confirmed')
+        return await stream
+
+    status, body = asyncio.run(scenario())
+    assert status == 200
+    event = json.loads(body.split('data: ')[1].split('\n')[0])
+    assert event['message'] == 'Booking confirmed'
+    assert f"id: {event['id']}" in body
+
+
+@pytest.mark.django_db(transaction=True)
+def test_long_poll_returns_backlog_and_waits_for_new(logged_in_user):
+    user, cookies = logged_in_user
+    send(user, 'First')
+
+    status, body = asyncio.run(asgi_get(f"{reverse('notification_poll')}?after=0", cookies, until=lambda body: False))
+    data = json.loads(body)
+    assert status == 200
+    assert [n['message'] for n in data['notifications']] == ['First']
+
+    async def scenario():
+        poll = asyncio.create_task(asgi_get(f"{reverse('notification_poll')}?after={data['last_id']}", cookies,
+                                            until=lambda body: False))
+        await subscribed(user)
+        await sync_to_async(send)(user, 'Second')
+        return await poll
+
+    status, body = asyncio.run(scenario())
+    assert [n['message'] for n in json.loads(body)['notifications']] == ['Second']
+
+
+@pytest.mark.django_db
+def test_stream_requires_login():
+    status, _ = asyncio.run(asgi_get(reverse('notification_stream'), '', until=lambda body: False))
+    assert status == 401
+
+
+@pytest.mark.django_db
+def test_stream_is_not_offered_under_wsgi(logged_in_user):
+    user, _ = logged_in_user
+    client = Client()
+    client.force_login(user)
+    assert client.get(reverse('notification_stream')).status_code == 204
+    assert client.get(reverse('home')).context['notification_streaming'] is False
+
+
+@pytest.mark.django_db(transaction=True)
+def test_poll_answers_at_once_under_wsgi(logged_in_user):
+    user, _ = logged_in_user
+    client = Client()
+    client.force_login(user)
+    send(user, 'First')
+
+    data = client.get(reverse('notification_poll'), {'after': 0}).json()
+    assert [n['message'] for n in data['notifications']] == ['First']
+    started = time.monotonic()
+    data = client.get(reverse('notification_poll'), {'after': data['last_id']}).json()
+    assert data['notifications'] == [] and time.monotonic() - started < 5
+    assert client.get(reverse('home')).context['notification_poll_seconds'] > 0
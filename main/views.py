@@ -1,12 +1,16 @@
 from django.shortcuts import render
+from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
 from destinations.models import Destination
 from packages.models import Package
 from guides.models import GuideProfile
 from hotels.models import Hotel
+from .notifications import outbox
+from .suggest import suggestions
 def home(request):
     destinations = Destination.objects.all()[:6]
     packages = Package.objects.all()[:6]
-    guides = GuideProfile.objects.all()[:6]
+    guides = GuideProfile.objects.select_related('user').prefetch_related('spoken_languages')[:6]
     hotels = Hotel.objects.all()[:6]
 
     for package in packages:
@@ -20,3 +24,19 @@ def home(request):
         'hotels': hotels,
     }
     return render(request, 'main/home.html', context)
+
+
+def suggest(request):
+    """Typeahead suggestions for hotels, places, destinations and packages"""
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    return JsonResponse({'suggestions': suggestions.lookup(query, limit)})
+
+
+@staff_member_required
+def notification_outbox(request):
+    """Backlog and batch metrics of this process's notification outbox, and the rows still pending"""
+    return JsonResponse(outbox.metrics())
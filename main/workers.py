@@ -0,0 +1,35 @@
+"""
+Background threads owned by one process.
+
+The notification outbox, image derivative queue and lifecycle scheduler
+each run a loop on a daemon thread started the first time they're needed.
+"""
+import os
+import threading
+
+
+class BackgroundWorker:
+    """Runs `run()` on a daemon thread named `thread_name`, one per process"""
+
+    thread_name = 'background-worker'
+
+    def __init__(self):
+        self._start_lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+
+    def running(self):
+        # A forked child inherits the worker but not its thread
+        return self._worker is not None and self._worker.is_alive() and self._pid == os.getpid()
+
+    def ensure_running(self):
+        """Start the thread unless this process already has it"""
+        with self._start_lock:
+            if self.running():
+                return
+            self._pid = os.getpid()
+            self._worker = threading.Thread(target=self.run, name=self.thread_name, daemon=True)
+            self._worker.start()
+
+    def run(self):
+        raise NotImplementedError
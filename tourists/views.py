@@ -5,9 +5,12 @@ from django.http import HttpResponseForbidden
 from .models import Tourist
 from .forms import TouristProfileForm
 from accounts.utils import role_required
+from guides.forms import OpenTourRequestForm
+from guides.marketplace import announce_open_request
 from guides.models import TourRequest
 from packages.models import Booking
-from hotels.models import HotelBooking, Notification  # ✅ ADD HOTEL IMPORTS
+from hotels.models import HotelBooking  # ✅ ADD HOTEL IMPORTS
+from main.notifications import mark_all_read
 
 
 # --------------------------
@@ -34,10 +37,7 @@ def tourist_dashboard(request):
     ).select_related('hotel', 'room_type').order_by('-created_at')
 
     # ✅ GET UNREAD NOTIFICATIONS
-    unread_notifications = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).count()
+    unread_notifications = request.user.unread_notifications
 
     # Calculate stats
     total_guide_bookings = guide_bookings.count()
@@ -106,9 +106,22 @@ def edit_tourist_profile(request):
     return render(request, "tourists/edit_profile.html", {"form": form})
 
 
+@login_required
+@role_required(['tourist'])
 def create_tour_requests(request):
-    # Your create tour request logic here
-    return render(request, 'tourists/create_tour_request.html')
+    """Post an open tour request that any matching guide can claim"""
+    if request.method == "POST":
+        form = OpenTourRequestForm(request.POST)
+        if form.is_valid():
+            tour_request = form.save(commit=False)
+            tour_request.tourist = request.user
+            tour_request.save()
+            announce_open_request(tour_request)
+            messages.success(request, "Your request is on the board; we'll let you know when a guide takes it.")
+            return redirect('tourist_dashboard')
+    else:
+        form = OpenTourRequestForm()
+    return render(request, 'tourists/create_tour_request.html', {"form": form})
 
 
 # ✅ ADD NOTIFICATION FUNCTION
@@ -117,6 +130,6 @@ def create_tour_requests(request):
 def mark_notifications_read(request):
     """Mark all notifications as read for the current user"""
     if request.method == "POST":
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        mark_all_read(request.user)
         messages.success(request, "All notifications marked as read!")
     return redirect('tourist_dashboard')
\ No newline at end of file